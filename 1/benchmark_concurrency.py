@@ -0,0 +1,156 @@
+"""
+Concurrent Chat Benchmark
+
+This script shows that the async chat path doesn't block: N chats run in
+parallel finish in about the time of one, and the event loop stays
+responsive while they wait for the LLM.
+
+It runs the same questions twice through ConversationBot.achat:
+- One after another (serial) - total time ≈ N × one chat
+- All at once with asyncio.gather (parallel) - total time ≈ one chat
+
+and measures the event loop lag meanwhile (how late a 10 ms heartbeat
+fires): with a blocking chat path the lag would be a whole LLM round trip.
+
+Usage:
+    python benchmark_concurrency.py
+    python benchmark_concurrency.py --chats 16 --llm-latency 2.0
+    python benchmark_concurrency.py --openai      # real OpenAI calls (costs tokens)
+
+The corpus in ./vector_store is used as is (start the server once first
+to build it). By default the LLM is simulated: it answers after
+--llm-latency seconds, like a remote API call, so no API key is needed.
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.chatbot import ConversationBot
+from src.corpus import CorpusDB
+
+QUESTIONS = [
+    "What is this book about?",
+    "What does the book say about product metrics?",
+    "How should I answer estimation questions?",
+    "What are the main types of PM interview questions?",
+    "How do I prioritize features on a roadmap?",
+    "What does the book recommend for behavioral questions?",
+    "How should a product manager approach pricing?",
+    "What is a good framework for product design questions?",
+]
+
+
+def simulated_llm(latency: float) -> RunnableLambda:
+    """
+    Stand-in for the OpenAI chat model that answers after `latency` seconds.
+
+    The async version awaits (like a real network call), the sync version
+    sleeps (blocks its thread).
+
+    Args:
+        latency (float): Seconds per call
+
+    Returns:
+        RunnableLambda: Chat-model-like runnable returning an AIMessage
+    """
+    def answer(_) -> AIMessage:
+        time.sleep(latency)
+        return AIMessage(content="Simulated answer.")
+
+    async def aanswer(_) -> AIMessage:
+        await asyncio.sleep(latency)
+        return AIMessage(content="Simulated answer.")
+
+    return RunnableLambda(answer, afunc=aanswer)
+
+
+async def measure(bot: ConversationBot, questions: list, parallel: bool) -> dict:
+    """
+    Run the chats serially or in parallel and measure time and event loop lag.
+
+    Args:
+        bot (ConversationBot): The chatbot
+        questions (list): One question per chat
+        parallel (bool): Run all chats at once (True) or one after another
+
+    Returns:
+        dict: total_s and max_loop_lag_ms
+    """
+    # Start from a cold cache, so both runs do the same work
+    bot.answer_cache.clear()
+    bot.vector_db.embeddings.query_cache.clear()
+
+    # Heartbeat: should wake up every 10 ms; any delay beyond that means the
+    # loop was blocked
+    max_lag = 0.0
+    running = True
+
+    async def heartbeat():
+        nonlocal max_lag
+        while running:
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            max_lag = max(max_lag, time.perf_counter() - expected)
+
+    # Every chat is a different user (session), as on the server
+    run = uuid.uuid4().hex
+    chats = [(question, f"{run}-{i}") for i, question in enumerate(questions)]
+
+    monitor = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    if parallel:
+        await asyncio.gather(*(bot.achat(question, session_id) for question, session_id in chats))
+    else:
+        for question, session_id in chats:
+            await bot.achat(question, session_id)
+    total = time.perf_counter() - start
+    running = False
+    await monitor
+    return {"total_s": total, "max_loop_lag_ms": max_lag * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs parallel async chats")
+    parser.add_argument("--chats", type=int, default=8, help="Number of chats")
+    parser.add_argument("--llm-latency", type=float, default=1.0,
+                        help="Seconds per simulated LLM call")
+    parser.add_argument("--openai", action="store_true", help="Use the real OpenAI model")
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    corpus = CorpusDB(os.path.join(base_dir, "vector_store"),
+                      embedding_cache_dir=os.path.join(base_dir, "embeddings"))
+    corpus.load()
+
+    if not args.openai:
+        os.environ.setdefault("OPENAI_API_KEY", "sk-simulated")
+    bot = ConversationBot(corpus)
+    if not args.openai:
+        bot.llm = simulated_llm(args.llm_latency)
+        bot._initialize_chain()
+
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.chats)]
+    asyncio.run(measure(bot, questions[:1], parallel=False))  # Warm up
+
+    single = asyncio.run(measure(bot, questions[:1], parallel=False))
+    serial = asyncio.run(measure(bot, questions, parallel=False))
+    parallel = asyncio.run(measure(bot, questions, parallel=True))
+
+    print(f"\n{'run':<22}{'total (s)':>12}{'max loop lag (ms)':>20}")
+    for label, result in [("1 chat", single), (f"{args.chats} chats, serial", serial),
+                          (f"{args.chats} chats, parallel", parallel)]:
+        print(f"{label:<22}{result['total_s']:>12.2f}{result['max_loop_lag_ms']:>20.1f}")
+    print(f"\nParallel speedup: {serial['total_s'] / parallel['total_s']:.1f}x "
+          f"(parallel took {parallel['total_s'] / single['total_s']:.1f}x the time of one chat)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Embedding Backend Benchmark
+
+This script compares the PyTorch and the int8 ONNX Runtime embedding
+backends on the same texts:
+- Parity: cosine similarity between the two backends' vectors
+- Throughput: chunks embedded per second (the ingestion workload)
+- Latency: milliseconds per single query (the chat workload)
+
+Usage:
+    python benchmark_embeddings.py
+    python benchmark_embeddings.py --chunks 2000 --queries 200
+
+Chunks come from the PDFs in data/sample_documents/ (or generated text
+if there are none). The ONNX model is exported to ./onnx_models on the
+first run.
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import argparse
+import copy
+import os
+import time
+
+import numpy as np
+
+from src.onnx_backend import OnnxEncoder, check_parity
+from src.pdf_pages import iter_pages
+from src.vector_db import HuggingFaceEmbeddingsWrapper
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def load_chunks(limit: int) -> list:
+    """
+    Collect up to `limit` text chunks from the sample PDFs.
+
+    Args:
+        limit (int): Maximum number of chunks
+
+    Returns:
+        list: Chunk texts (~1000 characters each, like the real splitter)
+    """
+    sample_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample_documents")
+    chunks = []
+    if os.path.isdir(sample_dir):
+        for name in sorted(os.listdir(sample_dir)):
+            if not name.endswith(".pdf"):
+                continue
+            for _, text in iter_pages(os.path.join(sample_dir, name)):
+                chunks.extend(text[i:i + 1000] for i in range(0, len(text), 800) if text[i:i + 1000].strip())
+                if len(chunks) >= limit:
+                    return chunks[:limit]
+    # No PDFs: fall back to generated sentences of varied length
+    rng = np.random.default_rng(0)
+    words = "product manager interview feature roadmap customer metric launch team design".split()
+    while len(chunks) < limit:
+        chunks.append(" ".join(rng.choice(words, size=int(rng.integers(5, 200)))))
+    return chunks
+
+
+def benchmark(name: str, wrapper: HuggingFaceEmbeddingsWrapper, chunks: list, queries: list) -> dict:
+    """
+    Measure document throughput and single-query latency of one backend.
+
+    Args:
+        name (str): Backend label for the report
+        wrapper (HuggingFaceEmbeddingsWrapper): Wrapper using that backend
+        chunks (list): Document chunks
+        queries (list): Queries (embedded one at a time, query cache disabled)
+
+    Returns:
+        dict: chunks_per_second and latency percentiles in milliseconds
+    """
+    wrapper._encode(chunks[:8])  # Warm up (first call allocates buffers)
+
+    start = time.perf_counter()
+    wrapper._encode(chunks)
+    elapsed = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        wrapper.model.encode([query], show_progress_bar=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    result = {
+        "chunks_per_second": len(chunks) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+    print(f"{name:>6}: {result['chunks_per_second']:8.1f} chunks/s   "
+          f"query p50 {result['p50_ms']:6.2f} ms   p95 {result['p95_ms']:6.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PyTorch and ONNX embedding backends")
+    parser.add_argument("--chunks", type=int, default=500, help="Chunks for the throughput test")
+    parser.add_argument("--queries", type=int, default=100, help="Queries for the latency test")
+    parser.add_argument("--onnx-dir", default="onnx_models", help="Where the ONNX export is kept")
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.chunks)
+    queries = [chunk[:80] for chunk in chunks[:args.queries]]
+    print(f"Benchmarking {MODEL_NAME} on {len(chunks)} chunks, {len(queries)} queries\n")
+
+    torch_wrapper = HuggingFaceEmbeddingsWrapper(MODEL_NAME)
+    onnx_wrapper = copy.copy(torch_wrapper)
+    onnx_wrapper.model = OnnxEncoder(torch_wrapper.model, MODEL_NAME, export_dir=args.onnx_dir)
+
+    # Parity on real chunks, not just the built-in sample texts
+    parity = check_parity(torch_wrapper.model, onnx_wrapper.model, chunks[:64])
+    print(f"Parity: min cosine {parity['min_cosine']:.4f}, mean cosine {parity['mean_cosine']:.4f}, "
+          f"max abs diff {parity['max_abs_diff']:.4f} -> {'OK' if parity['passed'] else 'FAILED'}\n")
+
+    torch_result = benchmark("torch", torch_wrapper, chunks, queries)
+    onnx_result = benchmark("onnx", onnx_wrapper, chunks, queries)
+
+    print(f"\nONNX int8 speedup: {onnx_result['chunks_per_second'] / torch_result['chunks_per_second']:.2f}x "
+          f"throughput, {torch_result['p50_ms'] / onnx_result['p50_ms']:.2f}x query latency (p50)")
+
+
+if __name__ == "__main__":
+    main()
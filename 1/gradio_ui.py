@@ -8,7 +8,8 @@ to the FastAPI backend. The UI provides:
 - Backend status checking
 - Conversation history management
 
-The UI communicates with the backend via HTTP REST API calls.
+The UI communicates with the backend via HTTP REST API calls; answers
+are streamed from the /chat/stream endpoint (Server-Sent Events).
 
 Author: Project 1 - LLM Practice Projects
 """
@@ -16,13 +17,66 @@ Author: Project 1 - LLM Practice Projects
 import gradio as gr
 import requests
 import json
-from typing import Tuple, List
+from typing import Iterator, Optional, Tuple, List
 
 # FastAPI backend URL - the UI calls this backend for all operations
 API_BASE_URL = "http://localhost:8000"
 
 
-def chat_with_backend(message: str, history: List) -> Tuple[str, List]:
+def format_history(history: List) -> List[dict]:
+    """
+    Convert chat history to the dict format Gradio 6.0.2 requires.
+    
+    Handles different input formats for compatibility.
+    
+    Args:
+        history (List): Chat history (dicts, [user, bot] lists or tuples)
+        
+    Returns:
+        List[dict]: History as dicts with 'role' and 'content'
+    """
+    formatted_history = []
+    for h in history:
+        if isinstance(h, dict) and 'role' in h and 'content' in h:
+            # Already in correct dict format - use as is
+            formatted_history.append({'role': str(h['role']), 'content': str(h['content'])})
+        elif isinstance(h, list) and len(h) == 2:
+            # Convert list format [user_msg, bot_msg] to dict format
+            formatted_history.append({'role': 'user', 'content': str(h[0])})
+            formatted_history.append({'role': 'assistant', 'content': str(h[1])})
+        elif isinstance(h, tuple) and len(h) == 2:
+            # Convert tuple format to dict format
+            formatted_history.append({'role': 'user', 'content': str(h[0])})
+            formatted_history.append({'role': 'assistant', 'content': str(h[1])})
+    return formatted_history
+
+
+def format_sources(source_docs: List[dict]) -> str:
+    """
+    Format source documents as a Markdown list to append to an answer.
+    
+    Args:
+        source_docs (List[dict]): Source documents from the backend
+        
+    Returns:
+        str: "Sources" section (empty string if there are no sources)
+    """
+    if not source_docs:
+        return ""
+    sources_text = "\n\n**Sources:**\n"
+    for i, doc in enumerate(source_docs[:3], 1):  # Show top 3 sources
+        source_info = f"{i}. "
+        # Add page number if available
+        if "source" in doc.get("metadata", {}):
+            source_info += f"Page {doc['metadata'].get('page', 'N/A')} - "
+        # Add content preview (first 150 characters)
+        source_info += doc["content"][:150] + "..."
+        sources_text += source_info + "\n"
+    return sources_text
+
+
+def chat_with_backend(message: str, history: List,
+                      session_id: Optional[str] = None) -> Tuple[str, List, Optional[str]]:
     """
     Send message to FastAPI backend and update chat history.
     
@@ -35,13 +89,16 @@ def chat_with_backend(message: str, history: List) -> Tuple[str, List]:
     Args:
         message (str): User's message/question
         history (List): Previous chat history in Gradio format
+        session_id (Optional[str]): Backend session of this browser tab
+                                    (None before the first message)
         
     Returns:
-        Tuple[str, List]: Empty string (to clear input) and updated history
+        Tuple[str, List, Optional[str]]: Empty string (to clear input),
+                                         updated history and the session ID
     """
     # Validate input - don't process empty messages
     if not message.strip():
-        return "", history or []
+        return "", history or [], session_id
     
     # Initialize history if None or empty
     if history is None:
@@ -52,27 +109,14 @@ def chat_with_backend(message: str, history: List) -> Tuple[str, List]:
         history = []
     
     # Convert history to dict format - Gradio 6.0.2 requires dicts with 'role' and 'content'
-    # Handle different input formats for compatibility
-    formatted_history = []
-    for h in history:
-        if isinstance(h, dict) and 'role' in h and 'content' in h:
-            # Already in correct dict format - use as is
-            formatted_history.append({'role': str(h['role']), 'content': str(h['content'])})
-        elif isinstance(h, list) and len(h) == 2:
-            # Convert list format [user_msg, bot_msg] to dict format
-            formatted_history.append({'role': 'user', 'content': str(h[0])})
-            formatted_history.append({'role': 'assistant', 'content': str(h[1])})
-        elif isinstance(h, tuple) and len(h) == 2:
-            # Convert tuple format to dict format
-            formatted_history.append({'role': 'user', 'content': str(h[0])})
-            formatted_history.append({'role': 'assistant', 'content': str(h[1])})
+    formatted_history = format_history(history)
     
     try:
         # Send HTTP POST request to FastAPI backend
         # This is how the frontend communicates with the backend
         response = requests.post(
             f"{API_BASE_URL}/chat",              # Backend endpoint
-            json={"message": message},           # Request body (JSON)
+            json={"message": message, "session_id": session_id},  # Request body (JSON)
             headers={"Content-Type": "application/json"},
             timeout=60                           # Wait up to 60 seconds for response
         )
@@ -81,67 +125,140 @@ def chat_with_backend(message: str, history: List) -> Tuple[str, List]:
             # Success - parse the response
             data = response.json()
             answer = data.get("answer", "Sorry, I couldn't get a response.")
+            session_id = data.get("session_id", session_id)  # Assigned on the first message
             
             # Add source documents info to the answer for display
             # This shows users which parts of the document were used
-            source_docs = data.get("source_documents", [])
-            if source_docs:
-                sources_text = "\n\n**Sources:**\n"
-                for i, doc in enumerate(source_docs[:3], 1):  # Show top 3 sources
-                    source_info = f"{i}. "
-                    # Add page number if available
-                    if "source" in doc.get("metadata", {}):
-                        source_info += f"Page {doc['metadata'].get('page', 'N/A')} - "
-                    # Add content preview (first 150 characters)
-                    source_info += doc["content"][:150] + "..."
-                    sources_text += source_info + "\n"
-                answer += sources_text
+            answer += format_sources(data.get("source_documents", []))
             
             # Update history - Gradio 6.0.2 expects list of dicts with 'role' and 'content'
             formatted_history.append({'role': 'user', 'content': str(message)})
             formatted_history.append({'role': 'assistant', 'content': str(answer)})
             
-            return "", formatted_history  # Return empty string to clear input field
+            return "", formatted_history, session_id  # Return empty string to clear input field
         else:
             # Backend returned an error status code
             error_msg = f"Error: {response.status_code} - {response.text}"
             formatted_history.append({'role': 'user', 'content': str(message)})
             formatted_history.append({'role': 'assistant', 'content': str(error_msg)})
-            return "", formatted_history
+            return "", formatted_history, session_id
             
     except requests.exceptions.ConnectionError:
         # Backend is not running or not reachable
         error_msg = "❌ Cannot connect to FastAPI backend. Please make sure the server is running on http://localhost:8000"
         formatted_history.append({'role': 'user', 'content': str(message)})
         formatted_history.append({'role': 'assistant', 'content': str(error_msg)})
-        return "", formatted_history
+        return "", formatted_history, session_id
     except Exception as e:
         # Any other error
         error_msg = f"❌ Error: {str(e)}"
         formatted_history.append({'role': 'user', 'content': str(message)})
         formatted_history.append({'role': 'assistant', 'content': str(error_msg)})
-        return "", formatted_history
+        return "", formatted_history, session_id
 
 
-def clear_conversation() -> Tuple[List, str]:
+def stream_chat_with_backend(message: str, history: List,
+                             session_id: Optional[str] = None) -> Iterator[Tuple[str, List, Optional[str]]]:
+    """
+    Send message to the streaming endpoint and show the answer as it is generated.
+    
+    This is a generator: Gradio re-renders the chat after every yield, so
+    each token appears as soon as the backend sends it (instead of the
+    whole answer after it is complete). The sources are appended when
+    the final "sources" event arrives.
+    
+    Args:
+        message (str): User's message/question
+        history (List): Previous chat history in Gradio format
+        session_id (Optional[str]): Backend session of this browser tab
+                                    (None before the first message)
+        
+    Yields:
+        Tuple[str, List, Optional[str]]: Empty string (to clear input),
+                                         updated history and the session ID
+    """
+    # Validate input - don't process empty messages
+    if not message.strip():
+        yield "", history or [], session_id
+        return
+    
+    formatted_history = format_history(history if isinstance(history, list) else [])
+    formatted_history.append({'role': 'user', 'content': str(message)})
+    formatted_history.append({'role': 'assistant', 'content': ""})
+    answer = ""
+    yield "", formatted_history, session_id  # Show the question right away
+    
+    try:
+        # stream=True: read the response while the backend is still writing it
+        # Timeout: 10s to connect, then up to 60s between two chunks
+        with requests.post(
+            f"{API_BASE_URL}/chat/stream",
+            json={"message": message, "session_id": session_id},
+            headers={"Accept": "text/event-stream"},
+            stream=True,
+            timeout=(10, 60)
+        ) as response:
+            if response.status_code != 200:
+                formatted_history[-1]['content'] = f"Error: {response.status_code} - {response.text}"
+                yield "", formatted_history, session_id
+                return
+            # The backend assigns a session ID on the first message
+            session_id = response.headers.get("X-Session-ID", session_id)
+            
+            # Server-Sent Events: "event: <name>" and "data: <json>" lines,
+            # events separated by a blank line
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data = json.loads(line[len("data:"):].strip())
+                    if event == "token":
+                        answer += data
+                    elif event == "sources":
+                        answer += format_sources(data.get("source_documents", []))
+                    elif event == "error":
+                        answer += f"\n\n❌ {data.get('detail', 'Error')}"
+                    formatted_history[-1]['content'] = answer
+                    yield "", formatted_history, session_id
+    
+    except requests.exceptions.ConnectionError:
+        # Backend is not running or not reachable
+        formatted_history[-1]['content'] = "❌ Cannot connect to FastAPI backend. Please make sure the server is running on http://localhost:8000"
+        yield "", formatted_history, session_id
+    except Exception as e:
+        # Any other error (keep what was already received)
+        formatted_history[-1]['content'] = answer + f"\n\n❌ Error: {str(e)}"
+        yield "", formatted_history, session_id
+
+
+def clear_conversation(session_id: Optional[str] = None) -> Tuple[List, str, Optional[str]]:
     """
     Clear conversation history via backend.
     
     Calls the /clear endpoint on the FastAPI backend to reset
-    the conversation history. This allows users to start fresh.
+    this tab's conversation history. This allows users to start fresh.
     
+    Args:
+        session_id (Optional[str]): Backend session of this browser tab
+        
     Returns:
-        Tuple[List, str]: Empty history list and status message
+        Tuple[List, str, Optional[str]]: Empty history list, status message
+                                         and the session ID (None - the next
+                                         message starts a new session)
     """
+    if session_id is None:
+        # Nothing sent yet - nothing to clear on the backend
+        return [], "✅ Conversation history cleared!", None
     try:
         # Send POST request to clear endpoint
-        response = requests.post(f"{API_BASE_URL}/clear", timeout=5)
+        response = requests.post(f"{API_BASE_URL}/clear", json={"session_id": session_id}, timeout=5)
         if response.status_code == 200:
-            return [], "✅ Conversation history cleared!"
+            return [], "✅ Conversation history cleared!", None
         else:
-            return [], f"⚠️ Error clearing history: {response.status_code}"
+            return [], f"⚠️ Error clearing history: {response.status_code}", session_id
     except Exception as e:
-        return [], f"⚠️ Error: {str(e)}"
+        return [], f"⚠️ Error: {str(e)}", session_id
 
 
 def check_backend_status() -> str:
@@ -161,6 +278,10 @@ def check_backend_status() -> str:
             # Backend is healthy
             data = response.json()
             return f"✅ {data.get('message', 'Backend is healthy')}"
+        elif response.status_code == 503:
+            # Backend is up but still loading the model and index (or failed to)
+            data = response.json()
+            return f"⏳ {data.get('message', 'Backend is starting up')}"
         else:
             # Backend returned an error
             return f"⚠️ Backend returned status {response.status_code}"
@@ -208,6 +329,9 @@ def create_ui():
                 interactive=False
             )
         
+        # Backend session ID of this browser tab (each tab has its own conversation)
+        session_id = gr.State(None)
+        
         # Chat interface
         chatbot = gr.Chatbot(
             label="Conversation",
@@ -236,6 +360,7 @@ def create_ui():
             2. **Vector DB Search**: Uses FAISS to find relevant document chunks based on the standalone query.
             
             3. **RAG Response**: OpenAI generates answers using retrieved context and conversation history.
+               The answer is streamed - it appears word by word while it is being generated.
             
             4. **Conversation Memory**: Maintains context across multiple turns for natural conversations.
             
@@ -248,21 +373,23 @@ def create_ui():
             """)
         
         # Event handlers
+        # Answers are streamed: tokens appear as they are generated
         msg.submit(
-            fn=chat_with_backend,
-            inputs=[msg, chatbot],
-            outputs=[msg, chatbot]
+            fn=stream_chat_with_backend,
+            inputs=[msg, chatbot, session_id],
+            outputs=[msg, chatbot, session_id]
         )
         
         submit_btn.click(
-            fn=chat_with_backend,
-            inputs=[msg, chatbot],
-            outputs=[msg, chatbot]
+            fn=stream_chat_with_backend,
+            inputs=[msg, chatbot, session_id],
+            outputs=[msg, chatbot, session_id]
         )
         
         clear_btn.click(
             fn=clear_conversation,
-            outputs=[chatbot, status_text]
+            inputs=[session_id],
+            outputs=[chatbot, status_text, session_id]
         )
         
         status_btn.click(
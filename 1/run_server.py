@@ -5,25 +5,72 @@ This script starts the FastAPI backend server using uvicorn.
 It's the recommended way to run the server (better than running main.py directly).
 
 Usage:
-    python run_server.py
+    python run_server.py                  # Development: one process, auto-reload
+    python run_server.py --workers 4      # Production: 4 pre-forked workers
 
-The server will:
+Development mode:
 - Start on http://0.0.0.0:8000 (accessible from all network interfaces)
 - Auto-reload on code changes (reload=True)
 - Initialize vector DB and chatbot on startup
 
+Production mode (--workers N):
+- The embedding model, the (memory-mapped) shards and the chatbot are
+  loaded once, then N workers are forked and share that memory
+- Workers are recycled gracefully (--max-requests, SIGHUP, or if one dies)
+- A per-worker memory report (RSS/PSS) is printed once all workers are up
+- Use SESSION_STORE=sqlite or redis, so any worker can serve any turn
+
 Author: Project 1 - LLM Practice Projects
 """
 
+import argparse
+
 import uvicorn
 
-if __name__ == "__main__":
-    # Run the FastAPI application using uvicorn ASGI server
-    # uvicorn is a fast ASGI server implementation
-    uvicorn.run(
-        "src.main:app",      # Path to FastAPI app (module:variable)
-        host="0.0.0.0",      # Listen on all network interfaces (accessible from other devices)
-        port=8000,           # Port number
-        reload=True          # Auto-reload on code changes (useful for development)
-    )
 
+def main():
+    parser = argparse.ArgumentParser(description="Start the Conversational RAG API")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Production mode with this many pre-forked workers (default: development mode)")
+    parser.add_argument("--max-requests", type=int, default=None,
+                        help="Recycle a worker after this many requests")
+    parser.add_argument("--max-requests-jitter", type=int, default=0,
+                        help="Random extra requests per worker, so they don't all recycle at once")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0,
+                        help="Seconds a stopping worker gets to finish its requests")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch/FAISS threads per worker (default: CPU cores / workers)")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        # Run the FastAPI application using uvicorn ASGI server
+        # uvicorn is a fast ASGI server implementation
+        uvicorn.run(
+            "src.main:app",      # Path to FastAPI app (module:variable)
+            host=args.host,      # Listen on all network interfaces (accessible from other devices)
+            port=args.port,      # Port number
+            reload=True          # Auto-reload on code changes (useful for development)
+        )
+        return
+
+    # Imported here: loading the app pulls in the ML libraries
+    from src import main as app_module
+    from src.prefork import PreforkServer
+
+    PreforkServer(
+        app_module.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        preload=app_module.initialize_services,  # Load once, share with all workers
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        threads_per_worker=args.threads_per_worker,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Answer Cache Module - Semantic Cache of RAG Answers
+
+This module handles:
+1. Remembering the answer (and sources) given to each standalone question
+2. Answering near-duplicate questions from the cache, matched by embedding
+   similarity instead of exact text
+3. Invalidating answers when the index changes (version check) or they
+   get old (TTL), and evicting the oldest answers when the cache is full
+4. Counting hits, misses and evictions
+
+Why?
+- Most users ask the same handful of questions about a document:
+  "What is this book about?", "what's the book about", "Summarize the book"
+- Each one costs a retrieval and a full LLM generation; a cache hit costs
+  one matrix-vector product
+
+The key is the embedding of the *standalone* query, so follow-ups like
+"Who wrote it?" only hit answers for the question they really mean.
+
+Answers generated with a conversation's history (and possibly a rewrite
+based on it) can repeat what the user said, so they are only returned to
+that same session. Answers to questions asked without history are shared
+by all sessions.
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Cache of answers keyed by standalone-query embeddings.
+
+    Attributes:
+        similarity_threshold (float): Minimum cosine similarity for a hit
+        ttl_seconds (float): Answers older than this are never returned
+        max_entries (int): Oldest answers are evicted beyond this number
+    """
+
+    def __init__(self, similarity_threshold: float = 0.95, ttl_seconds: float = 3600.0,
+                 max_entries: int = 1000):
+        """
+        Args:
+            similarity_threshold (float): Cosine similarity needed to reuse an
+                answer (default: 0.95 - paraphrases, not merely related questions)
+            ttl_seconds (float): Time-to-live of an answer (default: 1 hour)
+            max_entries (int): Maximum cached answers (default: 1000)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        # Vectors live in one preallocated matrix (row = slot); entries map
+        # slot → answer data, oldest first
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._free_slots: List[int] = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stale": 0, "expirations": 0, "evictions": 0}
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        """Vector as a float32 unit vector (cosine similarity = dot product)."""
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def get(self, query_vector, index_version: int, session_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Find a cached answer for a (near-)identical standalone query.
+
+        Args:
+            query_vector: Embedding of the standalone query
+            index_version (int): Current version of the vector index; answers
+                computed on another version are stale and dropped
+            session_id (Optional[str]): Session asking - besides shared
+                answers, only this session's own answers can match
+
+        Returns:
+            Optional[dict]: {"answer", "source_documents", "similarity"}, or None
+        """
+        with self._lock:
+            self._drop_outdated(index_version)
+            slots = np.fromiter((slot for slot, entry in self._entries.items()
+                                 if entry["session_id"] in (None, session_id)), dtype=np.int64)
+            if not len(slots):
+                self._counters["misses"] += 1
+                return None
+
+            similarities = self._vectors[slots] @ self._unit(query_vector)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self._counters["misses"] += 1
+                return None
+
+            self._counters["hits"] += 1
+            entry = self._entries[int(slots[best])]
+            return {"answer": entry["answer"], "source_documents": entry["source_documents"],
+                    "similarity": float(similarities[best])}
+
+    def put(self, query_vector, index_version: int, answer: str, source_documents: list,
+            session_id: Optional[str] = None) -> None:
+        """
+        Cache the answer to a standalone query.
+
+        Args:
+            query_vector: Embedding of the standalone query
+            index_version (int): Version of the vector index the answer used
+            answer (str): The generated answer
+            source_documents (list): The sources returned with it
+            session_id (Optional[str]): Session whose history the answer was
+                generated with - only that session gets it back (default:
+                None - no history went in, every session may get it)
+        """
+        vector = self._unit(query_vector)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            if not self._free_slots:
+                # Full: evict the oldest answer
+                slot, _ = self._entries.popitem(last=False)
+                self._free_slots.append(slot)
+                self._counters["evictions"] += 1
+            slot = self._free_slots.pop()
+            self._vectors[slot] = vector
+            self._entries[slot] = {"answer": answer, "source_documents": source_documents,
+                                   "version": index_version, "created": time.monotonic(),
+                                   "session_id": session_id}
+
+    def clear(self) -> None:
+        """Drop every cached answer (counters are kept)."""
+        with self._lock:
+            self._free_slots.extend(self._entries.keys())
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Cache statistics.
+
+        Returns:
+            dict: hits, misses, hit_rate, stale (dropped after an index
+                  change), expirations, evictions and entries
+        """
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {**self._counters,
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries)}
+
+    def _drop_outdated(self, index_version: int) -> None:
+        """Remove expired answers and answers from another index version (lock held)."""
+        now = time.monotonic()
+        for slot, entry in list(self._entries.items()):
+            if entry["version"] != index_version:
+                self._counters["stale"] += 1
+            elif now - entry["created"] > self.ttl_seconds:
+                self._counters["expirations"] += 1
+            else:
+                continue
+            del self._entries[slot]
+            self._free_slots.append(slot)
@@ -0,0 +1,310 @@
+"""
+BM25 Index Module - Compact Keyword (Sparse) Search over Chunks
+
+This module handles:
+1. Building a BM25 inverted index over chunk texts
+2. Saving it as flat arrays next to the vector store (memory-mapped at load)
+3. Scoring queries straight from precomputed postings arrays
+4. Fusing keyword and vector results with reciprocal rank fusion (RRF)
+
+Why keyword search too?
+- Embeddings capture meaning but blur exact terms: product names,
+  acronyms ("RICE", "OKR") and page references are often missed
+- BM25 finds those exact terms; RRF combines both ranked lists without
+  having to make their scores comparable
+
+Postings layout (CSR - one slice per term):
+- offsets[t]:offsets[t + 1]  range of term t's postings
+- rows[i]                    chunk row (position in the ids list) of posting i
+- weights[i]                 precomputed BM25 score of term t in that chunk
+
+Because the full BM25 formula (idf, term frequency saturation, length
+normalization) is baked into `weights` at build time, a query is just a
+gather-and-add over the postings of its terms - no text is rescanned.
+
+On-disk files (inside the vector store directory):
+- bm25.json         Header: format, parameters, counts
+- bm25_terms.txt    Vocabulary, one term per line (line number = term ID)
+- bm25_offsets.u64  uint64 offsets, n_terms + 1 values
+- bm25_rows.i32     int32 chunk rows
+- bm25_weights.f32  float32 BM25 weights
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import json
+import os
+import re
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .columnar_store import _replace_file
+
+# Bump when the layout changes
+BM25_FORMAT_VERSION = 1
+
+BM25_FILE = "bm25.json"
+TERMS_FILE = "bm25_terms.txt"
+POSTING_OFFSETS_FILE = "bm25_offsets.u64"
+POSTING_ROWS_FILE = "bm25_rows.i32"
+POSTING_WEIGHTS_FILE = "bm25_weights.f32"
+
+# Very common English words - they match almost every chunk, so their
+# postings would be huge and add nothing to the ranking
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the
+this to was were will with what which who how do does i you he she we they
+""".split())
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms (letters/digits), without stopwords.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        List[str]: Terms, in order
+    """
+    return [term for term in _TOKEN_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+
+def _load_array(path: str, dtype) -> np.ndarray:
+    """Memory-map a raw array file (empty files give an empty array)."""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+class BM25Index:
+    """
+    BM25 inverted index over a fixed list of chunks.
+
+    The index is immutable: when chunks are added or removed, build a new
+    one (VectorDB does this lazily, only when keyword search is used or
+    the store is saved).
+
+    Attributes:
+        ids (List[str]): Chunk ID of each row
+        k1 (float): Term frequency saturation
+        b (float): Length normalization strength
+    """
+
+    def __init__(self, ids: List[str], terms: Dict[str, int], offsets: np.ndarray,
+                 rows: np.ndarray, weights: np.ndarray, k1: float = 1.5, b: float = 0.75):
+        """
+        Wrap already built postings arrays (use build() or load()).
+
+        Args:
+            ids (List[str]): Chunk ID of each row
+            terms (Dict[str, int]): Term → term ID
+            offsets (np.ndarray): uint64 postings offsets, len(terms) + 1 values
+            rows (np.ndarray): int32 chunk row of each posting
+            weights (np.ndarray): float32 BM25 weight of each posting
+            k1 (float): Term frequency saturation the weights were built with
+            b (float): Length normalization the weights were built with
+        """
+        self.ids = ids
+        self.k1 = k1
+        self.b = b
+        self._terms = terms
+        self._offsets = offsets
+        self._rows = rows
+        self._weights = weights
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids: List[str], texts: Sequence[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """
+        Build the index for a list of chunks.
+
+        Args:
+            ids (List[str]): Chunk IDs
+            texts (Sequence[str]): Chunk texts (same order as ids)
+            k1 (float): Term frequency saturation (default: 1.5)
+            b (float): Length normalization strength (default: 0.75)
+
+        Returns:
+            BM25Index: The index
+        """
+        terms: Dict[str, int] = {}
+        posting_terms: List[int] = []
+        posting_rows: List[int] = []
+        posting_tfs: List[int] = []
+        lengths = np.zeros(len(ids), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[row] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                posting_terms.append(terms.setdefault(term, len(terms)))
+                posting_rows.append(row)
+                posting_tfs.append(tf)
+
+        # Group postings by term (stable sort keeps rows ascending within a term)
+        term_ids = np.asarray(posting_terms, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        rows = np.asarray(posting_rows, dtype=np.int32)[order]
+        tfs = np.asarray(posting_tfs, dtype=np.float32)[order]
+        df = np.bincount(term_ids, minlength=len(terms))
+        offsets = np.zeros(len(terms) + 1, dtype=np.uint64)
+        offsets[1:] = np.cumsum(df)
+
+        # Precompute the full BM25 score of every (term, chunk) pair
+        n = len(ids)
+        avg_length = float(lengths.mean()) if n else 0.0
+        idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        posting_idf = np.repeat(idf, df)
+        norm = k1 * (1.0 - b + b * lengths[rows] / max(avg_length, 1e-9))
+        weights = (posting_idf * tfs * (k1 + 1.0) / (tfs + norm)).astype(np.float32)
+
+        return cls(list(ids), terms, offsets, rows, weights, k1, b)
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[str, float]]:
+        """
+        Top-k chunks for a keyword query.
+
+        Args:
+            query (str): Query text
+            k (int): Number of chunks to return
+
+        Returns:
+            List[Tuple[str, float]]: (chunk ID, BM25 score) pairs, best first.
+                Chunks that share no term with the query are never returned.
+        """
+        term_ids = {self._terms[term] for term in tokenize(query) if term in self._terms}
+        if not term_ids or not self.ids:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = int(self._offsets[term_id]), int(self._offsets[term_id + 1])
+            # Rows are unique within one term's postings, so fancy-index add is safe
+            scores[self._rows[start:end]] += self._weights[start:end]
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.ids[row], float(scores[row])) for row in matched]
+
+    def save(self, path: str) -> None:
+        """
+        Save the index next to a vector store.
+
+        Args:
+            path (str): Vector store directory
+        """
+        os.makedirs(path, exist_ok=True)
+        vocabulary = sorted(self._terms, key=self._terms.get)
+        _replace_file(os.path.join(path, TERMS_FILE), "\n".join(vocabulary).encode("utf-8"))
+        _replace_file(os.path.join(path, POSTING_OFFSETS_FILE), np.asarray(self._offsets, dtype=np.uint64))
+        _replace_file(os.path.join(path, POSTING_ROWS_FILE), np.asarray(self._rows, dtype=np.int32))
+        _replace_file(os.path.join(path, POSTING_WEIGHTS_FILE), np.asarray(self._weights, dtype=np.float32))
+
+        # Header last: the index is only complete once bm25.json exists
+        header = {"format": BM25_FORMAT_VERSION, "count": len(self.ids), "terms": len(vocabulary),
+                  "postings": int(len(self._rows)), "k1": self.k1, "b": self.b}
+        _replace_file(os.path.join(path, BM25_FILE), json.dumps(header).encode("utf-8"))
+
+    @classmethod
+    def load(cls, path: str, ids: List[str]) -> Optional["BM25Index"]:
+        """
+        Memory-map an index saved with save().
+
+        Args:
+            path (str): Vector store directory
+            ids (List[str]): Chunk IDs of the store, in index order (the
+                same order the BM25 index was built in)
+
+        Returns:
+            Optional[BM25Index]: The index, or None if there is none (or it
+                doesn't match the store, e.g. written by an older format)
+        """
+        try:
+            with open(os.path.join(path, BM25_FILE)) as f:
+                header = json.load(f)
+        except FileNotFoundError:
+            return None
+        if header["format"] != BM25_FORMAT_VERSION or header["count"] != len(ids):
+            return None
+
+        with open(os.path.join(path, TERMS_FILE), encoding="utf-8") as f:
+            vocabulary = f.read().split("\n") if header["terms"] else []
+        return cls(
+            list(ids),
+            {term: term_id for term_id, term in enumerate(vocabulary)},
+            _load_array(os.path.join(path, POSTING_OFFSETS_FILE), np.uint64),
+            _load_array(os.path.join(path, POSTING_ROWS_FILE), np.int32),
+            _load_array(os.path.join(path, POSTING_WEIGHTS_FILE), np.float32),
+            header["k1"],
+            header["b"],
+        )
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Sequence[Sequence[Hashable]], rrf_k: int = 60
+) -> List[Tuple[Hashable, float]]:
+    """
+    Fuse several ranked lists with reciprocal rank fusion.
+
+    Every item scores sum(1 / (rrf_k + rank)) over the lists it appears in
+    (rank starts at 1). Only ranks matter, so BM25 scores and L2 distances
+    can be fused without normalizing them.
+
+    Args:
+        ranked_lists (Sequence[Sequence[Hashable]]): Item keys, best first
+        rrf_k (int): Damping constant (default: 60, from the original paper)
+
+    Returns:
+        List[Tuple[Hashable, float]]: (key, fused score) pairs, best first
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranked in ranked_lists:
+        for rank, key in enumerate(ranked, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def document_key(doc: Document) -> Hashable:
+    """
+    Key that identifies a chunk across result lists (its chunk ID when known).
+
+    Args:
+        doc (Document): A retrieved chunk
+
+    Returns:
+        Hashable: Chunk ID, or the text for stores without chunk IDs
+    """
+    return doc.metadata.get("chunk_id") or doc.id or doc.page_content
+
+
+def fuse_results(
+    result_lists: Sequence[Sequence[Tuple[Document, float]]], k: int = 4, rrf_k: int = 60
+) -> List[Tuple[Document, float]]:
+    """
+    Fuse (chunk, score) result lists (e.g. vector and BM25) into one top-k.
+
+    Args:
+        result_lists (Sequence[Sequence[Tuple[Document, float]]]): Each list
+            ordered best first (its own scores are ignored - only ranks count)
+        k (int): Number of chunks to return
+        rrf_k (int): RRF damping constant (default: 60)
+
+    Returns:
+        List[Tuple[Document, float]]: (chunk, fused RRF score) pairs, best first
+    """
+    docs = {}
+    for results in result_lists:
+        for doc, _ in results:
+            docs.setdefault(document_key(doc), doc)
+    fused = reciprocal_rank_fusion([[document_key(doc) for doc, _ in results] for results in result_lists], rrf_k)
+    return [(docs[key], score) for key, score in fused[:k]]
@@ -16,21 +16,33 @@ Key Features:
 Author: Project 1 - LLM Practice Projects
 """
 
+import asyncio
 import os
-from typing import List, Optional, Dict, Any
+import time
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple, Union
 from dotenv import load_dotenv
 
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import Runnable, RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import HumanMessage, AIMessage
 
+from .answer_cache import SemanticAnswerCache
+from .context_selector import ContextSelector
+from .corpus import CorpusDB
+from .prompt_packer import PromptPacker
+from .query_rewriter import RewriteGate
+from .rag_pipeline import RAGRequest
+from .reranker import CrossEncoderReranker
+from .session_store import InMemorySessionStore, SessionStore
 from .vector_db import VectorDB
 
 # Load environment variables (especially OPENAI_API_KEY)
 load_dotenv()
 
+# Session used when the caller doesn't pass one (single-user use, scripts)
+DEFAULT_SESSION_ID = "default"
+
 
 class ConversationBot:
     """
@@ -43,7 +55,13 @@ class ConversationBot:
     - Smart routing (casual chat vs document questions)
     """
     
-    def __init__(self, vector_db: VectorDB, model: str = "gpt-3.5-turbo"):
+    def __init__(self, vector_db: Union[VectorDB, CorpusDB], model: str = "gpt-3.5-turbo",
+                 search_type: str = "similarity", reranker: Optional[CrossEncoderReranker] = None,
+                 context_selector: Optional[ContextSelector] = None,
+                 answer_cache: Optional[SemanticAnswerCache] = None,
+                 rewrite_gate: Optional[RewriteGate] = None, rewrite_llm: Optional[Any] = None,
+                 session_store: Optional[SessionStore] = None,
+                 prompt_packer: Optional[PromptPacker] = None):
         """
         Initialize the conversation bot.
         
@@ -54,9 +72,36 @@ class ConversationBot:
         - Conversation history storage
         
         Args:
-            vector_db (VectorDB): Vector database instance for document retrieval
+            vector_db (Union[VectorDB, CorpusDB]): Vector database (single document)
+                or corpus (all documents) for document retrieval
             model (str): OpenAI model name (default: "gpt-3.5-turbo")
                         Options: "gpt-3.5-turbo", "gpt-4", etc.
+            search_type (str): "similarity" (vectors only, default) or
+                        "hybrid" (vectors + BM25 keywords)
+            reranker (Optional[CrossEncoderReranker]): Optional re-ranking stage:
+                        20 candidates are retrieved and the cross-encoder keeps
+                        the (up to 4) relevant ones (default: None - no re-ranking)
+            context_selector (Optional[ContextSelector]): Picks diverse chunks (MMR)
+                        and merges overlapping neighbours, so the prompt doesn't
+                        repeat the splitter's 200-character overlaps
+                        (default: None - the top k chunks as retrieved)
+            answer_cache (Optional[SemanticAnswerCache]): Cache of answers to
+                        (near-)identical standalone questions
+                        (default: SemanticAnswerCache())
+            rewrite_gate (Optional[RewriteGate]): Skips the standalone-query
+                        rewrite for questions that don't need it - first turns
+                        and questions without references to the conversation
+                        (default: RewriteGate())
+            rewrite_llm (Optional[Any]): LangChain chat model used for the
+                        rewrite, e.g. a small local model behind an
+                        OpenAI-compatible server (default: None - the main LLM)
+            session_store (Optional[SessionStore]): Conversation history of
+                        every session, bounded in length, idle time and total
+                        memory - in process memory, or shared by all workers
+                        (SQLite, Redis) (default: InMemorySessionStore())
+            prompt_packer (Optional[PromptPacker]): Fits retrieved context and
+                        history into a token budget, counted with the model's
+                        tokenizer (default: PromptPacker(model) - 3000 tokens)
             
         Raises:
             ValueError: If OPENAI_API_KEY is not found in environment
@@ -73,19 +118,40 @@ class ConversationBot:
         
         # Initialize OpenAI LLM (Large Language Model)
         # This is the AI that generates responses
+        # Imported here: langchain_openai (and the openai SDK) take about a
+        # second to import, which modules that only use the types shouldn't pay
+        from langchain_openai import ChatOpenAI
+        
         self.llm = ChatOpenAI(
             model=model,              # Which GPT model to use
             temperature=0.7,         # Creativity level (0.0 = deterministic, 1.0 = creative)
             openai_api_key=api_key   # API key for authentication
         )
         
-        # Conversation history - stores all messages in the current conversation
+        # Conversation histories - one per session (client), so users never see
+        # each other's conversations
         # Format: [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}, ...]
-        self.chat_history: List[Dict[str, str]] = []
+        self.sessions = session_store or InMemorySessionStore()
         
         # Initialize retriever - this is used to search the vector database
         # k=4 means retrieve top 4 most similar documents
-        self.retriever = self.vector_db.get_retriever(k=4)
+        # Hybrid search also catches exact terms (names, acronyms, page numbers)
+        self.reranker = reranker
+        self.context_selector = context_selector
+        self.retriever = self.vector_db.get_retriever(k=4, search_type=search_type, reranker=reranker,
+                                                      selector=self.context_selector)
+        
+        # Semantic answer cache: repeated questions skip retrieval and generation
+        self.answer_cache = answer_cache or SemanticAnswerCache()
+        
+        # Standalone-query rewrite: only when the question needs it, and
+        # optionally on a smaller (faster) model than the answers
+        self.rewrite_gate = rewrite_gate or RewriteGate()
+        self.rewrite_llm = rewrite_llm
+        
+        # Prompt token budget: context first (best chunk first), then history
+        # (newest message first) - instead of whole chunks plus the last 6 messages
+        self.prompt_packer = prompt_packer or PromptPacker(model)
         
         # Set up the RAG chains (pipelines for processing)
         self._initialize_chain()
@@ -138,76 +204,53 @@ Previous conversation:
         # Flow: prompt → LLM → parse output as string
         self.standalone_query_chain = (
             standalone_query_prompt  # Template with placeholders
-            | self.llm              # Send to OpenAI GPT
+            | (self.rewrite_llm or self.llm)  # Send to the rewrite model (default: OpenAI GPT)
             | StrOutputParser()     # Convert response to string
         )
         
-        # Helper function: Format retrieved documents into a single text block
-        def format_docs(docs):
-            """
-            Combine multiple document chunks into a single text string.
-            
-            Args:
-                docs: List of Document objects from vector search
-                
-            Returns:
-                str: Combined text from all documents
-            """
-            return "\n\n".join(doc.page_content for doc in docs)
-        
-        # Helper function: Get context from vector database
-        def get_context(standalone_query: str):
-            """
-            Search vector database and format results.
-            
-            Args:
-                standalone_query (str): The standalone query to search for
-                
-            Returns:
-                str: Formatted context from retrieved documents
-            """
-            # Search vector DB for similar documents
-            docs = self.retriever.invoke(standalone_query)
-            # Combine into single text
-            return format_docs(docs)
+        # Tokens of the templates without their variable parts: reserved
+        # before the packer fills the budget with context and history
+        self._rewrite_prompt_tokens = self.prompt_packer.count(
+            standalone_query_prompt.format(chat_history="", question=""))
+        self._answer_prompt_tokens = self.prompt_packer.count(
+            answer_prompt.format(context="", chat_history="", question=""))
         
         # Build answer generation chain
-        # Flow: prepare inputs → search vector DB → format context → generate answer
+        # Flow: prepare inputs → packed context (the already retrieved chunks) → generate answer
+        # (retrieval happens once, in chat(), and its chunks are packed into
+        # the token budget by _generation_chain - the chain never searches
+        # the vector DB a second time)
         self.answer_chain = (
             {
                 # Prepare inputs for the prompt
-                "context": lambda x: get_context(x["standalone_query"]),  # Search vector DB
-                "question": lambda x: x["question"],                        # Original question
-                "chat_history": lambda x: self._format_chat_history()      # Conversation history
+                "context": lambda x: x["context"],             # Retrieved chunks, packed
+                "question": lambda x: x["question"],           # Original question
+                "chat_history": lambda x: x["chat_history"]    # Conversation history
             }
             | answer_prompt    # Fill in the prompt template
             | self.llm         # Send to OpenAI GPT
             | StrOutputParser()  # Convert to string
         )
     
-    def _format_chat_history(self) -> str:
+    def _rewrite_input(self, request: RAGRequest) -> dict:
         """
-        Format chat history as a readable string for prompts.
+        Input of the standalone-query chain.
         
-        Only includes the last 6 messages (3 user-assistant exchanges) to:
-        - Keep prompts manageable in size
-        - Focus on recent context
-        - Avoid token limits
+        The history is formatted newest message first until the prompt
+        token budget is full (there is no retrieved context yet).
         
+        Args:
+            request (RAGRequest): The request to rewrite the question of
+            
         Returns:
-            str: Formatted conversation history
+            dict: question and chat_history
         """
-        if not self.chat_history:
-            return "No previous conversation."
-        
-        # Get last 6 messages (most recent context)
-        history_text = ""
-        for msg in self.chat_history[-6:]:  # Last 6 messages = 3 exchanges
-            role = "User" if msg["role"] == "user" else "Assistant"
-            history_text += f"{role}: {msg['content']}\n"
-        return history_text
+        reserved = self._rewrite_prompt_tokens + self.prompt_packer.count(request.question)
+        chat_history, _ = self.prompt_packer.pack_history(request.history, reserved)
+        return {"question": request.question, "chat_history": chat_history}
     
-    def _is_document_question(self, message: str) -> bool:
+    def _is_document_question(self, message: str,
+                              chat_history: Optional[List[Dict[str, str]]] = None) -> bool:
         """
         Determine if the message is asking about the document content.
         
@@ -223,6 +266,7 @@ Previous conversation:
         
         Args:
             message (str): User's message to classify
+            chat_history (Optional[List[Dict[str, str]]]): The session's messages
             
         Returns:
             bool: True if document-related question, False for casual chat
@@ -255,8 +299,8 @@ Previous conversation:
         
         # Rule 3: Check conversation history for context
         # If previous messages were about the document, follow-ups likely are too
-        if self.chat_history:
-            last_few = self.chat_history[-4:]  # Last 2 exchanges
+        if chat_history:
+            last_few = chat_history[-4:]  # Last 2 exchanges
             for msg in last_few:
                 if msg["role"] == "user":
                     # If previous user message had document keywords, this might be a follow-up
@@ -268,7 +312,23 @@ Previous conversation:
         # Very short messages without clear intent default to casual
         return len(message_lower.split()) > 3
     
-    def chat(self, message: str) -> dict:
+    def warm_up(self) -> float:
+        """
+        Run one retrieval, so lazy initialization isn't paid by a user.
+        
+        The first query through the retriever is slow: the embedding model's
+        first forward pass, page faults on the memory-mapped index and BM25
+        arrays, the re-ranker's first batch. No session or answer cache is
+        touched.
+        
+        Returns:
+            float: Milliseconds the warm-up retrieval took
+        """
+        start = time.perf_counter()
+        self.retriever.retrieve_with_scores("What is this document about?")
+        return (time.perf_counter() - start) * 1000
+    
+    def chat(self, message: str, session_id: str = DEFAULT_SESSION_ID) -> dict:
         """
         Main chat method - processes user messages and returns responses.
         
@@ -280,111 +340,391 @@ Previous conversation:
         
         Args:
             message (str): User's message/question
+            session_id (str): Conversation the message belongs to
             
         Returns:
             dict: Response dictionary with:
                 - answer (str): The AI-generated answer
                 - source_documents (list): List of source documents (empty for casual chat)
+                - debug (dict): Standalone query, retrieved chunk IDs and scores,
+                  per-stage timings in ms (see RAGRequest.debug_info)
+        """
+        # Steps before generation: routing, rewrite, cache lookup, retrieval
+        request, cached_result = self._prepare(message, session_id)
+        if cached_result is not None:
+            return cached_result
+        
+        # Generate the whole answer, then return it
+        chain, chain_input = self._generation_chain(request)
+        with request.stage("generation"):
+            answer = chain.invoke(chain_input)
+        self._record_turn(request, answer)
+        return self._complete(request, answer)
+    
+    async def achat(self, message: str, session_id: str = DEFAULT_SESSION_ID) -> dict:
+        """
+        Async version of chat() - same steps, same response.
+        
+        LLM calls (rewrite, answer) are awaited with ainvoke; the CPU-bound
+        steps (query embedding, FAISS/BM25 search) and the session store's
+        reads and writes (a SQLite transaction or a Redis round trip) run in
+        a worker thread, so the event loop never blocks: while one request
+        waits for OpenAI, the server keeps answering others.
+        
+        Args:
+            message (str): User's message/question
+            session_id (str): Conversation the message belongs to
+            
+        Returns:
+            dict: Response dictionary (see chat())
+        """
+        request, cached_result = await self._aprepare(message, session_id)
+        if cached_result is not None:
+            return cached_result
+        
+        chain, chain_input = self._generation_chain(request)
+        with request.stage("generation"):
+            answer = await chain.ainvoke(chain_input)
+        await asyncio.to_thread(self._record_turn, request, answer)
+        return self._complete(request, answer)
+    
+    async def astream_chat(self, message: str, session_id: str = DEFAULT_SESSION_ID) -> AsyncIterator[dict]:
+        """
+        Streaming version of chat() - yields the answer token by token.
+        
+        Retrieval runs first (see achat()), then the answer is streamed from
+        the LLM with LCEL astream, so the first words reach the user while
+        the rest is still being generated.
+        
+        Args:
+            message (str): User's message/question
+            session_id (str): Conversation the message belongs to
+            
+        Yields:
+            dict: Events, in order:
+                - {"event": "token", "data": str} for each generated piece of text
+                - {"event": "sources", "data": {"source_documents": list, "debug": dict}}
+                  once, after the last token
+        """
+        request, cached_result = await self._aprepare(message, session_id)
+        if cached_result is not None:
+            # Cached answer: nothing to generate, send it in one piece
+            yield {"event": "token", "data": cached_result["answer"]}
+            yield {"event": "sources", "data": {"source_documents": cached_result["source_documents"],
+                                                "debug": cached_result["debug"]}}
+            return
+        
+        chain, chain_input = self._generation_chain(request)
+        parts: List[str] = []
+        with request.stage("generation"):
+            async for token in chain.astream(chain_input):
+                if not parts:
+                    # Time to first token, measured from the start of the request
+                    request.timings["first_token"] = (time.perf_counter() - request.started) * 1000
+                parts.append(token)
+                yield {"event": "token", "data": token}
+        
+        answer = "".join(parts)
+        await asyncio.to_thread(self._record_turn, request, answer)
+        result = self._complete(request, answer)
+        yield {"event": "sources", "data": {"source_documents": result["source_documents"],
+                                            "debug": result["debug"]}}
+    
+    def _prepare(self, message: str, session_id: str) -> Tuple[RAGRequest, Optional[dict]]:
+        """
+        Run everything that comes before answer generation.
+        
+        Args:
+            message (str): User's message/question
+            session_id (str): Conversation the message belongs to
+            
+        Returns:
+            Tuple[RAGRequest, Optional[dict]]: The request (with retrieved chunks
+                for document questions) and, on an answer cache hit, the finished
+                response - in that case there is nothing left to generate
+        """
+        request = self._start_request(message, session_id, self.sessions.get_history(session_id))
+        if not request.is_document_question:
+            # Casual chat: no rewrite, no retrieval
+            return request, None
+        
+        # ============================================================
+        # RAG PATH: Document Question
+        # ============================================================
+        # Uses Retrieval-Augmented Generation:
+        # 1. Generate standalone query
+        # 2. Search vector database
+        # 3. Generate answer with context (_generation_chain)
+        
+        # Step 1: Generate standalone query from conversation context
+        # Converts "Who wrote it?" → "Who wrote the book about PM interviews?"
+        if request.standalone_query is None:
+            with request.stage("rewrite"):
+                request.standalone_query = self.standalone_query_chain.invoke(self._rewrite_input(request))
+        print(f"Standalone query: {request.standalone_query}")
+        
+        # Step 1b: Semantic cache - was (almost) this question answered already?
+        # The embedding is reused by retrieval below (query embedding cache)
+        with request.stage("embed"):
+            request.query_vector = self.vector_db.embeddings.embed_query(request.standalone_query)
+        cached_result = self._lookup_answer_cache(request)
+        if cached_result is not None:
+            self._record_turn(request, request.answer)
+            return request, cached_result
+        
+        # Step 2: Use standalone query to retrieve relevant documents
+        # Searches the vector database for chunks similar to the query -
+        # once: the same chunks become the prompt context and the sources
+        with request.stage("retrieval"):
+            request.results = self.retriever.retrieve_with_scores(request.standalone_query,
+                                                                  timings=request.timings)
+        return request, None
+    
+    async def _aprepare(self, message: str, session_id: str) -> Tuple[RAGRequest, Optional[dict]]:
+        """
+        Async version of _prepare() (same steps, same result).
+        
+        The rewrite awaits the LLM (ainvoke); the history read, embedding and
+        FAISS search are blocking, so they run in a worker thread. The event
+        loop stays free for other requests the whole time.
+        
+        Args:
+            message (str): User's message/question
+            session_id (str): Conversation the message belongs to
+            
+        Returns:
+            Tuple[RAGRequest, Optional[dict]]: See _prepare()
+        """
+        chat_history = await asyncio.to_thread(self.sessions.get_history, session_id)
+        request = self._start_request(message, session_id, chat_history)
+        if not request.is_document_question:
+            return request, None
+        
+        if request.standalone_query is None:
+            with request.stage("rewrite"):
+                request.standalone_query = await self.standalone_query_chain.ainvoke(self._rewrite_input(request))
+        print(f"Standalone query: {request.standalone_query}")
+        
+        with request.stage("embed"):
+            request.query_vector = await asyncio.to_thread(
+                self.vector_db.embeddings.embed_query, request.standalone_query)
+        cached_result = self._lookup_answer_cache(request)
+        if cached_result is not None:
+            await asyncio.to_thread(self._record_turn, request, request.answer)
+            return request, cached_result
+        
+        with request.stage("retrieval"):
+            request.results = await asyncio.to_thread(
+                self.retriever.retrieve_with_scores, request.standalone_query, timings=request.timings)
+        return request, None
+    
+    def _start_request(self, message: str, session_id: str,
+                       chat_history: List[Dict[str, str]]) -> RAGRequest:
         """
-        # Format chat history for use in prompts
-        chat_history_str = self._format_chat_history()
+        Create the request: routing and the rewrite decision (no I/O).
+        
+        The caller reads the session's history (once per request), so the
+        async path can read it in a worker thread.
+        
+        Args:
+            message (str): User's message/question
+            session_id (str): Conversation the message belongs to
+            chat_history (List[Dict[str, str]]): The session's messages, oldest first
+            
+        Returns:
+            RAGRequest: The new request. For document questions that need no
+                rewrite, standalone_query is already set to the message.
+        """
+        # Request-scoped state: every stage runs once and is timed
+        request = RAGRequest(question=message, session_id=session_id, history=chat_history)
         
         # Smart detection: Is this casual chat or a document question?
-        is_doc_question = self._is_document_question(message)
+        request.is_document_question = self._is_document_question(message, chat_history)
         
         # Log for debugging
         print(f"Original question: {message}")
-        print(f"Is document question: {is_doc_question}")
-        
-        if is_doc_question:
-            # ============================================================
-            # RAG PATH: Document Question
-            # ============================================================
-            # Uses Retrieval-Augmented Generation:
-            # 1. Generate standalone query
-            # 2. Search vector database
-            # 3. Generate answer with context
-            
-            # Step 1: Generate standalone query from conversation context
-            # Converts "Who wrote it?" → "Who wrote the book about PM interviews?"
-            standalone_query = self.standalone_query_chain.invoke({
-                "question": message,
-                "chat_history": chat_history_str
-            })
-            
-            print(f"Standalone query: {standalone_query}")
+        print(f"Is document question: {request.is_document_question}")
+        
+        if request.is_document_question:
+            # Skip the rewrite (no LLM call) when there is no history or nothing to resolve
+            needs_rewrite, request.rewrite_reason = self.rewrite_gate.check(message, chat_history)
+            if not needs_rewrite:
+                request.standalone_query = message
+        return request
+    
+    def _lookup_answer_cache(self, request: RAGRequest) -> Optional[dict]:
+        """
+        Answer from the semantic cache, if the question was answered before.
+        
+        Only answers generated without conversation history, or for this
+        session, can match - never another user's conversation. The caller
+        records the turn in the session (see _record_turn).
+        
+        Args:
+            request (RAGRequest): Request with the query embedding set
             
-            # Step 2: Use standalone query to retrieve relevant documents
-            # Searches the vector database for chunks similar to the query
-            docs = self.retriever.invoke(standalone_query)
+        Returns:
+            Optional[dict]: The finished response on a hit, else None
+        """
+        request.index_version = self.vector_db.version
+        with request.stage("cache_lookup"):
+            cached = self.answer_cache.get(request.query_vector, request.index_version,
+                                           session_id=request.session_id)
+        if cached is None:
+            return None
+        
+        print(f"Answer cache hit (similarity {cached['similarity']:.3f})")
+        request.cached = True
+        request.answer = cached["answer"]
+        request.finish()
+        return {"answer": cached["answer"], "source_documents": cached["source_documents"],
+                "debug": request.debug_info()}
+    
+    def _generation_chain(self, request: RAGRequest) -> Tuple[Runnable, Any]:
+        """
+        The chain that generates the answer, and its input.
+        
+        Args:
+            request (RAGRequest): A prepared request (see _prepare)
             
+        Returns:
+            Tuple[Runnable, Any]: Chain producing the answer text, and the
+                input to invoke (or stream) it with
+        """
+        if request.is_document_question:
             # Step 3: Generate answer using retrieved context
             # Combines: retrieved documents + user question + conversation history
             # → Sends to OpenAI → Gets intelligent, context-aware answer
-            response = self.answer_chain.invoke({
-                "question": message,                    # Original question
-                "standalone_query": standalone_query,   # Standalone version
-                "chat_history": chat_history_str        # Previous conversation
-            })
-            
-            # Update conversation history
-            self.chat_history.append({"role": "user", "content": message})
-            self.chat_history.append({"role": "assistant", "content": response})
-            
-            # Return response with source documents
-            return {
-                "answer": response,
-                "source_documents": [
-                    {
-                        # Truncate long content for display (first 500 chars)
-                        "content": doc.page_content[:500] + "..." if len(doc.page_content) > 500 else doc.page_content,
-                        "metadata": doc.metadata  # Page number, source file, etc.
-                    }
-                    for doc in docs[:3]  # Top 3 most relevant sources
-                ]
+            # The chunks and history that fit the token budget go in; the
+            # sources are the chunks the LLM actually saw
+            packed = self.prompt_packer.pack(
+                request.results, request.history,
+                reserved_tokens=self._answer_prompt_tokens + self.prompt_packer.count(request.question))
+            request.results, request.chat_history = packed.results, packed.chat_history
+            request.prompt_tokens = packed.tokens
+            return self.answer_chain, {
+                "question": request.question,           # Original question
+                "context": packed.context,              # Retrieved chunks (context)
+                "chat_history": request.chat_history    # Previous conversation
             }
-        else:
-            # ============================================================
-            # CASUAL CHAT PATH: Direct OpenAI Response
-            # ============================================================
-            # For casual chat, we don't need document retrieval
-            # Just use OpenAI directly for a friendly response
-            
-            # Create a simple prompt for casual conversation
-            casual_prompt = f"""You are a friendly AI assistant. The user is having a casual conversation.
+        
+        # ============================================================
+        # CASUAL CHAT PATH: Direct OpenAI Response
+        # ============================================================
+        # For casual chat, we don't need document retrieval
+        # Just use OpenAI directly for a friendly response
+        
+        # Create a simple prompt for casual conversation
+        # (history newest first, as much as the token budget allows)
+        casual_template = """You are a friendly AI assistant. The user is having a casual conversation.
 Previous conversation:
-{chat_history_str}
+{chat_history}
 
-User: {message}
+User: {question}
 Assistant:"""
+        packed = self.prompt_packer.pack(
+            [], request.history,
+            reserved_tokens=self.prompt_packer.count(casual_template.format(chat_history="",
+                                                                            question=request.question)))
+        request.chat_history, request.prompt_tokens = packed.chat_history, packed.tokens
+        casual_prompt = casual_template.format(chat_history=request.chat_history, question=request.question)
+        
+        # Get response from OpenAI (no RAG, no document search)
+        # StrOutputParser extracts the text content from the response message
+        return self.llm | StrOutputParser(), casual_prompt
+    
+    def _record_turn(self, request: RAGRequest, answer: str) -> None:
+        """
+        Add the question and its answer to the session (one write per turn).
+        
+        Blocking (a SQLite transaction or a Redis round trip): the async
+        paths run it in a worker thread.
+        
+        Args:
+            request (RAGRequest): The request that was answered
+            answer (str): The generated (or cached) answer
+        """
+        self.sessions.append(request.session_id, [{"role": "user", "content": request.question},
+                                                  {"role": "assistant", "content": answer}])
+    
+    def _complete(self, request: RAGRequest, answer: str) -> dict:
+        """
+        Build the response for a generated answer (after _record_turn).
+        
+        Args:
+            request (RAGRequest): The request the answer was generated for
+            answer (str): The generated answer
             
-            # Get response from OpenAI (no RAG, no document search)
-            response = self.llm.invoke(casual_prompt)
-            
-            # Extract content from response object
-            if hasattr(response, 'content'):
-                answer = response.content  # LangChain message object
-            else:
-                answer = str(response)  # Fallback
-            
+        Returns:
+            dict: Response dictionary (see chat())
+        """
+        request.answer = answer
+        
+        if not request.is_document_question:
             print(f"Casual chat response: {answer[:50]}...")
-            
-            # Update conversation history
-            self.chat_history.append({"role": "user", "content": message})
-            self.chat_history.append({"role": "assistant", "content": answer})
-            
+            request.finish()
             # Return response without sources (casual chat doesn't need them)
             return {
                 "answer": answer,
-                "source_documents": []  # No sources for casual chat
+                "source_documents": [],  # No sources for casual chat
+                "debug": request.debug_info()
             }
+        
+        source_documents = [
+            {
+                # Truncate long content for display (first 500 chars)
+                "content": doc.page_content[:500] + "..." if len(doc.page_content) > 500 else doc.page_content,
+                "metadata": doc.metadata  # Page number, source file, etc.
+            }
+            for doc in request.docs[:3]  # Top 3 most relevant sources
+        ]
+        # Answers generated with history (and a rewrite based on it) may repeat
+        # what this user said: only shared when no history went in
+        self.answer_cache.put(request.query_vector, request.index_version, answer, source_documents,
+                              session_id=request.session_id if request.history else None)
+        request.finish()
+        
+        # Return response with source documents
+        return {
+            "answer": answer,
+            "source_documents": source_documents,
+            "debug": request.debug_info()  # Stage timings, retrieved chunk IDs and scores
+        }
     
-    def clear_history(self) -> None:
+    def cache_stats(self) -> dict:
         """
-        Clear conversation history.
+        Hit/miss statistics of the caches on the chat path.
         
-        This resets the chat history, allowing users to start a fresh
-        conversation without any context from previous messages.
+        Returns:
+            dict: Stats of the answer cache, the query embedding cache, the
+                  rewrite gate (how often the rewrite LLM call was skipped), the
+                  session store (active sessions, evictions) and (if enabled)
+                  the re-ranker
+        """
+        stats = {
+            "answer_cache": self.answer_cache.stats(),
+            "query_embedding_cache": self.vector_db.embeddings.query_cache.stats(),
+            "rewrite": self.rewrite_gate.stats(),
+            "sessions": self.sessions.stats(),
+        }
+        if self.reranker is not None:
+            stats["reranker"] = dict(self.reranker.stats)
+        return stats
+    
+    def clear_history(self, session_id: str = DEFAULT_SESSION_ID) -> bool:
+        """
+        Clear the conversation history of one session.
+        
+        This resets the chat history, allowing the user to start a fresh
+        conversation without any context from previous messages. Other
+        sessions are not affected.
+        
+        Args:
+            session_id (str): Session to clear
+            
+        Returns:
+            bool: True if the session had a history
         """
-        self.chat_history = []
+        cleared = self.sessions.clear(session_id)
         print("Conversation history cleared")
+        return cleared
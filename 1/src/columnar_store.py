@@ -0,0 +1,353 @@
+"""
+Columnar Store Module - Pickle-Free, Memory-Mapped Vector Store Format
+
+This module handles:
+1. Writing the vector store as plain columnar files (no pickle)
+2. Memory-mapping those files at load time (near-instant startup)
+3. Serving chunk text/metadata lazily, straight from the mapped file
+
+On-disk layout (inside the vector store directory):
+- store.json:   Header - format version, number of chunks, dimension
+- vectors.f32:  Raw float32 vectors, one row per chunk, in index order
+- chunks.dat:   UTF-8 JSON records {"id", "text", "metadata"}, back to back
+- chunks.idx:   uint64 byte offsets of each record in chunks.dat (n + 1 values)
+- ids.txt:      Chunk IDs, one per line, in index order
+- index.faiss:  The FAISS index (memory-mapped too when it is a flat index)
+
+Why memory-map?
+- Loading is just mapping files - nothing is parsed or copied up front
+- Several worker processes loading the same store share the same pages
+  in the OS page cache instead of each holding a private copy
+- Only chunks that are actually retrieved are ever read and decoded
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+# Bump when the layout changes
+FORMAT_VERSION = 1
+
+STORE_FILE = "store.json"
+VECTORS_FILE = "vectors.f32"
+CHUNKS_FILE = "chunks.dat"
+OFFSETS_FILE = "chunks.idx"
+IDS_FILE = "ids.txt"
+INDEX_FILE = "index.faiss"
+
+
+def store_exists(path: str) -> bool:
+    """
+    Check whether a columnar store has been saved at `path`.
+
+    Args:
+        path (str): Vector store directory
+
+    Returns:
+        bool: True if the store header exists
+    """
+    return os.path.exists(os.path.join(path, STORE_FILE))
+
+
+class MmapDocstore(Docstore, AddableMixin):
+    """
+    LangChain docstore backed by the memory-mapped chunks file.
+
+    Chunks saved on disk are decoded only when searched for. Chunks added
+    (or deleted) after loading live in a small in-memory overlay until the
+    store is saved again.
+    """
+
+    def __init__(self, path: str, ids: List[str]):
+        """
+        Map the chunk records of a saved store.
+
+        Args:
+            path (str): Vector store directory
+            ids (List[str]): Chunk IDs in record order (from ids.txt)
+        """
+        self._data = np.memmap(os.path.join(path, CHUNKS_FILE), dtype=np.uint8, mode="r") \
+            if os.path.getsize(os.path.join(path, CHUNKS_FILE)) else np.zeros(0, dtype=np.uint8)
+        self._offsets = np.memmap(os.path.join(path, OFFSETS_FILE), dtype=np.uint64, mode="r")
+        self._positions: Dict[str, int] = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        self._added: Dict[str, Document] = {}
+        self._deleted: set = set()
+
+    def raw_record(self, chunk_id: str) -> Optional[bytes]:
+        """
+        Encoded record of a chunk saved on disk (None if added/deleted since).
+
+        Args:
+            chunk_id (str): Chunk ID
+
+        Returns:
+            Optional[bytes]: The JSON record as stored in chunks.dat
+        """
+        position = self._positions.get(chunk_id)
+        if position is None or chunk_id in self._deleted or chunk_id in self._added:
+            return None
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        return self._data[start:end].tobytes()
+
+    def search(self, search: str) -> Union[str, Document]:
+        """
+        Look up a chunk by ID.
+
+        Args:
+            search (str): Chunk ID
+
+        Returns:
+            Union[str, Document]: The Document, or an error message if not found
+                                  (same contract as LangChain's InMemoryDocstore)
+        """
+        if search in self._added:
+            return self._added[search]
+        record = self.raw_record(search)
+        if record is None:
+            return f"ID {search} not found."
+        data = json.loads(record)
+        return Document(id=data["id"], page_content=data["text"], metadata=data["metadata"])
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """
+        Add chunks to the in-memory overlay.
+
+        Args:
+            texts (Dict[str, Document]): Chunk ID → Document
+
+        Raises:
+            ValueError: If any of the IDs already exist
+        """
+        overlapping = [chunk_id for chunk_id in texts if self._contains(chunk_id)]
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        for chunk_id, doc in texts.items():
+            self._deleted.discard(chunk_id)
+            self._added[chunk_id] = doc
+
+    def delete(self, ids: List) -> None:
+        """
+        Delete chunks (saved ones are hidden until the next save).
+
+        Args:
+            ids (List): Chunk IDs to delete
+
+        Raises:
+            ValueError: If any of the IDs don't exist
+        """
+        missing = [chunk_id for chunk_id in ids if not self._contains(chunk_id)]
+        if missing:
+            raise ValueError(f"Tried to delete ids that does not exist: {missing}")
+        for chunk_id in ids:
+            if self._added.pop(chunk_id, None) is None:
+                self._deleted.add(chunk_id)
+
+    def _contains(self, chunk_id: str) -> bool:
+        """True if the chunk exists (in the overlay or on disk, not deleted)."""
+        return chunk_id in self._added or (chunk_id in self._positions and chunk_id not in self._deleted)
+
+
+class VectorColumn:
+    """
+    Exact float32 vectors by chunk ID.
+
+    Backed by the memory-mapped vectors.f32 of a loaded store, plus an
+    in-memory overflow for vectors added afterwards. FAISS indexes that
+    compress vectors (IVF-PQ) can't give the exact vectors back, so this
+    column is what gets saved and what index rebuilds start from.
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: List[str]):
+        """
+        Args:
+            vectors (np.ndarray): float32 array (often a memmap), one row per ID
+            ids (List[str]): Chunk ID of each row
+        """
+        self.vectors = vectors
+        self.ids = list(ids)
+        self._rows: Dict[str, int] = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+        self._extra: Dict[str, np.ndarray] = {}
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._extra or chunk_id in self._rows
+
+    def add(self, ids: Iterable[str], vectors: np.ndarray) -> None:
+        """
+        Remember the exact vectors of newly added chunks.
+
+        Args:
+            ids (Iterable[str]): Chunk IDs
+            vectors (np.ndarray): Their vectors, one row per ID
+        """
+        for chunk_id, vector in zip(ids, np.asarray(vectors, dtype=np.float32)):
+            self._extra[chunk_id] = np.array(vector)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """
+        Forget the vectors of deleted chunks.
+
+        Args:
+            ids (Iterable[str]): Chunk IDs
+        """
+        for chunk_id in ids:
+            self._extra.pop(chunk_id, None)
+            self._rows.pop(chunk_id, None)
+
+    def get(self, ids: List[str]) -> np.ndarray:
+        """
+        Vectors of the given chunks, stacked in the same order.
+
+        If `ids` is exactly the list this column was loaded with, the
+        memory-mapped array is returned as is (no copy).
+
+        Args:
+            ids (List[str]): Chunk IDs (all must be in the column)
+
+        Returns:
+            np.ndarray: float32 array of shape (len(ids), dimension)
+        """
+        if not self._extra and ids == self.ids:
+            return self.vectors
+        rows = [self._extra[chunk_id] if chunk_id in self._extra else self.vectors[self._rows[chunk_id]]
+                for chunk_id in ids]
+        return np.vstack(rows).astype(np.float32) if rows else np.zeros((0, self.vectors.shape[1]), np.float32)
+
+
+def _replace_file(path: str, data: Union[bytes, np.ndarray]) -> None:
+    """
+    Write a file atomically (temp file + rename).
+
+    Readers that still have the old file memory-mapped keep seeing the old
+    contents - the rename never modifies pages they have mapped.
+
+    Args:
+        path (str): Destination file
+        data (Union[bytes, np.ndarray]): Contents
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data if isinstance(data, bytes) else np.ascontiguousarray(data).tobytes())
+    os.replace(tmp_path, path)
+
+
+def replace_directory(staging: str, path: str) -> None:
+    """
+    Move a completely written directory into place, replacing `path`.
+
+    The old directory is renamed aside first, then the new one renamed
+    onto `path`: each step is one atomic rename, so `path` never holds a
+    mix of old and new files. A crash between the two renames leaves the
+    old store at `<path>.old-*` and `path` missing - never half-written.
+    Processes that have the old files memory-mapped keep them.
+
+    Args:
+        staging (str): Complete new directory (on the same filesystem)
+        path (str): Directory to replace (may not exist yet)
+    """
+    old = None
+    if os.path.isdir(path):
+        old = f"{path}.old-{uuid.uuid4().hex[:12]}"
+        os.rename(path, old)
+    os.rename(staging, path)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def write_store(
+    path: str,
+    index: "faiss.Index",
+    ids: List[str],
+    docstore: Docstore,
+    vectors: np.ndarray,
+) -> None:
+    """
+    Save a vector store in the columnar format.
+
+    Args:
+        path (str): Vector store directory (created if missing)
+        index (faiss.Index): FAISS index
+        ids (List[str]): Chunk IDs in index order
+        docstore (Docstore): Docstore holding every chunk in `ids`
+        vectors (np.ndarray): Exact float32 vectors in index order
+    """
+    os.makedirs(path, exist_ok=True)
+
+    # Chunk records: reuse the encoded bytes of chunks that are already on disk
+    offsets = np.zeros(len(ids) + 1, dtype=np.uint64)
+    records = bytearray()
+    for i, chunk_id in enumerate(ids):
+        record = docstore.raw_record(chunk_id) if isinstance(docstore, MmapDocstore) else None
+        if record is None:
+            doc = docstore.search(chunk_id)
+            record = json.dumps(
+                {"id": chunk_id, "text": doc.page_content, "metadata": doc.metadata},
+                ensure_ascii=False,
+            ).encode("utf-8")
+        records += record
+        offsets[i + 1] = len(records)
+
+    _replace_file(os.path.join(path, VECTORS_FILE), np.asarray(vectors, dtype=np.float32))
+    _replace_file(os.path.join(path, CHUNKS_FILE), bytes(records))
+    _replace_file(os.path.join(path, OFFSETS_FILE), offsets)
+    _replace_file(os.path.join(path, IDS_FILE), "\n".join(ids).encode("utf-8"))
+
+    import faiss
+
+    tmp_index = os.path.join(path, INDEX_FILE + ".tmp")
+    faiss.write_index(index, tmp_index)
+    os.replace(tmp_index, os.path.join(path, INDEX_FILE))
+
+    # Header last: a store is only complete once store.json exists
+    header = {"format": FORMAT_VERSION, "count": len(ids), "dimension": int(index.d)}
+    _replace_file(os.path.join(path, STORE_FILE), json.dumps(header).encode("utf-8"))
+
+
+def read_store(path: str, mmap_index: bool = True):
+    """
+    Memory-map a vector store saved with write_store().
+
+    Args:
+        path (str): Vector store directory
+        mmap_index (bool): Memory-map index.faiss instead of reading it
+                           (only possible for flat indexes, which are
+                           read-only while mapped)
+
+    Returns:
+        Tuple[faiss.Index, MmapDocstore, Dict[int, str], VectorColumn]:
+            index, docstore, index_to_docstore_id and exact vector column
+
+    Raises:
+        ValueError: If the store was written by a newer, unknown format
+    """
+    with open(os.path.join(path, STORE_FILE)) as f:
+        header = json.load(f)
+    if header["format"] > FORMAT_VERSION:
+        raise ValueError(f"Unsupported vector store format {header['format']} at {path}")
+
+    with open(os.path.join(path, IDS_FILE), encoding="utf-8") as f:
+        ids = f.read().split("\n") if header["count"] else []
+
+    vectors = np.memmap(os.path.join(path, VECTORS_FILE), dtype=np.float32, mode="r",
+                        shape=(header["count"], header["dimension"])) \
+        if header["count"] else np.zeros((0, header["dimension"]), dtype=np.float32)
+
+    import faiss
+
+    index_path = os.path.join(path, INDEX_FILE)
+    flags = faiss.IO_FLAG_MMAP_IFC if mmap_index else 0
+    index = faiss.read_index(index_path, flags)
+
+    return (
+        index,
+        MmapDocstore(path, ids),
+        {i: chunk_id for i, chunk_id in enumerate(ids)},
+        VectorColumn(vectors, ids),
+    )
@@ -0,0 +1,172 @@
+"""
+Context Selector Module - Redundancy-Aware Choice of Prompt Context
+
+This module handles:
+1. Picking retrieved chunks with maximal marginal relevance (MMR), so the
+   prompt gets relevant chunks that don't repeat each other
+2. Merging adjacent chunks of the same page whose texts overlap, so the
+   shared text is sent to the LLM once instead of two or three times
+
+Adjacency comes from the splitter's offsets (metadata["start_index"], the
+chunk's position in the page text): chunks are only merged when their
+ranges touch or overlap and the text agrees on the shared part. Two chunks
+that merely share a repeated line (a header, a list marker) stay apart, and
+chunks ingested without offsets are never merged.
+
+Why?
+- The text splitter uses chunk_overlap=200: neighbouring chunks share up
+  to 200 characters, and neighbours are usually retrieved together
+- Pure top-k similarity happily returns near-duplicates; every repeated
+  sentence costs prompt tokens and carries no new information
+
+MMR runs on the stored chunk vectors (no re-embedding): each next chunk
+maximizes   lambda * sim(query, chunk) - (1 - lambda) * max sim(chunk, selected)
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+class ContextSelector:
+    """
+    Selects and merges retrieved chunks for the prompt.
+
+    Attributes:
+        lambda_mult (float): MMR trade-off - 1.0 is pure relevance,
+                             0.0 is pure diversity
+        merge_overlaps (bool): Merge adjacent, overlapping chunks of the same page
+    """
+
+    def __init__(self, lambda_mult: float = 0.7, merge_overlaps: bool = True):
+        """
+        Args:
+            lambda_mult (float): MMR trade-off (default: 0.7 - mostly relevance)
+            merge_overlaps (bool): Merge overlapping chunks (default: True)
+        """
+        self.lambda_mult = lambda_mult
+        self.merge_overlaps = merge_overlaps
+
+    def select(self, query: str, docs: List[Document], k: int, store) -> List[Document]:
+        """
+        Pick up to k diverse, relevant chunks and merge overlapping ones.
+
+        Args:
+            query (str): The (standalone) query
+            docs (List[Document]): Candidate chunks, best first
+            k (int): Maximum number of chunks to select
+            store (Union[VectorDB, CorpusDB]): Store the chunks came from
+                (provides the query embedding and the stored chunk vectors)
+
+        Returns:
+            List[Document]: Selected chunks in relevance order (merged chunks
+                            may make the list shorter than k)
+        """
+        if len(docs) > k:
+            query_vector = np.asarray(store.embeddings.embed_query(query), dtype=np.float32)
+            chosen = self.mmr(query_vector, store.get_document_vectors(docs), k)
+            docs = [docs[i] for i in chosen]
+        return self.merge(docs) if self.merge_overlaps else docs
+
+    def mmr(self, query_vector: np.ndarray, vectors: np.ndarray, k: int) -> List[int]:
+        """
+        Maximal marginal relevance selection.
+
+        Args:
+            query_vector (np.ndarray): Query embedding, shape (dimension,)
+            vectors (np.ndarray): Candidate embeddings, shape (n, dimension)
+            k (int): Number of candidates to select
+
+        Returns:
+            List[int]: Indices of the selected candidates, in selection order
+        """
+        # Cosine similarity = dot product of unit vectors
+        vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        query_vector = query_vector / max(float(np.linalg.norm(query_vector)), 1e-12)
+        relevance = vectors @ query_vector
+        pairwise = vectors @ vectors.T
+
+        selected = [int(np.argmax(relevance))]
+        # Highest similarity of each candidate to anything selected so far
+        redundancy = pairwise[selected[0]].copy()
+        while len(selected) < min(k, len(vectors)):
+            scores = self.lambda_mult * relevance - (1.0 - self.lambda_mult) * redundancy
+            scores[selected] = -np.inf
+            best = int(np.argmax(scores))
+            selected.append(best)
+            redundancy = np.maximum(redundancy, pairwise[best])
+        return selected
+
+    def merge(self, docs: List[Document]) -> List[Document]:
+        """
+        Merge chunks of the same page whose ranges touch, overlap or contain each other.
+
+        The merged chunk takes the place (and metadata) of its best-ranked
+        part, with "merged_chunks" recording how many chunks it spans and
+        "start_index" where the merged text starts.
+
+        Args:
+            docs (List[Document]): Chunks, best first
+
+        Returns:
+            List[Document]: Chunks with overlapping neighbours merged
+        """
+        # A merged chunk may now overlap another one: repeat until stable
+        while True:
+            merged = self._merge_pass(docs)
+            if len(merged) == len(docs):
+                return merged
+            docs = merged
+
+    def _merge_pass(self, docs: List[Document]) -> List[Document]:
+        """One merging pass over the chunks (see merge())."""
+        merged: List[Document] = []
+        for doc in docs:
+            page = (doc.metadata.get("source"), doc.metadata.get("page"))
+            for i, kept in enumerate(merged):
+                if (kept.metadata.get("source"), kept.metadata.get("page")) != page:
+                    continue
+                joined = self._join(kept, doc)
+                if joined is not None:
+                    start, combined = joined
+                    metadata = dict(kept.metadata)
+                    metadata["merged_chunks"] = kept.metadata.get("merged_chunks", 1) + doc.metadata.get("merged_chunks", 1)
+                    metadata["start_index"] = start
+                    merged[i] = Document(page_content=combined, metadata=metadata)
+                    break
+            else:
+                merged.append(doc)
+        return merged
+
+    @staticmethod
+    def _join(a: Document, b: Document) -> Optional[Tuple[int, str]]:
+        """
+        Join two chunks of one page if their ranges in the page text meet.
+
+        Args:
+            a (Document): A chunk with metadata["start_index"]
+            b (Document): Another chunk of the same page
+
+        Returns:
+            Optional[Tuple[int, str]]: Start offset and text of the joined
+                chunk, or None if they aren't adjacent (or lack offsets, or
+                their texts disagree on the shared range)
+        """
+        if a.metadata.get("start_index") is None or b.metadata.get("start_index") is None:
+            return None
+        (start, first), (second_start, second) = sorted(
+            [(a.metadata["start_index"], a.page_content), (b.metadata["start_index"], b.page_content)],
+            key=lambda part: part[0])
+        end = start + len(first)
+        if second_start > end:
+            return None  # A gap between them - not neighbours
+        offset = second_start - start
+        shared = min(end, second_start + len(second)) - second_start
+        # Offsets kept from an earlier version of the page may be stale:
+        # only trust them when the text agrees
+        if first[offset:offset + shared] != second[:shared]:
+            return None
+        return start, first + second[shared:]
@@ -0,0 +1,669 @@
+"""
+Corpus Module - Multi-Document Corpus with One Index Shard per Document
+
+This module handles:
+1. Ingesting every PDF in a directory, not just the first one
+2. Keeping one vector store ("shard") per source document
+3. Searching all shards at once and merging the results
+4. Rebuilding or dropping a single document without touching the rest
+
+Layout (inside the corpus directory, e.g. vector_store/):
+- <shard name>            Symlink to the document's current shard version
+- <shard name>.<version>/ One VectorDB store per document (see vector_db.py)
+- <shard name>.<version>/shard.json Source path, file fingerprint and chunk count
+
+- corpus.version          Token rewritten whenever a shard is saved or dropped
+- corpus.lock             Lock file held by the process changing the corpus
+
+A shard version is never modified once written: saving writes a new
+version directory and swaps the symlink with one atomic rename, so
+processes loading the shard (pre-forked workers, recycled workers) see
+either the old or the new version, never files of both.
+
+Several processes can serve one corpus directory: a process that changes
+the corpus rewrites corpus.version, and the others call refresh() to load
+the shards that changed (one small file read when nothing did).
+
+Why shards?
+- Adding the 100th document costs one document's worth of embedding
+- A changed or deleted document only affects its own shard
+- All shards share one embedding model (and its cache)
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import copy
+import fcntl
+import hashlib
+import heapq
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .columnar_store import _replace_file
+from .index_spec import IndexSpec
+from .reranker import CrossEncoderReranker
+from .context_selector import ContextSelector
+from .vector_db import HuggingFaceEmbeddingsWrapper, VectorDB, VectorDBRetriever, run_hybrid_search
+
+# Per-shard metadata file
+SHARD_FILE = "shard.json"
+# Corpus-wide change token and writer lock (names with a dot are never shards)
+VERSION_FILE = "corpus.version"
+LOCK_FILE = "corpus.lock"
+
+
+class CorpusDB:
+    """
+    Multi-document vector database made of one VectorDB shard per PDF.
+
+    CorpusDB offers the same search methods as VectorDB (similarity_search,
+    similarity_search_with_score, get_retriever), so ConversationBot can
+    use either one.
+
+    Attributes:
+        root_path (str): Directory holding one subdirectory per shard
+        embeddings (HuggingFaceEmbeddingsWrapper): Embedding model shared by all shards
+        index_spec (IndexSpec): FAISS index family used for every shard
+        shards (Dict[str, VectorDB]): Source path → shard
+        version (int): Incremented every time a shard is attached, dropped
+            or refreshed from disk
+    """
+
+    def __init__(self, root_path: str,
+                 model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 embedding_cache_dir: Optional[str] = None,
+                 index_spec: Optional[IndexSpec] = None,
+                 embedding_backend: str = "torch",
+                 onnx_dir: str = "onnx_models"):
+        """
+        Initialize an (empty) corpus. Call load() and/or sync_directory() next.
+
+        Args:
+            root_path (str): Directory where shards are saved
+            model_name (str): HuggingFace embedding model name
+            embedding_cache_dir (Optional[str]): Directory for the persistent
+                embedding cache (default: None - no cache)
+            index_spec (Optional[IndexSpec]): FAISS index family for every shard
+                (default: exact flat index)
+            embedding_backend (str): "torch" or "onnx" (int8 ONNX Runtime)
+            onnx_dir (str): Where ONNX exports are kept (onnx backend only)
+        """
+        self.root_path = root_path
+        # One model for all shards - loading it per document would waste
+        # seconds and hundreds of MB each time
+        self.embeddings = HuggingFaceEmbeddingsWrapper(
+            model_name, cache_dir=embedding_cache_dir, backend=embedding_backend, onnx_dir=onnx_dir
+        )
+        self.index_spec = index_spec or IndexSpec()
+
+        # Shards are replaced as a whole dict (never mutated in place), so a
+        # search running in another thread always sees a consistent snapshot
+        self.shards: Dict[str, VectorDB] = {}
+        self.version = 0
+        # Shard name -> (version directory, source) of every attached shard,
+        # and the corpus.version token seen by the last load/refresh
+        self._loaded: Dict[str, Tuple[str, str]] = {}
+        self._disk_token: Optional[str] = None
+        # Serializes swaps of the shards dict (refresh vs attach/drop)
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def shard_name(source: str) -> str:
+        """
+        Directory name of a document's shard: readable stem + path hash.
+
+        Args:
+            source (str): Source PDF path
+
+        Returns:
+            str: e.g. "cracking-the-pm-interview-1a2b3c4d"
+        """
+        stem = os.path.splitext(os.path.basename(source))[0]
+        slug = re.sub(r"[^a-z0-9]+", "-", stem.lower()).strip("-") or "document"
+        digest = hashlib.sha1(os.path.abspath(source).encode("utf-8")).hexdigest()[:8]
+        return f"{slug}-{digest}"
+
+    def shard_path(self, source: str) -> str:
+        """
+        Path of a document's shard (a symlink to its current version).
+
+        Args:
+            source (str): Source PDF path
+
+        Returns:
+            str: Shard path
+        """
+        return os.path.join(self.root_path, self.shard_name(source))
+
+    @staticmethod
+    def _resolve(path: str) -> str:
+        """
+        The shard version directory a shard path points to.
+
+        Resolved once per load, so every file is read from the same version
+        even if a save swaps the symlink meanwhile.
+        """
+        return os.path.realpath(path)
+
+    def _new_shard(self) -> VectorDB:
+        """
+        Create an empty shard that shares our embedding model.
+
+        Returns:
+            VectorDB: Empty shard
+        """
+        return VectorDB(embeddings=self.embeddings, index_spec=copy.deepcopy(self.index_spec))
+
+    def load(self) -> None:
+        """
+        Load every shard saved under root_path.
+
+        Shards that fail to load are skipped (and reported); the next
+        sync_directory() rebuilds them.
+        """
+        with self._lock:
+            self.shards, self._loaded = {}, {}
+            self._load_from_disk()
+        print(f"Loaded {len(self.shards)} shard(s) from {self.root_path}")
+
+    def refresh(self) -> bool:
+        """
+        Pick up shards that other processes saved or dropped since the last load.
+
+        Each pre-forked worker holds its own CorpusDB; a document uploaded
+        through one worker reaches the others when they call this. Shards
+        whose version did not change are kept as they are, so the cost is
+        one small file read when nothing changed.
+
+        Returns:
+            bool: True if any shard was loaded or dropped
+        """
+        if self._read_token() == self._disk_token:
+            return False
+        with self._lock:
+            return self._load_from_disk()
+
+    def _load_from_disk(self) -> bool:
+        """
+        Make the shards dict match the shard symlinks on disk (lock held).
+
+        A shard that fails to load keeps its previous version, if any.
+
+        Returns:
+            bool: True if any shard was loaded or dropped
+        """
+        # Read the token before scanning: a save landing mid-scan rewrites
+        # it, and the next refresh() scans again
+        token = self._read_token()
+        shards: Dict[str, VectorDB] = {}
+        loaded: Dict[str, Tuple[str, str]] = {}
+        if os.path.isdir(self.root_path):
+            for name in sorted(os.listdir(self.root_path)):
+                # Shard names have no dots: <name>.<version> entries are the
+                # version directories the shard symlinks point to
+                if "." in name:
+                    continue
+                path = self._resolve(os.path.join(self.root_path, name))
+                version = os.path.basename(path)
+                known = self._loaded.get(name)
+                if known is not None and known[0] == version and known[1] in self.shards:
+                    shards[known[1]] = self.shards[known[1]]
+                    loaded[name] = known
+                    continue
+                info_path = os.path.join(path, SHARD_FILE)
+                if not os.path.exists(info_path):
+                    continue
+                try:
+                    with open(info_path) as f:
+                        info = json.load(f)
+                    shard = self._new_shard()
+                    shard.load(path)
+                    shards[info["source"]] = shard
+                    loaded[name] = (version, info["source"])
+                except Exception as e:
+                    print(f"Error loading shard {name}: {e} (it will be rebuilt)")
+                    if known is not None and known[1] in self.shards:
+                        shards[known[1]] = self.shards[known[1]]
+                        loaded[name] = known
+
+        changed = shards.keys() != self.shards.keys() or any(
+            shard is not self.shards[source] for source, shard in shards.items()
+        )
+        self.shards, self._loaded, self._disk_token = shards, loaded, token
+        if changed:
+            self.version += 1
+        return changed
+
+    def _read_token(self) -> Optional[str]:
+        """
+        Read the corpus.version token (None if no process wrote one yet).
+        """
+        try:
+            with open(os.path.join(self.root_path, VERSION_FILE)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_token(self) -> None:
+        """
+        Tell other processes the corpus changed (atomic rewrite of corpus.version).
+        """
+        token = uuid.uuid4().hex
+        _replace_file(os.path.join(self.root_path, VERSION_FILE), token.encode("ascii"))
+        # Writers hold the corpus lock and refreshed before changing
+        # anything, so this process is not missing any other change
+        self._disk_token = token
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """
+        Hold the corpus writer lock, then catch up with disk.
+
+        Shard updates are incremental, so two processes updating the same
+        document must not both start from the old shard; the lock (flock,
+        released if the process dies) makes them take turns, and the
+        refresh() makes the second one start from the first one's result.
+        """
+        os.makedirs(self.root_path, exist_ok=True)
+        with open(os.path.join(self.root_path, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def sync_directory(self, directory: str, **ingest_kwargs) -> Dict[str, Dict[str, int]]:
+        """
+        Make the corpus match the PDFs in a directory.
+
+        - New PDFs get a new shard
+        - Changed PDFs are synced incrementally (only changed chunks re-embedded)
+        - Shards whose PDF was removed from the directory are dropped
+
+        Args:
+            directory (str): Directory containing the PDFs
+            **ingest_kwargs: Passed to VectorDB.sync_pdf() (batch_size, max_workers, ...)
+
+        Returns:
+            Dict[str, Dict[str, int]]: sync_pdf() stats per source path
+
+        Raises:
+            FileNotFoundError: If the directory contains no PDFs
+        """
+        pdf_paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".pdf")
+        )
+        if not pdf_paths:
+            raise FileNotFoundError(f"No PDF files found in {directory}")
+
+        stats = {pdf_path: self.sync_document(pdf_path, **ingest_kwargs) for pdf_path in pdf_paths}
+
+        # Drop shards of documents that were deleted from this directory
+        directory = os.path.abspath(directory)
+        for source in list(self.shards):
+            if os.path.dirname(os.path.abspath(source)) == directory and source not in stats:
+                self.drop_document(source)
+        return stats
+
+    def sync_document(self, pdf_path: str, **ingest_kwargs) -> Dict[str, int]:
+        """
+        Create or incrementally update the shard of one document.
+
+        Runs under the corpus writer lock (see _exclusive()). The update is applied to a private copy of the shard (re-opened from
+        disk), never to the shard that is serving searches. The copy is
+        swapped in once it is complete, so searches running meanwhile keep
+        seeing the old version of the document.
+
+        Args:
+            pdf_path (str): Source PDF path
+            **ingest_kwargs: Passed to VectorDB.sync_pdf()
+
+        Returns:
+            Dict[str, int]: sync_pdf() stats
+        """
+        with self._exclusive():
+            shard = self._private_copy(pdf_path)
+            stats = shard.sync_pdf(pdf_path, **ingest_kwargs)
+            changed = pdf_path not in self.shards or stats["chunks_added"] or stats["chunks_removed"]
+
+            # Switch index family if the corpus spec changed (no re-embedding)
+            if shard.index_spec.kind != self.index_spec.kind:
+                shard.build_index(copy.deepcopy(self.index_spec))
+                changed = True
+
+            if changed:
+                self._attach(pdf_path, shard, self._save_shard(pdf_path, shard))
+        return stats
+
+    def _private_copy(self, source: str) -> VectorDB:
+        """
+        Open a document's saved shard as a new, unshared VectorDB.
+
+        Saved shards are memory-mapped, so this is cheap; unchanged files
+        keep sharing pages with the live shard.
+
+        Args:
+            source (str): Source PDF path
+
+        Returns:
+            VectorDB: Copy of the shard, or an empty shard for a new document
+        """
+        shard = self._new_shard()
+        path = self._resolve(self.shard_path(source))
+        if source in self.shards and VectorDB.store_exists(path):
+            shard.load(path)
+        return shard
+
+    def rebuild_document(self, pdf_path: str, **ingest_kwargs) -> None:
+        """
+        Rebuild one document's shard from scratch (other shards untouched).
+
+        The old shard keeps serving searches until the new one is ready.
+
+        Args:
+            pdf_path (str): Source PDF path
+            **ingest_kwargs: Passed to VectorDB.create_from_pdf()
+        """
+        shard = self._new_shard()
+        shard.create_from_pdf(pdf_path, streaming=True, **ingest_kwargs)
+        with self._exclusive():
+            self._attach(pdf_path, shard, self._save_shard(pdf_path, shard))
+
+    def drop_document(self, source: str) -> None:
+        """
+        Remove one document's shard from the corpus and from disk.
+
+        Args:
+            source (str): Source PDF path of the document
+        """
+        name = self.shard_name(source)
+        with self._exclusive():
+            with self._lock:
+                self.shards = {path: shard for path, shard in self.shards.items() if path != source}
+                self._loaded.pop(name, None)
+                self.version += 1
+            link = self.shard_path(source)
+            if os.path.islink(link):
+                os.unlink(link)
+            else:
+                shutil.rmtree(link, ignore_errors=True)
+            self._remove_versions(name)
+            self._write_token()
+        print(f"Dropped shard for {source}")
+
+    def _attach(self, source: str, shard: VectorDB, version: str) -> None:
+        """
+        Add or replace a shard by swapping in a new shards dict.
+
+        Args:
+            source (str): Source PDF path
+            shard (VectorDB): The shard
+            version (str): Version directory the shard was saved to
+        """
+        with self._lock:
+            self.shards = {**self.shards, source: shard}
+            self._loaded[self.shard_name(source)] = (version, source)
+            self.version += 1
+
+    def _save_shard(self, source: str, shard: VectorDB) -> str:
+        """
+        Save a shard and its shard.json metadata as a new version, then swap it in.
+
+        Nothing reads the new version directory until it is complete; then
+        the shard symlink is replaced in one atomic rename. The previous
+        version stays on disk until the next save, for processes that
+        resolved the symlink just before the swap (and live processes keep
+        their memory-mapped files even after a version is deleted).
+
+        Args:
+            source (str): Source PDF path
+            shard (VectorDB): The shard
+
+        Returns:
+            str: The new version directory name
+        """
+        name = self.shard_name(source)
+        version = f"{name}.{uuid.uuid4().hex[:12]}"
+        path = os.path.join(self.root_path, version)
+        shard.save(path)
+        entry = shard.manifest["documents"].get(source, {})
+        info = {
+            "source": source,
+            "file": entry.get("file"),
+            "pages": len(entry.get("pages", {})),
+            "chunks": shard.vector_store.index.ntotal,
+            "index_kind": shard.index_spec.kind,
+            "updated_at": time.time(),
+        }
+        with open(os.path.join(path, SHARD_FILE), "w") as f:
+            json.dump(info, f, indent=2)
+        self._publish(name, version)
+        return version
+
+    def _publish(self, name: str, version: str) -> None:
+        """
+        Point a shard's symlink at a new version (atomic rename).
+
+        Args:
+            name (str): Shard name
+            version (str): Version directory name (inside root_path)
+        """
+        link = os.path.join(self.root_path, name)
+        previous = None
+        if os.path.islink(link):
+            previous = os.readlink(link)
+        elif os.path.isdir(link):
+            # Shard saved before versions existed: move it aside once (the
+            # rename below can't replace a directory)
+            previous = f"{name}.{uuid.uuid4().hex[:12]}"
+            os.rename(link, os.path.join(self.root_path, previous))
+
+        # Relative target, so the corpus directory can be moved
+        temporary = os.path.join(self.root_path, f"{name}.tmp-{uuid.uuid4().hex[:12]}")
+        os.symlink(version, temporary)
+        os.replace(temporary, link)
+        self._remove_versions(name, keep={version, previous})
+        self._write_token()
+
+    def _remove_versions(self, name: str, keep: Set[Optional[str]] = frozenset()) -> None:
+        """
+        Delete a shard's version directories (and leftover temporaries).
+
+        Args:
+            name (str): Shard name
+            keep (Set[Optional[str]]): Entries to keep (default: none)
+        """
+        for entry in os.listdir(self.root_path):
+            if entry.startswith(name + ".") and entry not in keep:
+                path = os.path.join(self.root_path, entry)
+                if os.path.islink(path) or not os.path.isdir(path):
+                    os.unlink(path)
+                else:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def documents(self) -> List[dict]:
+        """
+        Summary of every document in the corpus.
+
+        Returns:
+            List[dict]: source, shard name, pages and chunks per document
+        """
+        return [
+            {
+                "source": source,
+                "shard": self.shard_name(source),
+                "pages": len(shard.manifest["documents"].get(source, {}).get("pages", {})),
+                "chunks": shard.vector_store.index.ntotal,
+            }
+            for source, shard in self.shards.items()
+        ]
+
+    def get_retriever(self, k: int = 4, search_type: str = "similarity",
+                      reranker: Optional[CrossEncoderReranker] = None,
+                      selector: Optional[ContextSelector] = None, fetch_k: int = 20) -> VectorDBRetriever:
+        """
+        Get a retriever that searches all shards.
+
+        Args:
+            k (int): Number of documents to retrieve (default: 4)
+            search_type (str): "similarity" or "hybrid" (vectors + BM25)
+            reranker (Optional[CrossEncoderReranker]): Re-ranks fetch_k candidates down to k
+            selector (Optional[ContextSelector]): Picks k diverse chunks (MMR)
+                and merges overlapping ones
+            fetch_k (int): Candidates retrieved for the re-ranker/selector (default: 20)
+
+        Returns:
+            VectorDBRetriever: Retriever object for searching
+
+        Raises:
+            ValueError: If the corpus has no shards
+        """
+        if not self.shards:
+            raise ValueError("Corpus is empty. Load or sync some documents first.")
+        return VectorDBRetriever(store=self, k=k, search_type=search_type,
+                                 reranker=reranker, selector=selector, fetch_k=fetch_k)
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        """
+        Search all shards for the chunks most similar to the query.
+
+        Args:
+            query (str): Search query text
+            k (int): Number of similar documents to return
+
+        Returns:
+            List[Document]: Most similar chunks across the whole corpus
+        """
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """
+        Merged search across all shards, with L2 distances.
+
+        The query is embedded once and the same vector is searched in
+        every shard.
+
+        Args:
+            query (str): Search query text
+            k (int): Number of similar documents to return
+
+        Returns:
+            List[Tuple[Document, float]]: (chunk, distance) pairs, closest first
+        """
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        """
+        Merged search across all shards for an already embedded query.
+
+        Every shard returns its own top k; the global top k is the k
+        smallest distances among those (all shards use the same model
+        and L2 metric, so distances are comparable).
+
+        Args:
+            embedding (List[float]): Query embedding
+            k (int): Number of similar documents to return
+
+        Returns:
+            List[Tuple[Document, float]]: (chunk, distance) pairs, closest first
+        """
+        results = []
+        for shard in list(self.shards.values()):
+            results.extend(shard.similarity_search_with_score_by_vector(embedding, k))
+        return heapq.nsmallest(k, results, key=lambda pair: pair[1])
+
+    def similarity_search_batch(self, queries: List[str], k: int = 4
+                                ) -> List[List[Tuple[Document, float]]]:
+        """
+        Similarity search for many queries at once, across all shards.
+
+        The queries are embedded in one batched pass; every shard then runs
+        one FAISS search over the whole query matrix.
+
+        Args:
+            queries (List[str]): Search query texts
+            k (int): Number of similar documents to return per query
+
+        Returns:
+            List[List[Tuple[Document, float]]]: For each query (same order),
+                (chunk, L2 distance) pairs, closest first
+        """
+        embeddings = self.embeddings.embed_queries_array(queries)
+        merged: List[List[Tuple[Document, float]]] = [[] for _ in queries]
+        for shard in list(self.shards.values()):
+            for results, shard_results in zip(merged, shard.similarity_search_batch_by_vectors(embeddings, k)):
+                results.extend(shard_results)
+        return [heapq.nsmallest(k, results, key=lambda pair: pair[1]) for results in merged]
+
+    def get_document_vectors(self, docs: List[Document]) -> np.ndarray:
+        """
+        Stored vectors of retrieved chunks, looked up in each chunk's shard.
+
+        Args:
+            docs (List[Document]): Chunks returned by a search of this corpus
+
+        Returns:
+            np.ndarray: float32 array of shape (len(docs), dimension)
+        """
+        vectors = np.empty((len(docs), self.embeddings.dimension), dtype=np.float32)
+        by_shard: Dict[str, List[int]] = {}
+        for i, doc in enumerate(docs):
+            by_shard.setdefault(doc.metadata.get("source"), []).append(i)
+        for source, positions in by_shard.items():
+            shard = self.shards.get(source)
+            group = [docs[i] for i in positions]
+            # A shard swapped out since the search: fall back to the (cached) model
+            vectors[positions] = shard.get_document_vectors(group) if shard is not None \
+                else self.embeddings.embed_documents_array([doc.page_content for doc in group])
+        return vectors
+
+    def keyword_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """
+        BM25 keyword search across all shards.
+
+        Each shard scores with its own term statistics, which is close
+        enough for merging: the same term is rare or common in every
+        document of one corpus alike.
+
+        Args:
+            query (str): Search query text
+            k (int): Number of documents to return
+
+        Returns:
+            List[Tuple[Document, float]]: (chunk, BM25 score) pairs, best first
+        """
+        results = []
+        for shard in list(self.shards.values()):
+            results.extend(shard.keyword_search_with_score(query, k))
+        return heapq.nlargest(k, results, key=lambda pair: pair[1])
+
+    def hybrid_search(self, query: str, k: int = 4, fetch_k: int = 20, rrf_k: int = 60,
+                      timings: Optional[Dict[str, float]] = None) -> List[Tuple[Document, float]]:
+        """
+        Hybrid search across all shards (see VectorDB.hybrid_search()).
+
+        Args:
+            query (str): Search query text
+            k (int): Number of documents to return
+            fetch_k (int): Candidates taken from each search (default: 20)
+            rrf_k (int): RRF damping constant (default: 60)
+            timings (Optional[Dict[str, float]]): If given, milliseconds spent in
+                "faiss_search", "bm25_search" and "fusion" are stored in it
+
+        Returns:
+            List[Tuple[Document, float]]: (chunk, fused score) pairs, best first
+        """
+        return run_hybrid_search(self, query, k, fetch_k, rrf_k, timings)
@@ -0,0 +1,445 @@
+"""
+Embedding Cache Module - Persistent, On-Disk Cache of Embedding Vectors
+
+This module handles:
+1. Remembering the embedding of every text we have already encoded
+2. Storing the vectors on disk so they survive restarts and rebuilds
+3. Sharing one cache between several processes/services
+4. Evicting least-recently-used vectors when the cache gets too big
+5. Caching query embeddings in memory for the chat hot path
+
+Storage layout (inside the cache directory):
+- <model>.f32: Append-only file of float32 vectors, one fixed-size row each
+- index.sqlite: Maps (model_name, text hash) → row number, plus last-use time
+
+Why cache embeddings?
+- The same chunks get embedded again on every rebuild, index experiment
+  or second service built on the same corpus
+- Looking a vector up on disk is thousands of times cheaper than running
+  the transformer model again
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import fcntl
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Disk-backed cache of embedding vectors keyed by (model_name, text hash).
+
+    Texts are normalized (Unicode NFC, collapsed whitespace) before hashing,
+    so trivial formatting differences still hit the cache. Vectors are
+    appended to a per-model float32 file; an SQLite index maps each key to
+    its row. A file lock makes appends and compaction safe when several
+    processes share the same cache directory.
+
+    Eviction policy: when more than `max_entries` vectors are cached, the
+    least recently used ones are dropped from the index. Their rows stay in
+    the file until dead rows outnumber live ones, then the file is compacted.
+
+    Attributes:
+        model_name (str): Embedding model the vectors belong to
+        dimension (int): Number of floats per vector
+        max_entries (int): Maximum number of cached vectors for this model
+        hits (int): Lookups served from the cache
+        misses (int): Lookups that had to be encoded by the model
+        evictions (int): Vectors evicted by the LRU policy
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, dimension: int, max_entries: int = 1_000_000):
+        """
+        Open (or create) the cache for one embedding model.
+
+        Args:
+            cache_dir (str): Directory holding the cache files
+            model_name (str): Embedding model name (part of every key)
+            dimension (int): Embedding dimension of the model
+            max_entries (int): LRU eviction threshold (default: 1,000,000 vectors)
+        """
+        self.model_name = model_name
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        slug = model_name.replace("/", "__")
+        self._vectors_path = os.path.join(cache_dir, f"{slug}.f32")
+        self._lock_path = os.path.join(cache_dir, f"{slug}.lock")
+        self._row_bytes = dimension * 4  # float32 = 4 bytes
+
+        # self._lock serialises the threads of this process (FastAPI may call
+        # us from worker threads)
+        self._lock = threading.RLock()
+        self._db_path = os.path.join(cache_dir, "index.sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._inherited: List[sqlite3.Connection] = []
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS vectors (
+                   model TEXT NOT NULL,
+                   text_hash TEXT NOT NULL,
+                   row INTEGER NOT NULL,
+                   last_used REAL NOT NULL,
+                   PRIMARY KEY (model, text_hash))"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS vectors_lru ON vectors (model, last_used)")
+        self._db.commit()
+
+        if not os.path.exists(self._vectors_path):
+            open(self._vectors_path, "ab").close()
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """
+        This process's connection to the index.
+
+        A connection must not be used across fork() - the pre-fork launcher
+        opens the cache in the parent, then forks the workers - so a forked
+        worker opens its own. The inherited one is kept, never used or
+        closed: closing it in the child could release the parent's locks.
+        """
+        if self._conn is None or self._conn_pid != os.getpid():
+            if self._conn is not None:
+                self._inherited.append(self._conn)
+            # check_same_thread=False: FastAPI may call us from worker threads
+            self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize a text before hashing (NFC Unicode form, single spaces).
+
+        Args:
+            text (str): Raw text
+
+        Returns:
+            str: Normalized text
+        """
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @classmethod
+    def text_hash(cls, text: str) -> str:
+        """
+        Hash of the normalized text, used as the cache key.
+
+        Args:
+            text (str): Raw text
+
+        Returns:
+            str: SHA-256 hex digest of the normalized text
+        """
+        return hashlib.sha256(cls.normalize(text).encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        """
+        Hold a shared (read) or exclusive (write) lock on the vectors file.
+
+        Args:
+            exclusive (bool): True for appends/compaction, False for reads
+        """
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up the cached vectors of several texts.
+
+        Args:
+            texts (Sequence[str]): Texts to look up
+
+        Returns:
+            List[Optional[np.ndarray]]: float32 vector per text, None on a miss
+        """
+        keys = [self.text_hash(text) for text in texts]
+        with self._file_lock(exclusive=False):
+            rows = self._lookup_rows(set(keys))
+
+            results: List[Optional[np.ndarray]] = [None] * len(texts)
+            if rows:
+                # Gather all hit rows with one memory-mapped read
+                n_rows = os.path.getsize(self._vectors_path) // self._row_bytes
+                matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r",
+                                   shape=(n_rows, self.dimension))
+                for i, key in enumerate(keys):
+                    if key in rows:
+                        results[i] = np.array(matrix[rows[key]])
+                del matrix
+
+            # Refresh last-use times so hot vectors survive eviction
+            if rows:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE vectors SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, self.model_name, key) for key in rows],
+                )
+                self._db.commit()
+
+        hit_count = sum(vector is not None for vector in results)
+        self.hits += hit_count
+        self.misses += len(texts) - hit_count
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        Add the vectors of several texts to the cache.
+
+        Texts that are already cached (or repeated in `texts`) are skipped.
+
+        Args:
+            texts (Sequence[str]): Texts that were encoded
+            vectors (np.ndarray): Their embeddings, shape (len(texts), dimension)
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._file_lock(exclusive=True):
+            # Keep only the first occurrence of each key that isn't cached yet
+            new: Dict[str, int] = {}
+            for i, text in enumerate(texts):
+                new.setdefault(self.text_hash(text), i)
+            for key in self._lookup_rows(set(new)):
+                del new[key]
+            if not new:
+                return
+
+            # Append rows at the end of the file; row numbers follow from its size
+            first_row = os.path.getsize(self._vectors_path) // self._row_bytes
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors[list(new.values())].tobytes())
+
+            now = time.time()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (model, text_hash, row, last_used) VALUES (?, ?, ?, ?)",
+                [(self.model_name, key, first_row + offset, now) for offset, key in enumerate(new)],
+            )
+            self._db.commit()
+            self._evict_if_needed()
+
+    def _lookup_rows(self, keys: set) -> Dict[str, int]:
+        """
+        Find the file rows of the given keys.
+
+        Args:
+            keys (set): Text hashes to look up
+
+        Returns:
+            Dict[str, int]: Row number per cached key (misses are left out)
+        """
+        rows: Dict[str, int] = {}
+        keys = list(keys)
+        # SQLite limits the number of query parameters, so look up in slices
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows.update(self._db.execute(
+                f"SELECT text_hash, row FROM vectors WHERE model = ? AND text_hash IN ({placeholders})",
+                [self.model_name, *batch],
+            ).fetchall())
+        return rows
+
+    def _evict_if_needed(self) -> None:
+        """
+        Apply the LRU eviction policy (call with the exclusive lock held).
+
+        Evicts down to 90% of max_entries so we don't evict on every put,
+        and compacts the vectors file once most of its rows are dead.
+        """
+        live = self._count()
+        if live > self.max_entries:
+            excess = live - int(self.max_entries * 0.9)
+            self._db.execute(
+                """DELETE FROM vectors WHERE model = ? AND text_hash IN (
+                       SELECT text_hash FROM vectors WHERE model = ?
+                       ORDER BY last_used LIMIT ?)""",
+                (self.model_name, self.model_name, excess),
+            )
+            self._db.commit()
+            self.evictions += excess
+            live -= excess
+
+        total_rows = os.path.getsize(self._vectors_path) // self._row_bytes
+        if total_rows > 2 * live:
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Rewrite the vectors file with live rows only (exclusive lock held).
+        """
+        rows = self._db.execute(
+            "SELECT text_hash, row FROM vectors WHERE model = ? ORDER BY row", (self.model_name,)
+        ).fetchall()
+        n_rows = os.path.getsize(self._vectors_path) // self._row_bytes
+        old = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(n_rows, self.dimension)) \
+            if n_rows else np.zeros((0, self.dimension), dtype=np.float32)
+
+        tmp_path = self._vectors_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(np.ascontiguousarray(old[[row for _, row in rows]]).tobytes())
+        del old
+        os.replace(tmp_path, self._vectors_path)
+
+        self._db.executemany(
+            "UPDATE vectors SET row = ? WHERE model = ? AND text_hash = ?",
+            [(new_row, self.model_name, key) for new_row, (key, _) in enumerate(rows)],
+        )
+        self._db.commit()
+
+    def _count(self) -> int:
+        """
+        Number of live cached vectors for this model.
+
+        Returns:
+            int: Live entry count
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM vectors WHERE model = ?", (self.model_name,)
+            ).fetchone()[0]
+
+    def stats(self) -> dict:
+        """
+        Cache statistics (counters are per process, entries are shared).
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions and entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": self._count(),
+        }
+
+
+class QueryEmbeddingCache:
+    """
+    Small in-memory LRU cache of query embeddings with a time-to-live.
+
+    Chat traffic repeats itself: "What is this book about?" is asked over
+    and over, with different capitalisation, spacing or a missing "?".
+    Queries are normalized (case, whitespace, trailing punctuation) before
+    lookup, so all of those variants hit the same entry and skip the
+    transformer forward pass.
+
+    Attributes:
+        max_entries (int): Maximum number of cached queries
+        ttl_seconds (float): Entries older than this are treated as misses
+        hits (int): Lookups served from the cache
+        misses (int): Lookups that had to be encoded
+        evictions (int): Entries dropped because the cache was full
+        expirations (int): Entries dropped because they were too old
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        """
+        Args:
+            max_entries (int): Maximum number of cached queries (default: 1024)
+            ttl_seconds (float): Time-to-live of an entry in seconds (default: 1 hour)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # OrderedDict keeps entries in least → most recently used order
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize a query: NFC, lower case, single spaces, no trailing punctuation.
+
+        Args:
+            text (str): Raw query
+
+        Returns:
+            str: Normalized query (the cache key)
+        """
+        text = " ".join(unicodedata.normalize("NFC", text).casefold().split())
+        return text.rstrip(" ?!.")
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up a query embedding.
+
+        Args:
+            text (str): Raw query
+
+        Returns:
+            Optional[np.ndarray]: Cached embedding, or None on a miss
+        """
+        key = self.normalize(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        """
+        Store a query embedding, evicting the least recently used entry if full.
+
+        Args:
+            text (str): Raw query
+            vector (np.ndarray): Its embedding
+        """
+        key = self.normalize(text)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached queries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Cache statistics.
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions, expirations and entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,209 @@
+"""
+Index Spec Module - Choosing and Building the FAISS Index Type
+
+This module handles:
+1. Describing which FAISS index family to use (flat, IVF-Flat, IVF-PQ, HNSW)
+2. Building and training that index
+3. Applying search-time parameters (nprobe, efSearch)
+4. Saving/loading the spec next to the index so it can be restored
+
+Which index should I use?
+- flat:     Exact search, compares the query with every vector.
+            Best for small corpora (up to ~100k chunks).
+- ivf_flat: Clusters vectors into `nlist` lists and only scans `nprobe`
+            of them. Much faster on large corpora, tiny accuracy loss.
+- ivf_pq:   IVF plus product quantization - vectors are compressed to
+            `pq_m` bytes each. For millions of chunks / limited RAM.
+- hnsw:     Graph-based search, very fast and accurate, no training,
+            but uses more memory and can't delete single vectors.
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import json
+import math
+from dataclasses import asdict, dataclass, fields
+from typing import Optional
+
+import numpy as np
+
+# Supported index families
+INDEX_KINDS = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# File (next to the FAISS index) that stores the spec
+INDEX_SPEC_FILE = "index_spec.json"
+
+
+@dataclass
+class IndexSpec:
+    """
+    Description of a FAISS index: its family, build parameters and
+    search parameters.
+
+    Attributes:
+        kind (str): One of "flat", "ivf_flat", "ivf_pq", "hnsw"
+        nlist (int): Number of IVF clusters (IVF kinds only). Clipped to
+                     corpus_size / 39 when the corpus is small.
+        pq_m (int): Bytes per vector after PQ compression (ivf_pq only,
+                    must divide the embedding dimension)
+        pq_nbits (int): Bits per PQ code (ivf_pq only)
+        hnsw_m (int): Graph neighbours per node (hnsw only)
+        ef_construction (int): Build-time search depth (hnsw only)
+        nprobe (int): Clusters scanned per query (IVF kinds, search-time)
+        ef_search (int): Search depth per query (hnsw only, search-time)
+        max_training_points (int): Training uses a random sample of at most
+                                   this many vectors (IVF kinds only)
+    """
+    kind: str = "flat"
+    nlist: int = 1024
+    pq_m: int = 16
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    nprobe: int = 16
+    ef_search: int = 64
+    max_training_points: int = 100_000
+
+    def __post_init__(self):
+        if self.kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind '{self.kind}'. Choose one of {INDEX_KINDS}")
+
+    @property
+    def needs_training(self) -> bool:
+        """True for index families that must be trained before adding vectors."""
+        return self.kind in ("ivf_flat", "ivf_pq")
+
+    @property
+    def supports_removal(self) -> bool:
+        """
+        True if vectors can be removed in place (flat only).
+
+        Flat indexes compact after remove_ids(), so positions stay 0..n-1
+        like LangChain's renumbered docstore mapping. IVF indexes keep the
+        remaining vectors' old labels (the mapping would point at the wrong
+        chunks), and HNSW can't remove at all.
+        """
+        return self.kind == "flat"
+
+    def factory_string(self, n_vectors: int) -> str:
+        """
+        FAISS index_factory description for this spec.
+
+        IVF and PQ parameters are clipped so the index can be trained on
+        `n_vectors` vectors (FAISS wants ~39 training points per centroid).
+
+        Args:
+            n_vectors (int): Number of vectors the index will be trained on
+
+        Returns:
+            str: e.g. "Flat", "IVF1024,Flat", "IVF1024,PQ16x8", "HNSW32"
+        """
+        if self.kind == "flat":
+            return "Flat"
+        if self.kind == "hnsw":
+            return f"HNSW{self.hnsw_m}"
+
+        nlist = max(1, min(self.nlist, n_vectors // 39))
+        if self.kind == "ivf_flat":
+            return f"IVF{nlist},Flat"
+        nbits = max(1, min(self.pq_nbits, int(math.log2(max(n_vectors, 2)))))
+        return f"IVF{nlist},PQ{self.pq_m}x{nbits}"
+
+    def build(self, dimension: int, vectors: np.ndarray) -> "faiss.Index":
+        """
+        Build (and train, if needed) an empty index for these vectors.
+
+        The vectors are only used for training; call index.add() afterwards.
+
+        Args:
+            dimension (int): Embedding dimension
+            vectors (np.ndarray): float32 vectors, shape (n, dimension)
+
+        Returns:
+            faiss.Index: Trained, empty index with search parameters applied
+
+        Raises:
+            ValueError: If pq_m doesn't divide the dimension
+        """
+        if self.kind == "ivf_pq" and dimension % self.pq_m != 0:
+            raise ValueError(f"pq_m={self.pq_m} must divide the embedding dimension {dimension}")
+
+        # Imported here (as in the other FAISS modules): only processes that
+        # build, load or search an index pay for importing it
+        import faiss
+
+        index = faiss.index_factory(dimension, self.factory_string(len(vectors)), faiss.METRIC_L2)
+        if self.kind == "hnsw":
+            index.hnsw.efConstruction = self.ef_construction
+
+        if not index.is_trained:
+            # Train on a random sample - k-means on millions of points is slow
+            # and a sample of ~100k gives practically the same centroids
+            sample = vectors
+            if len(vectors) > self.max_training_points:
+                rng = np.random.default_rng(0)
+                sample = vectors[rng.choice(len(vectors), self.max_training_points, replace=False)]
+            index.train(np.ascontiguousarray(sample, dtype=np.float32))
+
+        self.apply_search_params(index)
+        return index
+
+    def apply_search_params(self, index: "faiss.Index") -> None:
+        """
+        Set search-time parameters (nprobe / efSearch) on an index.
+
+        Args:
+            index (faiss.Index): Index built from this spec
+        """
+        import faiss
+
+        params = faiss.ParameterSpace()
+        if self.kind in ("ivf_flat", "ivf_pq"):
+            params.set_index_parameter(index, "nprobe", self.nprobe)
+        elif self.kind == "hnsw":
+            params.set_index_parameter(index, "efSearch", self.ef_search)
+
+    def to_dict(self) -> dict:
+        """Spec as a plain dict (for JSON)."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IndexSpec":
+        """
+        Create a spec from a dict, ignoring unknown keys.
+
+        Args:
+            data (dict): Spec fields
+
+        Returns:
+            IndexSpec: The spec
+        """
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+    def save(self, path: str) -> None:
+        """
+        Save the spec as JSON.
+
+        Args:
+            path (str): File path (usually <store>/index_spec.json)
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IndexSpec"]:
+        """
+        Load a spec saved with save().
+
+        Args:
+            path (str): File path
+
+        Returns:
+            Optional[IndexSpec]: The spec, or None if the file doesn't exist
+        """
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
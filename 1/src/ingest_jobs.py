@@ -0,0 +1,308 @@
+"""
+Ingestion Jobs Module - Background Document Ingestion with Progress Tracking
+
+This module handles:
+1. Running document ingestion in a background thread (off the event loop)
+2. Tracking each job's status and page/chunk progress so clients can poll it
+3. Swapping the finished shard into the live corpus in one step
+4. Sharing job status between worker processes (a SQLite file), so any
+   worker can answer a poll for a job another worker runs
+
+Why a single worker thread?
+- Ingestion is CPU-heavy (PDF extraction uses its own process pool and
+  the embedding model uses all cores), so parallel jobs would only
+  compete with each other
+- Jobs for the same document never race on its shard directory
+
+Chat requests keep being answered from the old shards while a job runs:
+CorpusDB builds the new shard on a private copy and attaches it only
+when it is complete. Jobs submitted to different workers take turns on
+the corpus writer lock (see CorpusDB._exclusive).
+
+A job belongs to the worker that accepted the upload. If that worker
+exits before the job finishes (recycled, crashed), the next worker to
+start re-runs the job; a job interrupted twice is marked failed.
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from .corpus import CorpusDB
+
+# Progress is written to the job database at most this often (seconds)
+PROGRESS_INTERVAL = 0.5
+# Runs of a job before an interrupted job is marked failed
+MAX_ATTEMPTS = 2
+
+
+@dataclass
+class IngestionJob:
+    """
+    Status and progress of one ingestion job.
+
+    Attributes:
+        job_id (str): Unique job ID
+        source (str): Path of the PDF being ingested
+        status (str): "queued", "running", "succeeded" or "failed"
+        pages_done (int): Pages extracted and chunked so far
+        total_pages (int): Pages in the PDF (0 until extraction starts)
+        chunks_done (int): Chunks embedded and indexed so far
+        stats (Optional[Dict[str, int]]): sync_pdf() stats once succeeded
+        error (Optional[str]): Error message if the job failed
+        created_at (float): Submission time (Unix timestamp)
+        started_at (Optional[float]): When the job started running
+        finished_at (Optional[float]): When the job succeeded or failed
+    """
+    job_id: str
+    source: str
+    status: str = "queued"
+    pages_done: int = 0
+    total_pages: int = 0
+    chunks_done: int = 0
+    stats: Optional[Dict[str, int]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        """True once the job succeeded or failed."""
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> dict:
+        """Job as a plain dict (for JSON responses)."""
+        return asdict(self)
+
+
+class IngestionJobManager:
+    """
+    Queue of background ingestion jobs for a corpus.
+
+    Jobs are kept in a SQLite database (one JSON row per job). With a
+    database file, every worker process of the server sees every job;
+    the default in-memory database is private to one process.
+
+    Attributes:
+        corpus (CorpusDB): Corpus the documents are ingested into
+        path (str): Job database file (":memory:" for a private one)
+        max_jobs_kept (int): Finished jobs beyond this number are forgotten
+                             (oldest first)
+    """
+
+    def __init__(self, corpus: CorpusDB, path: str = ":memory:", max_jobs_kept: int = 100):
+        """
+        Open the job database and resume jobs left behind by exited workers.
+
+        Args:
+            corpus (CorpusDB): Corpus the documents are ingested into
+            path (str): Job database file, created if missing (default:
+                ":memory:" - jobs visible to this process only)
+            max_jobs_kept (int): How many jobs to remember for polling (default: 100)
+        """
+        self.corpus = corpus
+        self.path = path
+        self.max_jobs_kept = max_jobs_kept
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    owner_pid INTEGER NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    data TEXT NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at)")
+        self._resume_orphaned_jobs()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        This process's connection (lock held).
+
+        A connection must not be used across fork(): a forked worker opens
+        its own.
+        """
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None,
+                                         check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """One write transaction on this process's connection."""
+        with self._lock:
+            conn = self._connection()
+            # IMMEDIATE: take the write lock up front, so concurrent
+            # read-then-write transactions can't deadlock
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def submit(self, pdf_path: str) -> IngestionJob:
+        """
+        Queue a PDF for (incremental) ingestion.
+
+        Args:
+            pdf_path (str): Path of the PDF (already saved on disk)
+
+        Returns:
+            IngestionJob: The queued job (poll it with get())
+        """
+        job = IngestionJob(job_id=uuid.uuid4().hex, source=pdf_path)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, created_at, status, owner_pid, data) VALUES (?, ?, ?, ?, ?)",
+                (job.job_id, job.created_at, job.status, os.getpid(), json.dumps(job.to_dict())))
+            self._forget_old_jobs(conn)
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Look up a job (submitted to any worker sharing the database).
+
+        Args:
+            job_id (str): Job ID returned by submit()
+
+        Returns:
+            Optional[IngestionJob]: The job, or None if unknown (or forgotten)
+        """
+        with self._lock:
+            row = self._connection().execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return IngestionJob(**json.loads(row[0])) if row else None
+
+    def list(self) -> List[IngestionJob]:
+        """
+        All remembered jobs, newest first.
+
+        Returns:
+            List[IngestionJob]: Jobs
+        """
+        with self._lock:
+            rows = self._connection().execute("SELECT data FROM jobs ORDER BY created_at DESC").fetchall()
+        return [IngestionJob(**json.loads(data)) for (data,) in rows]
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs and wait for the running one to finish."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _save(self, job: IngestionJob) -> None:
+        """
+        Write a job's current status and progress to the database.
+
+        Args:
+            job (IngestionJob): The job
+        """
+        with self._transaction() as conn:
+            conn.execute("UPDATE jobs SET status = ?, data = ? WHERE job_id = ?",
+                         (job.status, json.dumps(job.to_dict()), job.job_id))
+
+    def _run(self, job: IngestionJob) -> None:
+        """
+        Run one job (in the worker thread).
+
+        Args:
+            job (IngestionJob): The job to run
+        """
+        job.status = "running"
+        job.started_at = time.time()
+        with self._transaction() as conn:
+            conn.execute("UPDATE jobs SET attempts = attempts + 1 WHERE job_id = ?", (job.job_id,))
+        self._save(job)
+        last_saved = time.monotonic()
+
+        def on_progress(pages_done: int, total_pages: int, chunks_done: int) -> None:
+            nonlocal last_saved
+            job.pages_done, job.total_pages, job.chunks_done = pages_done, total_pages, chunks_done
+            # Throttled: a database write per batch would slow ingestion down
+            if time.monotonic() - last_saved >= PROGRESS_INTERVAL:
+                self._save(job)
+                last_saved = time.monotonic()
+
+        try:
+            # The corpus swaps the new shard in only when it is complete
+            job.stats = self.corpus.sync_document(job.source, progress_callback=on_progress)
+            job.pages_done = job.total_pages = job.stats["pages"]
+            job.status = "succeeded"
+            print(f"Ingestion job {job.job_id} done: {job.source} "
+                  f"({job.stats['chunks_added']} chunks added, {job.stats['chunks_removed']} removed)")
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            print(f"Ingestion job {job.job_id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+
+    def _resume_orphaned_jobs(self) -> None:
+        """
+        Take over unfinished jobs whose worker process has exited.
+
+        Runs once per manager (i.e. per worker start). Claiming happens in
+        one transaction, so two workers starting together never both run a
+        job.
+        """
+        resumed = []
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT job_id, owner_pid, attempts, data FROM jobs "
+                "WHERE status IN ('queued', 'running') ORDER BY created_at").fetchall()
+            for job_id, owner_pid, attempts, data in rows:
+                if self._process_alive(owner_pid):
+                    continue
+                job = IngestionJob(**json.loads(data))
+                if attempts >= MAX_ATTEMPTS:
+                    job.status, job.error, job.finished_at = "failed", "Worker exited during ingestion", time.time()
+                else:
+                    job.status, job.started_at = "queued", None
+                    resumed.append(job)
+                conn.execute("UPDATE jobs SET status = ?, owner_pid = ?, data = ? WHERE job_id = ?",
+                             (job.status, os.getpid(), json.dumps(job.to_dict()), job_id))
+        for job in resumed:
+            print(f"Resuming ingestion job {job.job_id} ({job.source}) left by an exited worker")
+            self._executor.submit(self._run, job)
+
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        """True if another process with this pid is running."""
+        if pid == os.getpid():
+            # Our own pid on a job we don't run: a previous worker's pid reused
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _forget_old_jobs(self, conn: sqlite3.Connection) -> None:
+        """Drop the oldest finished jobs beyond max_jobs_kept (in a transaction)."""
+        conn.execute(
+            "DELETE FROM jobs WHERE job_id IN ("
+            "  SELECT job_id FROM jobs WHERE status IN ('succeeded', 'failed')"
+            "  ORDER BY created_at LIMIT MAX(0, (SELECT COUNT(*) FROM jobs) - ?))",
+            (self.max_jobs_kept,))
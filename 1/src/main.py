@@ -5,23 +5,50 @@ This module creates a FastAPI web server that provides REST API endpoints
 for a conversational RAG (Retrieval-Augmented Generation) application.
 
 The application:
-1. Loads or creates a vector database from PDF documents on startup
+1. Loads or creates a vector database from all PDF documents on startup
 2. Provides endpoints for chat interactions
 3. Manages conversation history
 4. Returns answers with source document citations
+5. Accepts document uploads and ingests them in the background
+6. Reports liveness and readiness (model and index loaded and warm)
+   separately, so orchestrators only send traffic to warm processes
+7. Exposes Prometheus metrics (requests, routing, per-stage latencies)
 
 Author: Project 1 - LLM Practice Projects
 """
 
+import asyncio
+import json
 import os
-from typing import Optional
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from dotenv import load_dotenv
+import shutil
+import traceback
+import uuid
+from typing import Dict, List, Optional, Tuple
 
-from .vector_db import VectorDB
-from .chatbot import ConversationBot
+from .startup_profile import StartupProfile
+
+# Created before the other imports, so their import time is measured too
+# (printed as a breakdown once startup is complete)
+startup_profile = StartupProfile()
+
+with startup_profile.phase("import"):
+    from fastapi import FastAPI, File, HTTPException, UploadFile
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse, Response, StreamingResponse
+    from pydantic import BaseModel, Field
+    from dotenv import load_dotenv
+    
+    from .corpus import CorpusDB
+    from .index_spec import IndexSpec
+    from .chatbot import ConversationBot
+    from .context_selector import ContextSelector
+    from .ingest_jobs import IngestionJobManager
+    from .metrics import CONTENT_TYPE, RAGMetrics
+    from .prompt_packer import PromptPacker
+    from .query_rewriter import RewriteGate
+    from .reranker import CrossEncoderReranker
+    from .session_store import create_session_store
 
 # Load environment variables from .env file
 # This allows us to store sensitive data like API keys outside the code
@@ -45,8 +72,17 @@ app.add_middleware(
 # Global instances - these are initialized once on startup and reused
 # for all requests. This is more efficient than creating new instances
 # for each request.
-vector_db: Optional[VectorDB] = None  # Vector database for document storage
+vector_db: Optional[CorpusDB] = None  # Document corpus (one vector store per PDF)
 chatbot: Optional[ConversationBot] = None  # Chatbot for handling conversations
+ingestion_jobs: Optional[IngestionJobManager] = None  # Background ingestion queue
+documents_dir: Optional[str] = None  # Where uploaded PDFs are saved
+jobs_db: Optional[str] = None  # Ingestion job database (shared by all workers)
+startup_state = "starting"  # "starting", "ready" (loaded and warmed up) or "failed"
+startup_error: Optional[str] = None  # Why startup failed
+_startup_task: Optional[asyncio.Task] = None  # Background initialization (keeps it referenced)
+# Request counters and latency histograms - created at import, i.e. before the
+# multi-worker launcher forks, so all workers share them
+metrics = RAGMetrics()
 
 # Request/Response Models using Pydantic
 # These define the structure of data sent to and received from the API
@@ -58,8 +94,11 @@ class ChatRequest(BaseModel):
     
     Attributes:
         message (str): The user's message/question
+        session_id (Optional[str]): Conversation to continue; omit it to start
+                                    a new one (the new ID is in the response)
     """
     message: str
+    session_id: Optional[str] = Field(None, min_length=1, max_length=128)
 
 class ChatResponse(BaseModel):
     """
@@ -68,9 +107,45 @@ class ChatResponse(BaseModel):
     Attributes:
         answer (str): The AI-generated answer
         source_documents (list): List of source documents used to generate the answer
+        session_id (str): Conversation ID - send it with the next message
+        debug (Optional[dict]): Standalone query, retrieved chunk IDs/scores and
+                                per-stage timings in milliseconds
     """
     answer: str
     source_documents: list
+    session_id: str
+    debug: Optional[dict] = None
+
+class ClearRequest(BaseModel):
+    """
+    Request model for clear endpoint.
+    
+    Attributes:
+        session_id (str): Conversation to clear
+    """
+    session_id: str = Field(..., min_length=1, max_length=128)
+
+class BatchSearchRequest(BaseModel):
+    """
+    Request model for batch search endpoint.
+    
+    Attributes:
+        queries (List[str]): Search queries (up to 1000 per request)
+        k (int): Number of chunks to return per query
+    """
+    queries: List[str] = Field(..., max_length=1000)
+    k: int = Field(4, ge=1, le=100)
+
+class BatchSearchResponse(BaseModel):
+    """
+    Response model for batch search endpoint.
+    
+    Attributes:
+        results (list): One list per query (same order) of
+                        {"content", "metadata", "score"} hits, closest first
+                        (score = L2 distance, lower is more similar)
+    """
+    results: List[List[dict]]
 
 class StatusResponse(BaseModel):
     """
@@ -83,77 +158,232 @@ class StatusResponse(BaseModel):
     status: str
     message: str
 
+class JobResponse(BaseModel):
+    """
+    Response model for ingestion job endpoints.
+    
+    Attributes:
+        job_id (str): ID to poll with GET /jobs/{job_id}
+        source (str): Path of the PDF being ingested
+        status (str): "queued", "running", "succeeded" or "failed"
+        pages_done (int): Pages processed so far
+        total_pages (int): Pages in the PDF (0 until extraction starts)
+        chunks_done (int): Chunks embedded so far
+        stats (dict): Sync statistics once the job succeeded
+        error (str): Error message if the job failed
+    """
+    job_id: str
+    source: str
+    status: str
+    pages_done: int
+    total_pages: int
+    chunks_done: int
+    stats: Optional[Dict[str, int]] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
 
-@app.on_event("startup")
-async def startup_event():
+def initialize_services() -> None:
     """
-    Startup event handler - runs once when the FastAPI server starts.
+    Load the corpus and create the chatbot - the expensive part of startup.
     
     This function:
-    1. Initializes the vector database
-    2. Loads existing vector store OR creates new one from PDF
-    3. Initializes the chatbot with the vector database
+    1. Initializes the document corpus (embedding model + its cache)
+    2. Loads the saved shards (one vector store per PDF)
+    3. Syncs them with every PDF in data/sample_documents
+    4. Initializes the chatbot with the corpus
+    5. Warms up the retrieval path (one query through model and index)
+    
+    The shards are persistent - once created, they're saved to disk
+    and loaded on subsequent startups. New PDFs get a new shard, edited
+    PDFs only have their changed pages/chunks re-embedded, and shards of
+    deleted PDFs are dropped.
+    
+    Called by startup_event, or - in the multi-worker production mode - once
+    in the parent process before the workers are forked, so all workers
+    share the model and index memory (see src/prefork.py).
     
-    The vector store is persistent - once created, it's saved to disk
-    and loaded on subsequent startups (no re-ingestion needed).
+    The corpus and chatbot are only published (and readiness reported)
+    once everything is loaded, so requests never see a half-built corpus.
+    A breakdown of the startup time (per phase and per imported package)
+    is printed at the end.
     """
-    global vector_db, chatbot
+    global vector_db, chatbot, documents_dir, jobs_db, startup_state, startup_error
     
     try:
-        # Step 1: Initialize vector DB instance
-        # This creates the embedding model and text splitter
-        vector_db = VectorDB()
-        
-        # Step 2: Determine paths
+        # Step 1: Determine paths
         # Get the absolute path to project root (folder 1)
         # __file__ is the current file (main.py)
         # We go up two levels: src/ -> 1/ -> project root
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        vector_store_path = os.path.join(base_dir, "vector_store")  # Where to save/load vector store
+        vector_store_path = os.path.join(base_dir, "vector_store")  # One shard per PDF inside
+        embedding_cache_dir = os.path.join(base_dir, "embeddings")  # Persistent embedding cache
         sample_dir = os.path.join(base_dir, "data", "sample_documents")  # Where PDFs are stored
         
-        # Step 3: Find PDF file dynamically
-        # This allows us to work with any PDF in the sample_documents folder
-        pdf_files = [f for f in os.listdir(sample_dir) if f.endswith('.pdf')]
-        if not pdf_files:
-            raise FileNotFoundError(f"No PDF files found in {sample_dir}")
-        pdf_path = os.path.join(sample_dir, pdf_files[0])  # Use the first PDF found
+        # Step 2: Initialize the corpus
+        # This creates the embedding model (with its disk cache), shared by all shards
+        # VECTOR_INDEX_KIND picks the FAISS index: flat (default), ivf_flat, ivf_pq, hnsw
+        index_spec = IndexSpec(kind=os.getenv("VECTOR_INDEX_KIND", "flat"))
+        # EMBEDDING_BACKEND=onnx runs the embedding model as int8 ONNX (faster on CPU)
+        with startup_profile.phase("embedding model"):
+            corpus = CorpusDB(vector_store_path, embedding_cache_dir=embedding_cache_dir,
+                              index_spec=index_spec,
+                              embedding_backend=os.getenv("EMBEDDING_BACKEND", "torch"),
+                              onnx_dir=os.path.join(base_dir, "onnx_models"))
+        
+        # Step 3: Load existing shards (memory-mapped, fast)
+        with startup_profile.phase("load shards"):
+            corpus.load()
+        
+        # Step 4: Sync with every PDF in the sample_documents folder
+        # First run embeds everything (1-2 minutes for large PDFs); later runs
+        # only embed what changed
+        with startup_profile.phase("sync documents"):
+            stats = corpus.sync_directory(sample_dir)
+        for pdf_path, doc_stats in stats.items():
+            print(f"✓ {os.path.basename(pdf_path)}: {doc_stats['chunks_added']} chunks embedded, "
+                  f"{doc_stats['chunks_kept']} kept, {doc_stats['chunks_removed']} removed")
         
-        # Step 4: Check if vector store already exists
-        # FAISS saves two files: index.faiss (vector data) and index.pkl (metadata)
-        index_file = os.path.join(vector_store_path, "index.faiss")
-        pkl_file = os.path.join(vector_store_path, "index.pkl")
+        # Step 5: Initialize chatbot with the corpus
+        # The chatbot searches all documents at once
+        # RETRIEVAL_MODE: similarity (default, vectors only) or hybrid (vectors + BM25 keywords)
+        # RERANKER_MODEL: cross-encoder that re-ranks the retrieved chunks (off if unset)
+        reranker = None
+        if os.getenv("RERANKER_MODEL"):
+            with startup_profile.phase("reranker model"):
+                reranker = CrossEncoderReranker(
+                    os.getenv("RERANKER_MODEL"),
+                    score_threshold=float(os.getenv("RERANKER_THRESHOLD", "0.0")),
+                    max_latency_ms=float(os.getenv("RERANKER_BUDGET_MS", "300")),
+                )
+        # CONTEXT_SELECTION: off (default, the top chunks as retrieved) or mmr
+        # (diverse chunks by MMR, overlapping neighbours merged into one passage)
+        context_selector = ContextSelector() if os.getenv("CONTEXT_SELECTION", "off") == "mmr" else None
+        # REWRITE_MODEL: smaller model for the standalone-query rewrite, optionally
+        # served locally (REWRITE_BASE_URL, any OpenAI-compatible server)
+        rewrite_llm = None
+        if os.getenv("REWRITE_MODEL"):
+            from langchain_openai import ChatOpenAI
+            
+            rewrite_llm = ChatOpenAI(
+                model=os.getenv("REWRITE_MODEL"),
+                temperature=0.0,
+                base_url=os.getenv("REWRITE_BASE_URL") or None,
+                openai_api_key=os.getenv("REWRITE_API_KEY") or os.getenv("OPENAI_API_KEY"),
+            )
+        # Per-session histories: SESSION_MAX_MESSAGES per session, expired after
+        # SESSION_TTL_SECONDS idle
+        # SESSION_STORE: memory (default, one worker), sqlite (SESSION_DB file,
+        # shared by the workers of this machine) or redis (REDIS_URL, shared
+        # by workers on any machine)
+        session_backend = os.getenv("SESSION_STORE", "memory")
+        session_options = {
+            "max_messages": int(os.getenv("SESSION_MAX_MESSAGES", "20")),
+            "idle_ttl_seconds": float(os.getenv("SESSION_TTL_SECONDS", "1800")),
+        }
+        if session_backend == "memory":
+            # SESSION_MEMORY_MB for all sessions together
+            session_options["max_total_bytes"] = int(float(os.getenv("SESSION_MEMORY_MB", "32")) * 1024 * 1024)
+        elif session_backend == "sqlite":
+            session_options["path"] = os.getenv("SESSION_DB", os.path.join(base_dir, "sessions.db"))
+        elif session_backend == "redis":
+            session_options["url"] = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        session_store = create_session_store(session_backend, **session_options)
+        with startup_profile.phase("chatbot"):
+            # PROMPT_TOKEN_BUDGET: tokens for the whole prompt; retrieved context
+            # fills it first, then the history (newest message first)
+            prompt_packer = PromptPacker(max_prompt_tokens=int(os.getenv("PROMPT_TOKEN_BUDGET", "3000")))
+            bot = ConversationBot(
+                corpus, search_type=os.getenv("RETRIEVAL_MODE", "similarity"), reranker=reranker,
+                context_selector=context_selector,
+                rewrite_gate=RewriteGate(enabled=os.getenv("REWRITE_GATE", "on") != "off"),
+                rewrite_llm=rewrite_llm, session_store=session_store, prompt_packer=prompt_packer,
+            )
         
-        if os.path.exists(index_file) and os.path.exists(pkl_file):
-            # Vector store exists - load it (fast, no re-ingestion)
-            print("Loading existing vector store from disk...")
-            try:
-                vector_db.load(vector_store_path)
-                print(f"✓ Vector store loaded successfully from {vector_store_path}")
-            except Exception as e:
-                # If loading fails, create a new one
-                print(f"Error loading vector store: {e}")
-                print("Creating new vector store from PDF...")
-                vector_db.create_from_pdf(pdf_path)
-                vector_db.save(vector_store_path)
-                print(f"✓ Vector store created and saved to {vector_store_path}")
-        else:
-            # Vector store doesn't exist - create it from PDF
-            # This is slow the first time (takes 1-2 minutes for large PDFs)
-            print("Vector store not found. Creating from PDF (this may take a minute)...")
-            vector_db.create_from_pdf(pdf_path)  # Process PDF and create embeddings
-            vector_db.save(vector_store_path)  # Save to disk for future use
-            print(f"✓ Vector store created and saved to {vector_store_path}")
+        # Step 6: Warm up - the first query pays for lazy initialization
+        # (first model forward pass, page faults on the memory-mapped index),
+        # so a real user's first question doesn't
+        with startup_profile.phase("warm up"):
+            bot.warm_up()
         
-        # Step 5: Initialize chatbot with the vector database
-        # The chatbot uses the vector DB to find relevant documents
-        chatbot = ConversationBot(vector_db)
-        print("FastAPI server initialized successfully!")
+        # Publish: from here on requests are served
+        # Uploads are saved next to the sample PDFs, so they are synced on restart too
+        # JOBS_DB: ingestion job status, shared by the workers of this machine
+        vector_db, chatbot, documents_dir = corpus, bot, sample_dir
+        jobs_db = os.getenv("JOBS_DB", os.path.join(base_dir, "jobs.db"))
+        startup_state = "ready"
         
     except Exception as e:
         # If anything fails during startup, log the error and stop the server
+        # (when loading in the background, the health probes report it instead)
+        startup_state, startup_error = "failed", str(e)
         print(f"Error during startup: {str(e)}")
         raise  # Re-raise to stop server startup
+    finally:
+        startup_profile.stop()
+        print(startup_profile.format())
+
+
+@app.on_event("startup")
+async def startup_event():
+    """
+    Startup event handler - runs once when the FastAPI server (or a worker) starts.
+    
+    Initializes the corpus and chatbot in the background (unless the
+    multi-worker launcher already did in the parent process), then this
+    process's background ingestion queue.
+    
+    A worker forked from the parent first loads the documents ingested
+    since the parent's preload (by other workers, or before a recycle).
+    
+    Loading in the background means the server accepts connections right
+    away: /health/live answers while the model and index load, and
+    /health/ready (and every endpoint that needs them) returns 503 until
+    they are ready.
+    """
+    global _startup_task
+    
+    if chatbot is None:
+        _startup_task = asyncio.create_task(_initialize_in_background())
+    else:
+        await refresh_corpus()
+        _start_ingestion_queue()
+
+
+async def _initialize_in_background() -> None:
+    """Run initialize_services() in a thread, so the event loop keeps answering probes."""
+    try:
+        await asyncio.to_thread(initialize_services)
+    except Exception:
+        # The server stays up so /health/live can report the failure
+        traceback.print_exc()
+        return
+    _start_ingestion_queue()
+
+
+def _start_ingestion_queue() -> None:
+    """Create this process's background ingestion queue for uploaded documents."""
+    global ingestion_jobs
+    
+    # Step 7: Background ingestion queue for uploaded documents
+    # Created per process - its worker thread wouldn't survive a fork; the
+    # job database is shared, so any worker can report any job
+    ingestion_jobs = IngestionJobManager(vector_db, jobs_db)
+    print("FastAPI server initialized successfully!")
+
+
+async def refresh_corpus() -> None:
+    """
+    Load the documents other workers ingested or dropped since this one last looked.
+    
+    Every worker holds its own copy of the corpus; uploads are saved to the
+    shared vector_store/ directory. Checking costs one small file read;
+    loading a new shard (memory-mapped) runs in a thread, off the event loop.
+    """
+    if vector_db is not None:
+        await run_in_threadpool(vector_db.refresh)
 
 
 @app.get("/")
@@ -176,12 +406,87 @@ async def health():
     and the vector database is loaded.
     
     Returns:
-        StatusResponse: Status information about the API
+        StatusResponse: Status information about the API (HTTP 503 while
+                        the model and index are still loading, or if
+                        startup failed)
     """
-    return StatusResponse(
-        status="healthy",
-        message="API is running and vector DB is loaded"
-    )
+    ready, _ = readiness_checks()
+    if ready:
+        return StatusResponse(
+            status="healthy",
+            message="API is running and vector DB is loaded"
+        )
+    message = (f"Startup failed: {startup_error}" if startup_state == "failed"
+               else "API is running, still loading the model and vector DB")
+    return JSONResponse(status_code=503, content={"status": startup_state, "message": message})
+
+
+@app.get("/health/live", response_model=StatusResponse)
+async def liveness():
+    """
+    Liveness probe: the process is up and its event loop responds.
+    
+    Answers (200) during startup too - loading the model and index can
+    take minutes on a first run, and restarting the process wouldn't make
+    it faster. Only a failed startup is reported (503), since a restart
+    is the only way out of it.
+    
+    Returns:
+        StatusResponse: "alive", or HTTP 503 if startup failed
+    """
+    if startup_state == "failed":
+        return JSONResponse(status_code=503,
+                            content={"status": "failed", "message": f"Startup failed: {startup_error}"})
+    return StatusResponse(status="alive", message="API process is running")
+
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Readiness probe: this process can answer questions right now.
+    
+    Ready once the embedding model is loaded, the index holds vectors, the
+    chatbot exists and the retrieval path has been warmed up. Send traffic
+    only when this returns 200.
+    
+    Returns:
+        dict: status ("ready", "starting" or "failed"), the individual
+              checks and the startup time breakdown (HTTP 503 unless ready)
+    """
+    ready, checks = readiness_checks()
+    content = {
+        "status": "ready" if ready else startup_state,
+        "checks": checks,
+        "startup": startup_profile.report(),
+    }
+    if startup_error:
+        content["error"] = startup_error
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
+
+def readiness_checks() -> Tuple[bool, dict]:
+    """
+    Check the actual state of the model, index and chatbot.
+    
+    Returns:
+        Tuple[bool, dict]: (ready, checks) - checks holds the startup state,
+            whether the embedding model is loaded (and its backend), how many
+            documents and vectors the index holds, and whether the chatbot exists
+    """
+    corpus, bot = vector_db, chatbot
+    embeddings = getattr(corpus, "embeddings", None)
+    model_loaded = embeddings is not None and embeddings.model is not None
+    documents = corpus.documents() if corpus is not None else []
+    vectors = sum(document["chunks"] for document in documents)
+    checks = {
+        "startup": startup_state,
+        "embedding_model": {"loaded": model_loaded,
+                            "backend": embeddings.backend if model_loaded else None},
+        "index": {"documents": len(documents), "vectors": vectors},
+        "chatbot": bot is not None,
+    }
+    ready = startup_state == "ready" and model_loaded and vectors > 0 and bot is not None
+    return ready, checks
 
 
 @app.post("/chat", response_model=ChatResponse)
@@ -219,29 +524,186 @@ async def chat(request: ChatRequest):
     try:
         # Process the message through the chatbot
         # This handles all the RAG logic, conversation memory, etc.
-        result = chatbot.chat(request.message)
+        # achat never blocks the event loop: other requests (and /health)
+        # are served while this one waits for OpenAI
+        session_id = request.session_id or new_session_id()
+        await refresh_corpus()  # Documents uploaded through other workers
+        result = await chatbot.achat(request.message, session_id)
+        metrics.observe_chat("chat", result["debug"])
         
         # Return formatted response
         return ChatResponse(
             answer=result["answer"],  # The AI-generated answer
-            source_documents=result["source_documents"]  # Documents used (empty for casual chat)
+            source_documents=result["source_documents"],  # Documents used (empty for casual chat)
+            session_id=session_id,  # Client sends it back to continue the conversation
+            debug=result.get("debug")  # Stage timings, retrieved chunks
         )
     except Exception as e:
         # If anything goes wrong, return a 500 error with details
+        metrics.observe_error("chat")
         raise HTTPException(
             status_code=500, 
             detail=f"Error processing chat: {str(e)}"
         )
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint (Server-Sent Events).
+    
+    Same processing as /chat, but the answer is sent token by token while
+    the LLM generates it, so the first words appear long before the full
+    answer is done.
+    
+    Event stream (each event's data is JSON):
+    - event: token    data: "<piece of answer text>"   (many)
+    - event: sources  data: {"source_documents": [...], "session_id": "...", "debug": {...}}
+                                                                       (once, last)
+    - event: error    data: {"detail": "..."}   (instead of sources, if processing fails)
+    
+    Args:
+        request (ChatRequest): Request containing the user's message
+        
+    Returns:
+        StreamingResponse: text/event-stream response
+        
+    Raises:
+        HTTPException: If chatbot is not initialized
+    """
+    if chatbot is None:
+        raise HTTPException(
+            status_code=503, 
+            detail="Chatbot not initialized. Server may still be starting up."
+        )
+    
+    session_id = request.session_id or new_session_id()
+    
+    async def events():
+        try:
+            await refresh_corpus()  # Documents uploaded through other workers
+            async for event in chatbot.astream_chat(request.message, session_id):
+                if event["event"] == "sources":
+                    event["data"]["session_id"] = session_id
+                    metrics.observe_chat("chat_stream", event["data"]["debug"])
+                yield _sse(event["event"], event["data"])
+        except Exception as e:
+            # Headers are already sent - report the error in the stream
+            metrics.observe_error("chat_stream")
+            yield _sse("error", {"detail": f"Error processing chat: {str(e)}"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Don't let proxies buffer the stream (that would defeat streaming)
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-ID": session_id},
+    )
+
+
+def new_session_id() -> str:
+    """Random ID for a new conversation."""
+    return uuid.uuid4().hex
+
+
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Event (data as JSON, so newlines in tokens are safe)."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(request: BatchSearchRequest):
+    """
+    Similarity search for many queries in one request.
+    
+    Meant for offline jobs (evaluation, re-ranking): the queries are
+    embedded in one batched forward pass and searched with one FAISS
+    matrix search, instead of one HTTP call and one search per query.
+    
+    Args:
+        request (BatchSearchRequest): Queries and k
+        
+    Returns:
+        BatchSearchResponse: Per-query hits with scores
+        
+    Raises:
+        HTTPException: If the vector DB is not initialized or search fails
+    """
+    if vector_db is None:
+        raise HTTPException(status_code=503, detail="Vector DB not initialized")
+    
+    try:
+        await refresh_corpus()
+        # Embedding + FAISS are CPU-bound: run them in a thread so the
+        # event loop keeps serving chat requests
+        results = await run_in_threadpool(vector_db.similarity_search_batch, request.queries, request.k)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching: {str(e)}")
+    
+    return BatchSearchResponse(results=[
+        [{"content": doc.page_content, "metadata": doc.metadata, "score": score} for doc, score in hits]
+        for hits in results
+    ])
+
+
+@app.get("/stats")
+async def stats():
+    """
+    Cache and session statistics (answer cache, query embedding cache,
+    rewrite gate, sessions, re-ranker).
+    
+    Returns:
+        dict: Hits, misses, hit rates, evictions and sizes per cache; active
+              sessions and session evictions
+    """
+    if chatbot is None:
+        raise HTTPException(status_code=503, detail="Chatbot not initialized")
+    return chatbot.cache_stats()
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Prometheus metrics, in the text exposition format.
+    
+    - rag_requests_total{endpoint, status}: chat requests, ok or error
+    - rag_route_total{route}: document questions (rag) vs casual chat
+    - rag_rewrite_decisions_total{reason}: why the standalone-query rewrite
+      ran or was skipped
+    - rag_answer_cache_lookups_total{result}: answer cache hits and misses
+    - rag_stage_duration_seconds{stage}: latency histogram per pipeline stage
+      (rewrite, embed, cache_lookup, retrieval with its parts
+      faiss_search/bm25_search/fusion/rerank/select, generation,
+      first_token, total)
+    - Gauges: rag_ready, rag_index_documents, rag_index_vectors,
+      rag_sessions_active, rag_cache_hit_ratio{cache}
+    
+    Counters and histograms cover all workers. Gauges are read by the
+    worker answering the scrape: the index gauges after it loads what
+    other workers ingested (so every worker reports the shared corpus),
+    the cache hit ratios from its own caches.
+    
+    Returns:
+        Response: text/plain exposition
+    """
+    await refresh_corpus()
+    ready, _ = readiness_checks()
+    # Gauges read the session store and corpus - off the event loop
+    text = await run_in_threadpool(metrics.render, vector_db, chatbot, ready)
+    return Response(content=text, media_type=CONTENT_TYPE)
+
+
 @app.post("/clear", response_model=StatusResponse)
-async def clear_history():
+async def clear_history(request: ClearRequest):
     """
     Clear conversation history endpoint.
     
-    This resets the chatbot's conversation memory, allowing users to
+    This resets one session's conversation memory, allowing the user to
     start a fresh conversation without context from previous messages.
+    Other users' sessions are not affected.
     
+    Args:
+        request (ClearRequest): Request containing the session ID
+        
     Returns:
         StatusResponse: Confirmation that history was cleared
         
@@ -256,7 +718,8 @@ async def clear_history():
     
     try:
         # Clear the conversation history in the chatbot
-        chatbot.clear_history()
+        # (a session store write - off the event loop)
+        await run_in_threadpool(chatbot.clear_history, request.session_id)
         return StatusResponse(
             status="success",
             message="Conversation history cleared"
@@ -268,6 +731,105 @@ async def clear_history():
         )
 
 
+@app.post("/documents", response_model=JobResponse, status_code=202)
+async def upload_document(file: UploadFile = File(...)):
+    """
+    Upload a PDF and ingest it in the background.
+    
+    The file is saved to the documents folder and a background job is
+    queued to (re-)ingest it. The request returns immediately with the job;
+    poll GET /jobs/{job_id} for progress. Chat keeps using the current
+    index until the job has finished, then the new document is swapped in
+    (other workers pick it up on their next request, see refresh_corpus).
+    
+    Uploading a file with the same name as an existing document replaces
+    it (only its changed pages are re-embedded).
+    
+    Args:
+        file (UploadFile): The PDF file (multipart/form-data field "file")
+        
+    Returns:
+        JobResponse: The queued ingestion job
+        
+    Raises:
+        HTTPException: If the server isn't ready or the file isn't a PDF
+    """
+    if ingestion_jobs is None:
+        raise HTTPException(status_code=503, detail="Server is still starting up")
+    
+    # Keep only the file name - never let the client choose the directory
+    filename = os.path.basename(file.filename or "")
+    if not filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files can be uploaded")
+    pdf_path = os.path.join(documents_dir, filename)
+    
+    def save_upload():
+        # Write to a temp file first: a half-uploaded PDF never replaces a good one
+        tmp_path = pdf_path + ".part"
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(file.file, f)
+        os.replace(tmp_path, pdf_path)
+    
+    try:
+        # File I/O runs in a thread, so the event loop keeps serving chat
+        await run_in_threadpool(save_upload)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error saving upload: {str(e)}")
+    
+    job = ingestion_jobs.submit(pdf_path)
+    return JobResponse(**job.to_dict())
+
+
+@app.get("/documents")
+async def list_documents():
+    """
+    List the documents in the corpus (including those uploaded through other workers).
+    
+    Returns:
+        dict: Documents (source, shard, pages, chunks)
+    """
+    if vector_db is None:
+        raise HTTPException(status_code=503, detail="Server is still starting up")
+    await refresh_corpus()
+    return {"documents": vector_db.documents()}
+
+
+@app.get("/jobs", response_model=List[JobResponse])
+async def list_jobs():
+    """
+    List recent ingestion jobs, newest first.
+    
+    Returns:
+        List[JobResponse]: Jobs
+    """
+    if ingestion_jobs is None:
+        raise HTTPException(status_code=503, detail="Server is still starting up")
+    return [JobResponse(**job.to_dict()) for job in ingestion_jobs.list()]
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    Poll the status and progress of an ingestion job.
+    
+    Jobs are kept in the shared job database, so any worker can answer
+    for a job another worker runs.
+    
+    Args:
+        job_id (str): Job ID returned by POST /documents
+        
+    Returns:
+        JobResponse: Current job status and progress
+        
+    Raises:
+        HTTPException: 404 if the job is unknown
+    """
+    job = ingestion_jobs.get(job_id) if ingestion_jobs is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return JobResponse(**job.to_dict())
+
+
 # Entry point for running the server directly (not recommended - use run_server.py instead)
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,347 @@
+"""
+Metrics Module - Prometheus Metrics for the RAG Service
+
+This module handles:
+1. Counters and histograms in the Prometheus text format (no client
+   library needed)
+2. Keeping them in shared memory, so every pre-forked worker adds to the
+   same numbers and any worker can answer a scrape
+3. The service's own metrics: requests, routing and rewrite decisions,
+   answer cache hits, per-stage latency histograms, prompt size
+   histograms, and gauges for index size, active sessions and cache hit
+   rates
+
+Why shared memory?
+- With several workers (run_server.py --workers N), a scrape lands on a
+  random worker; per-process counters would jump back and forth between
+  the workers' values and look like constant resets
+- The values live in one anonymous shared mapping created at import -
+  before the pre-fork launcher forks - so all workers (and their
+  replacements) update the same slots, and counters never go backwards
+  while the launcher runs
+
+Gauges are computed at scrape time by the worker that serves the scrape.
+Index size and sessions are the same for every worker: the caller brings
+the corpus up to date with the shared vector_store/ first (see
+CorpusDB.refresh), and sessions come from the shared session store
+(SESSION_STORE=sqlite or redis). Cache hit rates are that worker's own
+caches - the answer cache counter is service-wide.
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import bisect
+import itertools
+import mmap
+import multiprocessing
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds: from a cached embedding lookup (ms) to a slow
+# LLM answer (tens of seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prompt size buckets in tokens (the default prompt budget is 3000)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 1536, 2048, 3072, 4096, 8192, 16384)
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class SharedValues:
+    """
+    Fixed number of float64 slots in anonymous shared memory.
+
+    Forked child processes see (and update) the same memory. Updates take a
+    process-shared lock, so concurrent increments from several workers and
+    threads are never lost.
+
+    Attributes:
+        capacity (int): Number of slots
+    """
+
+    def __init__(self, capacity: int = 4096):
+        """
+        Args:
+            capacity (int): Number of slots (8 bytes each; default: 4096)
+        """
+        self.capacity = capacity
+        self._buffer = mmap.mmap(-1, capacity * 8)  # Anonymous, shared with forked children
+        self._values = memoryview(self._buffer).cast("d")
+        self._lock = multiprocessing.Lock()
+        self._next = 0
+
+    def allocate(self, count: int) -> int:
+        """
+        Reserve `count` consecutive slots.
+
+        Returns:
+            int: Index of the first slot
+
+        Raises:
+            ValueError: If the capacity is exhausted
+        """
+        if self._next + count > self.capacity:
+            raise ValueError(f"Metrics need more than {self.capacity} slots")
+        start = self._next
+        self._next += count
+        return start
+
+    def add(self, updates: Iterable[Tuple[int, float]]) -> None:
+        """Add values to slots, atomically as a group."""
+        with self._lock:
+            for slot, amount in updates:
+                self._values[slot] += amount
+
+    def read(self, start: int, count: int) -> List[float]:
+        """Current values of `count` slots starting at `start`."""
+        with self._lock:
+            return list(self._values[start:start + count])
+
+
+class _Metric:
+    """
+    A metric with a fixed set of label values, stored in SharedValues.
+
+    Every combination of label values gets its own block of slots, so the
+    layout is fixed when the metric is created (before any fork).
+    """
+
+    kind = ""
+
+    def __init__(self, values: SharedValues, name: str, documentation: str,
+                 labels: Optional[Dict[str, Sequence[str]]] = None, slots_per_series: int = 1):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = list(labels or {})
+        combinations = list(itertools.product(*(labels or {}).values()))
+        self._series = {combination: i for i, combination in enumerate(combinations)}
+        self._values = values
+        self._slots_per_series = slots_per_series
+        self._start = values.allocate(len(combinations) * slots_per_series)
+
+    def _offset(self, labels: Dict[str, str]) -> int:
+        """First slot of the series with these label values."""
+        key = tuple(str(labels[name]) for name in self.label_names)
+        if key not in self._series:
+            raise ValueError(f"Unknown labels for {self.name}: {labels}")
+        return self._start + self._series[key] * self._slots_per_series
+
+    def _series_values(self) -> Iterator[Tuple[Tuple[str, ...], List[float]]]:
+        """(label values, slot values) per series."""
+        raw = self._values.read(self._start, len(self._series) * self._slots_per_series)
+        for key, index in self._series.items():
+            start = index * self._slots_per_series
+            yield key, raw[start:start + self._slots_per_series]
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{name}="{value}"' for name, value in zip(self.label_names, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> List[str]:
+        """Exposition lines, header included."""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter, e.g. requests served."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Add `amount` to the series with these label values."""
+        self._values.add([(self._offset(labels), amount)])
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, (value,) in self._series_values():
+            lines.append(f"{self.name}{self._label_text(key)} {_format(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values (latencies) over fixed buckets.
+
+    Per series: one count per bucket (plus +Inf), then the sum of all
+    observations.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, values: SharedValues, name: str, documentation: str,
+                 labels: Optional[Dict[str, Sequence[str]]] = None,
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = sorted(buckets)
+        super().__init__(values, name, documentation, labels, slots_per_series=len(self.buckets) + 2)
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation in the series with these label values."""
+        offset = self._offset(labels)
+        bucket = bisect.bisect_left(self.buckets, value)  # le: value <= bound
+        self._values.add([(offset + bucket, 1.0), (offset + len(self.buckets) + 1, value)])
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, slots in self._series_values():
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + [float("inf")], slots):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_format(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_text(key, le)} {_format(cumulative)}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_format(slots[-1])}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {_format(cumulative)}")
+        return lines
+
+
+def gauge(name: str, documentation: str, values: Dict[Tuple[str, ...], float],
+          label_names: Sequence[str] = ()) -> List[str]:
+    """
+    Exposition lines of a gauge read at scrape time.
+
+    Args:
+        name (str): Metric name
+        documentation (str): HELP text
+        values (Dict[Tuple[str, ...], float]): Label values → value, one
+            series each (key () for a gauge without labels)
+        label_names (Sequence[str]): Label names, in key order
+
+    Returns:
+        List[str]: Exposition lines, header included
+    """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    for key, value in values.items():
+        labels = ",".join(f'{label}="{text}"' for label, text in zip(label_names, key))
+        lines.append(f"{name}{'{' + labels + '}' if labels else ''} {_format(value)}")
+    return lines
+
+
+def _format(value: float) -> str:
+    """Number in exposition format (integers without a trailing .0)."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# Label values of the service metrics (fixed: the layout is allocated up front)
+ENDPOINTS = ("chat", "chat_stream")
+ROUTES = ("rag", "casual")
+REWRITE_REASONS = ("no_history", "self_contained", "reference", "ellipsis", "short", "gate_disabled")
+# RAGRequest timings; faiss_search/bm25_search/fusion/rerank/select are the
+# parts of retrieval (bm25_search and fusion in hybrid mode only)
+STAGES = ("rewrite", "embed", "cache_lookup", "retrieval", "faiss_search", "bm25_search", "fusion",
+          "rerank", "select", "generation", "first_token", "total")
+# Parts of the answer prompt (RAGRequest.prompt_tokens)
+PROMPT_PARTS = ("context", "history", "total")
+
+
+class RAGMetrics:
+    """
+    The RAG service's metrics.
+
+    Counters and histograms are recorded per chat request (from the
+    request's debug info); gauges are read from the corpus and chatbot
+    when /metrics is scraped.
+
+    Attributes:
+        requests (Counter): Chat requests by endpoint and status (ok/error)
+        routes (Counter): Messages by route (rag/casual)
+        rewrites (Counter): Rewrite decisions of document questions by reason
+        answer_cache (Counter): Answer cache lookups by result (hit/miss)
+        stage_seconds (Histogram): Latency per pipeline stage
+        prompt_tokens (Histogram): Tokens per part of the generated prompts
+    """
+
+    def __init__(self, values: Optional[SharedValues] = None):
+        """
+        Args:
+            values (Optional[SharedValues]): Where the values are kept
+                (default: a new shared mapping)
+        """
+        values = values or SharedValues()
+        self.requests = Counter(values, "rag_requests_total",
+                                "Chat requests by endpoint and outcome.",
+                                {"endpoint": ENDPOINTS, "status": ("ok", "error")})
+        self.routes = Counter(values, "rag_route_total",
+                              "Chat messages by route: document question (rag) or casual chat.",
+                              {"route": ROUTES})
+        self.rewrites = Counter(values, "rag_rewrite_decisions_total",
+                                "Standalone-query rewrite decisions for document questions, by reason "
+                                "(no_history and self_contained skip the LLM call).",
+                                {"reason": REWRITE_REASONS})
+        self.answer_cache = Counter(values, "rag_answer_cache_lookups_total",
+                                    "Answer cache lookups of document questions, by result.",
+                                    {"result": ("hit", "miss")})
+        self.stage_seconds = Histogram(values, "rag_stage_duration_seconds",
+                                       "Time spent per pipeline stage (faiss_search, bm25_search, fusion, "
+                                       "rerank and select are the parts of retrieval; first_token is "
+                                       "streaming only).",
+                                       {"stage": STAGES})
+        self.prompt_tokens = Histogram(values, "rag_prompt_tokens",
+                                       "Tokens per part of the prompts sent for generation (context, "
+                                       "history and the whole prompt; cached answers send none).",
+                                       {"part": PROMPT_PARTS}, buckets=TOKEN_BUCKETS)
+
+    def observe_chat(self, endpoint: str, debug: dict) -> None:
+        """
+        Record a served chat request.
+
+        Args:
+            endpoint (str): "chat" or "chat_stream"
+            debug (dict): The response's debug info (RAGRequest.debug_info)
+        """
+        self.requests.inc(endpoint=endpoint, status="ok")
+        self.routes.inc(route=debug["route"])
+        if debug["route"] == "rag":
+            if debug.get("rewrite") in REWRITE_REASONS:
+                self.rewrites.inc(reason=debug["rewrite"])
+            self.answer_cache.inc(result="hit" if debug.get("cached") else "miss")
+        for stage, ms in debug.get("timings_ms", {}).items():
+            if stage in STAGES:
+                self.stage_seconds.observe(ms / 1000, stage=stage)
+        for part, tokens in debug.get("prompt_tokens", {}).items():
+            if part in PROMPT_PARTS:
+                self.prompt_tokens.observe(tokens, part=part)
+
+    def observe_error(self, endpoint: str) -> None:
+        """Record a chat request that failed."""
+        self.requests.inc(endpoint=endpoint, status="error")
+
+    def render(self, corpus=None, chatbot=None, ready: bool = False) -> str:
+        """
+        All metrics in the Prometheus text format.
+
+        Args:
+            corpus: The document corpus, refreshed from disk by the caller
+                (index size gauges; None while starting)
+            chatbot: The chatbot (session and cache gauges; None while starting)
+            ready (bool): Whether this process serves traffic
+
+        Returns:
+            str: Exposition text (serve with CONTENT_TYPE)
+        """
+        lines = []
+        for metric in (self.requests, self.routes, self.rewrites, self.answer_cache, self.stage_seconds,
+                       self.prompt_tokens):
+            lines += metric.render()
+
+        lines += gauge("rag_ready", "1 if this process is loaded, warmed up and serving.", {(): int(ready)})
+        if corpus is not None:
+            documents = corpus.documents()
+            lines += gauge("rag_index_documents", "Documents in the index (shared by all workers).", {(): len(documents)})
+            lines += gauge("rag_index_vectors", "Chunk vectors in the index (shared by all workers).",
+                           {(): sum(document["chunks"] for document in documents)})
+        if chatbot is not None:
+            stats = chatbot.cache_stats()
+            lines += gauge("rag_sessions_active", "Conversations with a non-expired history.",
+                           {(): stats["sessions"]["active_sessions"]})
+            hit_rates = {("answer",): stats["answer_cache"]["hit_rate"],
+                         ("query_embedding",): stats["query_embedding_cache"]["hit_rate"]}
+            if "reranker" in stats:
+                reranker = stats["reranker"]
+                pairs = reranker["pairs_scored"] + reranker["cache_hits"]
+                hit_rates[("reranker",)] = reranker["cache_hits"] / pairs if pairs else 0.0
+            lines += gauge("rag_cache_hit_ratio",
+                           "Hit rate of this process's caches since it started.",
+                           hit_rates, ["cache"])
+        return "\n".join(lines) + "\n"
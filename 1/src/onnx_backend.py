@@ -0,0 +1,212 @@
+"""
+ONNX Backend Module - Quantized ONNX Runtime Embeddings on CPU
+
+This module handles:
+1. Exporting a sentence-transformers model to ONNX (once, cached on disk)
+2. Quantizing the exported weights to int8 (dynamic quantization)
+3. Encoding texts with ONNX Runtime instead of PyTorch
+4. Checking that the ONNX vectors match the PyTorch vectors
+
+Why ONNX Runtime?
+- On CPU-only machines PyTorch is the slowest part of ingestion and adds
+  tens of milliseconds to every query
+- int8 weights are 4x smaller and use the CPU's integer instructions
+- ONNX Runtime fuses the transformer layers into fewer, faster kernels
+
+Exported files (inside the export directory):
+- <model slug>/model.onnx       float32 export of the transformer
+- <model slug>/model.int8.onnx  int8 dynamically quantized copy (used at runtime)
+
+The pooling step (mean over tokens, then L2 normalization) is done in
+numpy, exactly like the sentence-transformers Pooling/Normalize modules.
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+
+# ONNX Runtime is optional - only needed when backend="onnx"
+try:
+    import onnxruntime
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+except ImportError:  # pragma: no cover - depends on the environment
+    onnxruntime = None
+
+# Texts used for the parity check when none are given
+PARITY_TEXTS = [
+    "What is this book about?",
+    "How should a product manager prioritize features?",
+    "Summarize the chapter on behavioral interview questions.",
+    "PM",
+    "The estimation question asks how many piano tuners work in Chicago, "
+    "and the interviewer mostly cares about how you structure the problem.",
+]
+
+
+class OnnxEncoder:
+    """
+    Drop-in replacement for SentenceTransformer.encode() backed by ONNX Runtime.
+
+    Only the parts of the SentenceTransformer interface that
+    HuggingFaceEmbeddingsWrapper uses are provided (encode,
+    max_seq_length, get_sentence_embedding_dimension).
+
+    Attributes:
+        model_path (str): Path of the ONNX file being run
+        quantized (bool): True if the int8 model is used
+        max_seq_length (int): Longer texts are truncated to this many tokens
+        session (onnxruntime.InferenceSession): The ONNX Runtime session
+    """
+
+    def __init__(self, model, model_name: str, export_dir: str = "onnx_models",
+                 quantize: bool = True, num_threads: Optional[int] = None):
+        """
+        Export (if not done before) and load the ONNX version of a model.
+
+        Args:
+            model (SentenceTransformer): The PyTorch model (source of the
+                weights, tokenizer and pooling settings)
+            model_name (str): HuggingFace model name (names the export directory)
+            export_dir (str): Where exported models are kept (default: "onnx_models")
+            quantize (bool): Run the int8 quantized model (default: True)
+            num_threads (Optional[int]): ONNX Runtime intra-op threads
+                Default: ONNX Runtime's choice (number of physical cores)
+
+        Raises:
+            ImportError: If onnxruntime is not installed
+        """
+        if onnxruntime is None:
+            raise ImportError("The ONNX backend needs onnxruntime: pip install onnxruntime onnx")
+
+        self.tokenizer = model.tokenizer
+        self.max_seq_length = model.max_seq_length
+        self._dimension = model.get_sentence_embedding_dimension()
+        # all-MiniLM-L6-v2 ends with a Normalize module; other models may not
+        self._normalize = any(type(module).__name__ == "Normalize" for module in model)
+
+        slug = re.sub(r"[^a-zA-Z0-9]+", "-", model_name).strip("-").lower()
+        directory = os.path.join(export_dir, slug)
+        fp32_path = os.path.join(directory, "model.onnx")
+        if not os.path.exists(fp32_path):
+            self._export(model, fp32_path)
+
+        self.quantized = quantize
+        self.model_path = fp32_path
+        if quantize:
+            self.model_path = os.path.join(directory, "model.int8.onnx")
+            if not os.path.exists(self.model_path):
+                quantize_dynamic(fp32_path, self.model_path, weight_type=QuantType.QInt8)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            self.model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = [node.name for node in self.session.get_inputs()]
+
+    def _export(self, model, path: str) -> None:
+        """
+        Export the transformer of a SentenceTransformer to ONNX.
+
+        Batch size and sequence length are dynamic, so one file serves
+        every batch shape.
+
+        Args:
+            model (SentenceTransformer): The PyTorch model
+            path (str): Destination .onnx file
+        """
+        import torch
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        transformer = model[0].auto_model.eval()
+        sample = self.tokenizer(["export sample"], return_tensors="pt")
+        input_names = list(sample.keys())
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        # Write to a temp file first, so a crash never leaves a broken model.onnx
+        tmp_path = path + ".tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                (dict(sample),),
+                tmp_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+        os.replace(tmp_path, path)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Number of dimensions in each embedding vector."""
+        return self._dimension
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """
+        Encode texts into sentence embeddings.
+
+        Accepts (and ignores) SentenceTransformer.encode() keyword arguments
+        like show_progress_bar and convert_to_numpy.
+
+        Args:
+            texts (List[str]): Texts to encode
+            batch_size (int): Texts per ONNX Runtime call (default: 32)
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension)
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        vectors = np.empty((len(texts), self._dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            encoded = self.tokenizer(batch, padding=True, truncation=True,
+                                     max_length=self.max_seq_length, return_tensors="np")
+            feed = {name: encoded[name].astype(np.int64) for name in self._input_names}
+            token_vectors = self.session.run(None, feed)[0]
+
+            # Mean pooling over real (non-padding) tokens
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_vectors * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self._normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            vectors[start:start + len(batch)] = pooled
+        return vectors
+
+
+def check_parity(reference, candidate, texts: Optional[List[str]] = None,
+                 min_cosine: float = 0.98) -> dict:
+    """
+    Compare the vectors of two encoders on the same texts.
+
+    Int8 quantization changes vectors slightly; what matters for retrieval
+    is that each vector still points in (almost) the same direction.
+
+    Args:
+        reference: Encoder with an encode() method (the PyTorch model)
+        candidate: Encoder to check (e.g. OnnxEncoder)
+        texts (Optional[List[str]]): Texts to compare on (default: PARITY_TEXTS)
+        min_cosine (float): Lowest acceptable per-text cosine similarity
+
+    Returns:
+        dict: min_cosine, mean_cosine, max_abs_diff and passed (bool)
+    """
+    texts = texts or PARITY_TEXTS
+    expected = np.asarray(reference.encode(texts, show_progress_bar=False), dtype=np.float32)
+    actual = np.asarray(candidate.encode(texts, show_progress_bar=False), dtype=np.float32)
+
+    norms = np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    cosines = (expected * actual).sum(axis=1) / np.clip(norms, 1e-12, None)
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+        "passed": bool(cosines.min() >= min_cosine),
+    }
@@ -0,0 +1,159 @@
+"""
+PDF Page Extraction Module - Parallel, Streaming Text Extraction
+
+This module handles:
+1. Counting the pages of a PDF without extracting any text
+2. Extracting the text of a range of pages (run inside worker processes)
+3. Streaming pages back in order while only a few ranges are in flight
+4. Building the metadata of a page, the same for every ingestion path
+
+Why a separate module?
+- Worker processes import this module to run extract_pages()
+- It only depends on pypdf, so workers start quickly and never load
+  torch, sentence-transformers or FAISS
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def count_pages(pdf_path: str) -> int:
+    """
+    Count the pages of a PDF file.
+
+    Only the page tree is read, so this is fast even for very large files.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+
+    Returns:
+        int: Number of pages in the PDF
+    """
+    # Imported here (as below): pypdf takes ~150 ms to import, which a
+    # server loading saved shards never needs
+    from pypdf import PdfReader
+
+    return len(PdfReader(pdf_path).pages)
+
+
+def document_metadata(pdf_path: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Document-level metadata and page labels of a PDF (no text is extracted).
+
+    Args:
+        pdf_path (str): Path to the PDF file
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: Document info (title, author,
+            subject, creator, producer, creationdate, moddate - the ones the
+            PDF has; dates as ISO 8601) with source and total_pages, and the
+            printed label of every page ("1", "iv", ...)
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    info = reader.metadata
+    metadata: Dict[str, Any] = {}
+    if info is not None:
+        fields = {"title": info.title, "author": info.author, "subject": info.subject,
+                  "creator": info.creator, "producer": info.producer,
+                  "creationdate": info.creation_date, "moddate": info.modification_date}
+        for name, value in fields.items():
+            if value:
+                metadata[name] = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    labels = list(reader.page_labels)
+    metadata.update({"source": pdf_path, "total_pages": len(labels)})
+    return metadata, labels
+
+
+def page_metadata(document: Dict[str, Any], labels: List[str], page_number: int) -> Dict[str, Any]:
+    """
+    Metadata of one page: the document's plus page and page_label.
+
+    Every ingestion path (PyPDFLoader or streaming) uses this, so chunks of
+    the same PDF carry the same fields however they were ingested.
+
+    Args:
+        document (Dict[str, Any]): Document metadata from document_metadata()
+        labels (List[str]): Page labels from document_metadata()
+        page_number (int): Zero-based page number
+
+    Returns:
+        Dict[str, Any]: A new metadata dict for the page
+    """
+    return {**document, "page": page_number, "page_label": labels[page_number]}
+
+
+def extract_pages(pdf_path: str, page_numbers: List[int]) -> List[Tuple[int, str]]:
+    """
+    Extract the text of the given pages.
+
+    This runs inside a worker process, so it opens its own PdfReader
+    (readers can't be shared between processes).
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        page_numbers (List[int]): Zero-based page numbers to extract
+
+    Returns:
+        List[Tuple[int, str]]: (page_number, text) pairs in page order
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    return [(i, reader.pages[i].extract_text() or "") for i in page_numbers]
+
+
+def iter_pages(
+    pdf_path: str,
+    max_workers: Optional[int] = None,
+    pages_per_task: int = 8,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) for every page of a PDF, in page order.
+
+    Pages are extracted in a process pool, `pages_per_task` pages per task.
+    At most 2 tasks per worker are in flight at any time, so memory stays
+    bounded no matter how many pages the PDF has.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        max_workers (Optional[int]): Number of worker processes
+            Default: number of CPUs. Use 1 to extract in this process.
+        pages_per_task (int): Pages extracted per worker task (default: 8)
+
+    Yields:
+        Tuple[int, str]: Zero-based page number and extracted text
+    """
+    total_pages = count_pages(pdf_path)
+    ranges = [
+        list(range(start, min(start + pages_per_task, total_pages)))
+        for start in range(0, total_pages, pages_per_task)
+    ]
+    workers = min(max_workers or multiprocessing.cpu_count(), len(ranges))
+
+    # Small PDFs (or max_workers=1) aren't worth starting a pool for
+    if workers <= 1:
+        for page_range in ranges:
+            yield from extract_pages(pdf_path, page_range)
+        return
+
+    # "spawn" gives clean workers - forking a process that already has
+    # torch threads running can deadlock
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = deque()
+        next_range = 0
+        max_in_flight = workers * 2
+
+        while next_range < len(ranges) or pending:
+            # Keep the pool busy, but never queue more than max_in_flight tasks
+            while next_range < len(ranges) and len(pending) < max_in_flight:
+                pending.append(executor.submit(extract_pages, pdf_path, ranges[next_range]))
+                next_range += 1
+            # Wait for the oldest task so pages come back in order
+            yield from pending.popleft().result()
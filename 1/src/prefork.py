@@ -0,0 +1,368 @@
+"""
+Pre-fork Server Module - Multi-Worker Production Mode
+
+This module handles:
+1. Loading the expensive state (embedding model, FAISS shards, chatbot)
+   once, in a parent process
+2. Forking N uvicorn workers that share those memory pages copy-on-write
+   and accept connections on one shared listening socket
+3. Recycling workers gracefully (after a number of requests, on SIGHUP,
+   or when one dies) without dropping in-flight requests
+4. Reporting how much memory each worker really uses (RSS vs PSS)
+
+Why?
+- `uvicorn --workers N` starts N independent processes: each loads its own
+  SentenceTransformer and index - N times the memory
+- Forked after loading, the workers start with the parent's pages; as
+  long as nobody writes to them (model weights and the memory-mapped flat
+  index are read-only), the kernel keeps one copy for all workers
+
+RSS counts shared pages in full for every process, so it overstates the
+real cost; PSS divides shared pages among the processes sharing them -
+the sum of PSS is the actual memory used. Both are reported (Linux).
+
+Signals (to the parent):
+- SIGTERM / SIGINT  Graceful shutdown: workers finish in-flight requests
+- SIGHUP            Rolling restart: each worker is replaced by a fresh
+                    fork, one at a time, the new one ready before the old
+                    one stops
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import gc
+import importlib
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+import uvicorn
+
+
+def memory_usage(pid: int) -> Dict[str, float]:
+    """
+    Memory use of a process in MB (Linux only).
+
+    Args:
+        pid (int): Process ID
+
+    Returns:
+        Dict[str, float]: rss, pss, shared and private (MB), or an empty
+            dict where /proc isn't available
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        return {}
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "shared": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+        "private": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def _import_native_libraries() -> None:
+    """
+    Import torch and FAISS (if installed) before anything computes with them.
+
+    The app imports them lazily (on the first model load or search): without
+    this, the preload's warm-up would start their OpenMP pools in the parent
+    with every core, before _limit_native_threads could see the modules.
+    """
+    for name in ("torch", "faiss"):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def _limit_native_threads(threads: int) -> None:
+    """Size the thread pools of the numeric libraries already imported."""
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    if "faiss" in sys.modules:
+        sys.modules["faiss"].omp_set_num_threads(threads)
+
+
+class _WorkerServer(uvicorn.Server):
+    """uvicorn server that tells the parent when it is ready to serve."""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            # One short write: atomic on a pipe
+            os.write(self.ready_fd, f"{os.getpid()}\n".encode())
+
+
+class PreforkServer:
+    """
+    Parent process of the multi-worker production server.
+
+    Attributes:
+        app: ASGI app (or "module:attribute" import string) the workers serve
+        host (str): Interface to listen on
+        port (int): Port to listen on
+        workers (int): Number of worker processes
+        max_requests (Optional[int]): Recycle a worker after this many requests
+        max_requests_jitter (int): Random extra requests per worker, so the
+                                   workers don't all recycle at once
+        graceful_timeout (float): Seconds a stopping worker gets to finish
+                                  its in-flight requests
+        threads_per_worker (int): torch/FAISS threads in each worker
+    """
+
+    def __init__(self, app, host: str = "0.0.0.0", port: int = 8000, workers: int = 2,
+                 preload: Optional[Callable[[], None]] = None, max_requests: Optional[int] = None,
+                 max_requests_jitter: int = 0, graceful_timeout: float = 30.0,
+                 threads_per_worker: Optional[int] = None, log_level: str = "info"):
+        """
+        Args:
+            app: ASGI app or import string (e.g. "src.main:app")
+            host (str): Interface to listen on (default: all)
+            port (int): Port to listen on (default: 8000)
+            workers (int): Number of worker processes (default: 2)
+            preload (Optional[Callable[[], None]]): Loads the shared state in
+                the parent before forking (e.g. main.initialize_services)
+            max_requests (Optional[int]): Requests before a worker is
+                recycled (default: None - never)
+            max_requests_jitter (int): Up to this many extra requests per
+                worker (default: 0)
+            graceful_timeout (float): Seconds to finish in-flight requests
+                when a worker stops (default: 30)
+            threads_per_worker (Optional[int]): torch/FAISS threads per worker
+                (default: CPU count / workers)
+            log_level (str): uvicorn log level (default: "info")
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.preload = preload
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self.log_level = log_level
+
+        self._socket: Optional[socket.socket] = None
+        self._ready_read = self._ready_write = -1
+        self._children: Dict[int, float] = {}  # pid → fork time
+        self._ready: set = set()
+        self._stopping = False
+        self._restart_requested = False
+        self._reported = False
+
+    # ------------------------------------------------------------------
+    # Parent
+    # ------------------------------------------------------------------
+
+    def run(self) -> None:
+        """Preload, fork the workers and supervise them until shutdown."""
+        # OpenMP thread pools don't survive fork(): the parent computes with
+        # one thread, each worker sizes its own pool after the fork
+        _import_native_libraries()
+        _limit_native_threads(1)
+        if self.preload is not None:
+            start = time.perf_counter()
+            self.preload()
+            print(f"Preloaded in {time.perf_counter() - start:.1f}s (parent PID {os.getpid()})")
+
+        # Move everything allocated so far out of the garbage collector's
+        # reach: the collector would otherwise touch every object header in
+        # the workers and un-share their pages
+        gc.collect()
+        gc.freeze()
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(2048)
+        self._socket.set_inheritable(True)
+        self._ready_read, self._ready_write = os.pipe()
+        os.set_blocking(self._ready_read, False)
+
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_restart)
+
+        print(f"Listening on http://{self.host}:{self.port} with {self.workers} workers "
+              f"({self.threads_per_worker} threads each)")
+        for _ in range(self.workers):
+            self._spawn()
+
+        try:
+            while not self._stopping:
+                self._collect_ready()
+                self._reap()
+                if not self._reported and len(self._ready) >= self.workers:
+                    self.report_memory()
+                    self._reported = True
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self._rolling_restart()
+                time.sleep(0.2)
+        finally:
+            self._shutdown()
+
+    def report_memory(self) -> None:
+        """Print RSS/PSS/shared/private memory of the parent and every worker."""
+        rows = [("parent", os.getpid())] + [("worker", pid) for pid in sorted(self._children)]
+        usages = [(label, pid, memory_usage(pid)) for label, pid in rows]
+        if not usages[0][2]:
+            print("Memory report needs Linux (/proc/<pid>/smaps_rollup)")
+            return
+        print(f"\n{'process':<8}{'pid':>8}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>11}{'private MB':>12}")
+        for label, pid, usage in usages:
+            if usage:
+                print(f"{label:<8}{pid:>8}{usage['rss']:>10.1f}{usage['pss']:>10.1f}"
+                      f"{usage['shared']:>11.1f}{usage['private']:>12.1f}")
+        total_rss = sum(usage.get("rss", 0.0) for _, _, usage in usages)
+        total_pss = sum(usage.get("pss", 0.0) for _, _, usage in usages)
+        print(f"Total: {total_pss:.1f} MB actually used (PSS), {total_rss:.1f} MB if nothing "
+              f"were shared (RSS)\n")
+
+    def _spawn(self) -> int:
+        """Fork a new worker."""
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            max_requests += random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self._worker_main(max_requests)
+                code = 0
+            except BaseException as e:  # pragma: no cover - reported, then exit
+                print(f"Worker {os.getpid()} crashed: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            os._exit(code)
+        self._children[pid] = time.monotonic()
+        return pid
+
+    def _collect_ready(self) -> None:
+        """Read readiness messages of the workers (non-blocking)."""
+        try:
+            data = os.read(self._ready_read, 4096)
+        except BlockingIOError:
+            return
+        for line in data.decode().split():
+            pid = int(line)
+            if pid in self._children:
+                if self._reported:
+                    # A replacement worker: one line instead of the full table
+                    usage = memory_usage(pid)
+                    print(f"Worker {pid} ready" + (f" (RSS {usage['rss']:.1f} MB, "
+                                                   f"PSS {usage['pss']:.1f} MB)" if usage else ""))
+                self._ready.add(pid)
+
+    def _reap(self) -> None:
+        """Collect exited workers and replace them (unless shutting down)."""
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self._children.pop(pid, None)
+            was_ready = pid in self._ready
+            self._ready.discard(pid)
+            if started is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            reason = "recycled" if code == 0 else f"exited with {code}"
+            print(f"Worker {pid} {reason} - starting a new one")
+            if not was_ready:
+                # Died during startup: don't fork in a tight loop
+                time.sleep(1.0)
+            self._spawn()
+
+    def _rolling_restart(self) -> None:
+        """Replace every worker with a fresh fork, one at a time."""
+        print("Rolling restart of all workers")
+        for old_pid in list(self._children):
+            new_pid = self._spawn()
+            deadline = time.monotonic() + 60
+            while new_pid not in self._ready and time.monotonic() < deadline and not self._stopping:
+                self._collect_ready()
+                time.sleep(0.1)
+            if old_pid in self._children:
+                # Removed first, so _reap doesn't replace it again
+                self._children.pop(old_pid)
+                self._ready.discard(old_pid)
+                os.kill(old_pid, signal.SIGTERM)
+                self._wait_for([old_pid], self.graceful_timeout)
+
+    def _shutdown(self) -> None:
+        """Stop all workers gracefully (SIGKILL after the graceful timeout)."""
+        pids = list(self._children)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        self._wait_for(pids, self.graceful_timeout + 5)
+        self._socket.close()
+        print("All workers stopped")
+
+    @staticmethod
+    def _wait_for(pids: list, timeout: float) -> None:
+        """Wait for processes to exit, killing those still running after `timeout`."""
+        deadline = time.monotonic() + timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    if os.waitpid(pid, os.WNOHANG)[0] != 0:
+                        remaining.discard(pid)
+                except ChildProcessError:
+                    remaining.discard(pid)
+            time.sleep(0.1)
+        for pid in remaining:
+            print(f"Worker {pid} didn't stop in time - killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+    def _on_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _on_restart(self, signum, frame) -> None:
+        self._restart_requested = True
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _worker_main(self, max_requests: Optional[int]) -> None:
+        """Run uvicorn on the inherited socket until stopped or recycled."""
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)  # uvicorn installs its own
+        os.close(self._ready_read)
+        _limit_native_threads(self.threads_per_worker)
+
+        config = uvicorn.Config(
+            self.app,
+            log_level=self.log_level,
+            limit_max_requests=max_requests,           # Recycle after this many requests
+            timeout_graceful_shutdown=self.graceful_timeout,
+        )
+        _WorkerServer(config, self._ready_write).run(sockets=[self._socket])
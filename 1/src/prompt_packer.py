@@ -0,0 +1,252 @@
+"""
+Prompt Packer Module - Token-Budgeted Context and Conversation History
+
+This module handles:
+1. Counting tokens with the answer model's own tokenizer (tiktoken)
+2. Filling a prompt token budget: retrieved context first, best chunk
+   first, then conversation history, newest message first
+3. Cutting the piece that doesn't fit at a sentence boundary
+4. Reporting the tokens each part of the prompt got, per request
+
+Why?
+- Before, every retrieved chunk went into the prompt whole, plus the last
+  6 messages however long they were: a few long answers could push a
+  prompt toward the context window (slow and expensive), while short
+  conversations had room for more than 6 messages
+- Retrieved context answers the question; history mostly resolves
+  references ("it", "chapter 3"), so context gets the budget first
+
+Tokens are counted with tiktoken's encoding for the model. If tiktoken or
+the model's encoding isn't available (unknown model, no network to fetch
+the encoding file), counts fall back to an estimate of 4 characters per
+token - close for English text with OpenAI's tokenizers.
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+# Estimate used without a tokenizer (OpenAI's rule of thumb for English)
+CHARS_PER_TOKEN = 4
+
+# Cut points: after a sentence end or a paragraph break; between words
+# only when not even the first sentence fits
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|(?<=[.!?][\"')\]])\s+|\n\s*\n")
+_WORD_BREAK = re.compile(r"\s+")
+
+NO_HISTORY = "No previous conversation."
+
+
+class TokenCounter:
+    """
+    Counts tokens the way the target model's tokenizer does.
+
+    Attributes:
+        model (str): Model whose tokenizer is used
+        exact (bool): True with tiktoken's encoding, False for the estimate
+    """
+
+    def __init__(self, model: str = "gpt-3.5-turbo"):
+        """
+        Args:
+            model (str): OpenAI model name (default: "gpt-3.5-turbo")
+        """
+        self.model = model
+        self._encoding = None
+        try:
+            # Imported here: tiktoken comes with langchain-openai, but the
+            # counter still works (estimating) without it
+            import tiktoken
+            self._encoding = tiktoken.encoding_for_model(model)
+        except Exception as e:  # Not installed, unknown model, or encoding download failed
+            print(f"⚠ No tokenizer for {model} ({type(e).__name__}); "
+                  f"estimating {CHARS_PER_TOKEN} characters per token")
+        self.exact = self._encoding is not None
+
+    def count(self, text: str) -> int:
+        """Number of tokens in `text`."""
+        if not text:
+            return 0
+        if self._encoding is not None:
+            # Special-token strings in documents are plain text here
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class PackedPrompt:
+    """
+    The variable parts of one prompt, fitted into the budget.
+
+    Attributes:
+        context (str): Retrieved chunks that fit, best first
+        chat_history (str): Messages that fit, in conversation order
+        results (List[Tuple[Document, Optional[float]]]): The chunks in the
+            context and their scores (a cut chunk holds the text that was sent)
+        tokens (Dict[str, int]): budget, prompt (template + question),
+            context, history and total
+    """
+    context: str = ""
+    chat_history: str = NO_HISTORY
+    results: List[Tuple[Document, Optional[float]]] = field(default_factory=list)
+    tokens: Dict[str, int] = field(default_factory=dict)
+
+
+class PromptPacker:
+    """
+    Fits retrieved context and conversation history into a token budget.
+
+    Usage:
+        packer = PromptPacker("gpt-3.5-turbo", max_prompt_tokens=3000)
+        packed = packer.pack(results, history, reserved_tokens=packer.count(template + question))
+
+    Attributes:
+        counter (TokenCounter): Tokenizer of the answer model
+        max_prompt_tokens (int): Budget for the whole prompt (template,
+            question, context and history)
+        min_piece_tokens (int): Smallest cut chunk or message worth sending
+    """
+
+    def __init__(self, model: str = "gpt-3.5-turbo", max_prompt_tokens: int = 3000,
+                 min_piece_tokens: int = 32, counter: Optional[TokenCounter] = None):
+        """
+        Args:
+            model (str): Model whose tokenizer counts (default: "gpt-3.5-turbo")
+            max_prompt_tokens (int): Prompt budget in tokens (default: 3000 -
+                4 chunks and a few exchanges; the answer needs room too)
+            min_piece_tokens (int): Pieces cut shorter than this are left out
+                (default: 32)
+            counter (Optional[TokenCounter]): Token counter (default:
+                TokenCounter(model))
+        """
+        self.counter = counter or TokenCounter(model)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.min_piece_tokens = min_piece_tokens
+
+    def count(self, text: str) -> int:
+        """Number of tokens in `text`."""
+        return self.counter.count(text)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Longest start of `text` within `max_tokens`, ending at a sentence end.
+
+        Falls back to a word boundary if not even the first sentence fits.
+
+        Args:
+            text (str): Text to shorten
+            max_tokens (int): Token limit
+
+        Returns:
+            str: The text itself if it fits, else a prefix ("" if nothing fits)
+        """
+        if self.count(text) <= max_tokens:
+            return text
+        kept = self._longest_prefix(text, [m.start() for m in _SENTENCE_BREAK.finditer(text)], max_tokens)
+        if not kept:
+            kept = self._longest_prefix(text, [m.start() for m in _WORD_BREAK.finditer(text)], max_tokens)
+        return kept
+
+    def _longest_prefix(self, text: str, cuts: Sequence[int], max_tokens: int) -> str:
+        """Longest text[:cut] within max_tokens (binary search: counts grow with length)."""
+        low, high = 0, len(cuts)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count(text[:cuts[middle - 1]]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:cuts[low - 1]].rstrip() if low else ""
+
+    def pack(self, results: List[Tuple[Document, Optional[float]]],
+             history: Optional[List[Dict[str, str]]], reserved_tokens: int = 0) -> PackedPrompt:
+        """
+        Fill the budget with context (best chunk first), then history (newest first).
+
+        Chunks are taken in retrieval order - the retriever returns them best
+        first, whatever its score means (distance, fused or re-ranker score).
+        The first chunk that doesn't fit is cut at a sentence boundary and
+        the chunks after it are left out, so a weaker chunk never displaces
+        a better one. History gets what the context leaves.
+
+        Args:
+            results (List[Tuple[Document, Optional[float]]]): Retrieved chunks
+                and their scores, best first
+            history (Optional[List[Dict[str, str]]]): The session's messages,
+                oldest first
+            reserved_tokens (int): Tokens of the fixed parts of the prompt
+                (template and question)
+
+        Returns:
+            PackedPrompt: Context, history, the chunks used and token counts
+        """
+        # The history slot holds at least the "no previous conversation" line
+        remaining = max(self.max_prompt_tokens - reserved_tokens - self.count(NO_HISTORY), 0)
+        separator_tokens = self.count("\n\n")
+        packed = PackedPrompt()
+        parts = []
+        for doc, score in results:
+            cost = self.count(doc.page_content) + (separator_tokens if parts else 0)
+            if cost > remaining:
+                text = self.truncate(doc.page_content, remaining - (separator_tokens if parts else 0))
+                if text and self.count(text) >= self.min_piece_tokens:
+                    # A copy: the store's Document stays whole
+                    parts.append(text)
+                    packed.results.append((Document(page_content=text, metadata=dict(doc.metadata)), score))
+                break
+            parts.append(doc.page_content)
+            packed.results.append((doc, score))
+            remaining -= cost
+        packed.context = "\n\n".join(parts)
+
+        context_tokens = self.count(packed.context)
+        packed.chat_history, history_tokens = self.pack_history(history, reserved_tokens + context_tokens)
+        packed.tokens = {
+            "budget": self.max_prompt_tokens,
+            "prompt": reserved_tokens,
+            "context": context_tokens,
+            "history": history_tokens,
+            "total": reserved_tokens + context_tokens + history_tokens,
+        }
+        return packed
+
+    def pack_history(self, history: Optional[List[Dict[str, str]]],
+                     reserved_tokens: int = 0) -> Tuple[str, int]:
+        """
+        Format as much of the conversation as fits, newest messages first.
+
+        The oldest message that doesn't fit is cut at a sentence boundary
+        (keeping its start); older ones are left out.
+
+        Args:
+            history (Optional[List[Dict[str, str]]]): The session's messages,
+                oldest first
+            reserved_tokens (int): Tokens already used by the rest of the prompt
+
+        Returns:
+            Tuple[str, int]: "User: ...\\nAssistant: ...\\n" in conversation
+                order (or "No previous conversation."), and its tokens
+        """
+        remaining = self.max_prompt_tokens - reserved_tokens
+        lines = []
+        for message in reversed(history or []):
+            role = "User" if message["role"] == "user" else "Assistant"
+            line = f"{role}: {message['content']}\n"
+            cost = self.count(line)
+            if cost > remaining:
+                content = self.truncate(message["content"], remaining - self.count(f"{role}: \n"))
+                if content and self.count(content) >= self.min_piece_tokens:
+                    lines.append(f"{role}: {content}\n")
+                break
+            lines.append(line)
+            remaining -= cost
+
+        if not lines:
+            return NO_HISTORY, self.count(NO_HISTORY)
+        text = "".join(reversed(lines))
+        return text, self.count(text)
@@ -0,0 +1,122 @@
+"""
+Query Rewriter Module - Deciding When a Question Needs an LLM Rewrite
+
+This module handles:
+1. Deciding whether a question must be rewritten into a standalone query
+   before retrieval, or can be searched as it is
+2. Counting how often (and why) the rewrite was skipped
+
+Why?
+- The standalone-query rewrite is a full LLM round trip, paid before
+  retrieval can even start - usually the largest single latency cost of
+  a document question
+- It is only useful when the question leans on the conversation:
+  "Who wrote it?", "And chapter 3?", "Why?"
+- The first question of a conversation, and any question that names what
+  it is about ("What does the book say about pricing?"), is already
+  standalone
+
+The check is a few regexes over the question: no model, microseconds.
+It errs on the side of rewriting - a needless rewrite only costs time,
+a missed one costs answer quality.
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import re
+import threading
+from typing import Dict, List, Tuple
+
+# Words that point back at something said earlier
+_REFERENCE_PATTERN = re.compile(
+    r"\b(it|its|it's|itself|they|them|their|theirs|themselves|he|him|his|she|her|hers|"
+    r"one|ones|former|latter|aforementioned|above|previous|earlier|same|"
+    r"there|then|else|again|too|also|another|other|others|more)\b"
+)
+
+# Demonstratives are references unless they point at the document itself:
+# "Why is that?" and "How do those compare?" need the history,
+# "What is this book about?" doesn't
+_DEMONSTRATIVE_PATTERN = re.compile(
+    r"\b(this|that|these|those)\b(?!\s+(?:book|document|pdf|text|file|paper|guide)s?\b)"
+)
+
+# Elliptical follow-ups: "And chapter 3?", "What about pricing?", "Why?"
+_ELLIPSIS_PATTERN = re.compile(
+    r"^(and|but|or|so|also|what about|how about|why|why not|how so|really|"
+    r"such as|like what|for example|example|examples|elaborate|explain further|"
+    r"go on|continue|tell me more|more|same)\b"
+)
+
+# Questions this short rarely stand on their own
+MIN_STANDALONE_WORDS = 4
+
+
+class RewriteGate:
+    """
+    Decides whether a question needs the LLM standalone-query rewrite.
+
+    Attributes:
+        enabled (bool): If False, every question with history is rewritten
+                        (the previous behaviour)
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled (bool): Skip rewrites that aren't needed (default: True)
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._reasons: Dict[str, int] = {}
+        self._counters = {"checks": 0, "rewritten": 0, "skipped": 0}
+
+    def check(self, question: str, chat_history: List[Dict[str, str]]) -> Tuple[bool, str]:
+        """
+        Decide whether the question must be rewritten before retrieval.
+
+        Args:
+            question (str): The user's question
+            chat_history (List[Dict[str, str]]): Conversation so far
+
+        Returns:
+            Tuple[bool, str]: (needs rewrite, reason). Reasons:
+                "no_history" / "self_contained" (skipped),
+                "reference" / "ellipsis" / "short" / "gate_disabled" (rewritten)
+        """
+        needs_rewrite, reason = self._decide(question, chat_history)
+        with self._lock:
+            self._counters["checks"] += 1
+            self._counters["rewritten" if needs_rewrite else "skipped"] += 1
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+        return needs_rewrite, reason
+
+    def _decide(self, question: str, chat_history: List[Dict[str, str]]) -> Tuple[bool, str]:
+        """The decision behind check(), without counting."""
+        if not chat_history:
+            # Nothing to resolve references against
+            return False, "no_history"
+        if not self.enabled:
+            return True, "gate_disabled"
+
+        text = " ".join(question.lower().split())
+        if _ELLIPSIS_PATTERN.search(text):
+            return True, "ellipsis"
+        if _REFERENCE_PATTERN.search(text) or _DEMONSTRATIVE_PATTERN.search(text):
+            return True, "reference"
+        if len(re.findall(r"\w+", text)) < MIN_STANDALONE_WORDS:
+            return True, "short"
+        return False, "self_contained"
+
+    def stats(self) -> dict:
+        """
+        Rewrite statistics.
+
+        Returns:
+            dict: checks, rewritten, skipped, skip_rate and a count per reason
+        """
+        with self._lock:
+            checks = self._counters["checks"]
+            return {**self._counters,
+                    "skip_rate": self._counters["skipped"] / checks if checks else 0.0,
+                    "reasons": dict(self._reasons)}
@@ -0,0 +1,130 @@
+"""
+RAG Pipeline Module - Request-Scoped State and Stage Timings
+
+This module handles:
+1. Carrying everything one chat request produces from stage to stage
+   (standalone query, query embedding, retrieved chunks and their scores,
+   context, answer)
+2. Timing every stage, so slow requests can be explained
+3. Reporting the prompt's token counts (context, history, total)
+
+Stages of a document question, each run exactly once:
+    rewrite → embed → cache_lookup → retrieval → generation
+
+Retrieval also reports its parts: faiss_search, bm25_search and fusion
+(hybrid mode), rerank and select (MMR + merging).
+
+Before this, the retrieved chunks were thrown away after building the
+sources, and the answer chain ran the same embedding and FAISS search a
+second time to build the context. Now the chunks retrieved once are used
+for both.
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+@dataclass
+class RAGRequest:
+    """
+    State of one chat request as it moves through the pipeline.
+
+    Attributes:
+        question (str): The user's message, as sent
+        session_id (str): Conversation the message belongs to
+        history (List[Dict[str, str]]): The session's messages, oldest first
+        chat_history (str): Conversation history as it went into the answer
+            prompt (what fit the token budget)
+        is_document_question (bool): Routed to RAG (True) or casual chat (False)
+        standalone_query (Optional[str]): Question rewritten to stand on its own
+            (the question itself when the rewrite was skipped)
+        rewrite_reason (Optional[str]): Why the rewrite ran or was skipped
+            (see RewriteGate.check)
+        query_vector (Optional[List[float]]): Embedding of the standalone query
+        index_version (Optional[int]): Index version the chunks were retrieved from
+        results (List[Tuple[Document, Optional[float]]]): Retrieved chunks and
+            their scores (distance, fused or re-ranker score, depending on
+            the retriever setup)
+        answer (Optional[str]): Generated (or cached) answer
+        cached (bool): True if the answer came from the answer cache
+        timings (Dict[str, float]): Milliseconds spent per stage
+        prompt_tokens (Dict[str, int]): Tokens of the answer prompt per part
+            (see PromptPacker.pack; empty for cached answers)
+        started (float): time.perf_counter() when the request was created
+    """
+    question: str
+    session_id: str = "default"
+    history: List[Dict[str, str]] = field(default_factory=list)
+    chat_history: str = ""
+    is_document_question: bool = True
+    standalone_query: Optional[str] = None
+    rewrite_reason: Optional[str] = None
+    query_vector: Optional[List[float]] = None
+    index_version: Optional[int] = None
+    results: List[Tuple[Document, Optional[float]]] = field(default_factory=list)
+    answer: Optional[str] = None
+    cached: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+    prompt_tokens: Dict[str, int] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def docs(self) -> List[Document]:
+        """Retrieved chunks, best first."""
+        return [doc for doc, _ in self.results]
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a pipeline stage.
+
+        Usage:
+            with request.stage("retrieval"):
+                request.results = retriever.retrieve_with_scores(query)
+
+        Args:
+            name (str): Stage name (key in timings)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def finish(self) -> None:
+        """Record the total time since the request was created."""
+        self.timings["total"] = (time.perf_counter() - self.started) * 1000
+
+    def debug_info(self) -> dict:
+        """
+        Debug summary for the API response.
+
+        Returns:
+            dict: session_id, route ("rag" or "casual"), standalone_query,
+                  rewrite reason, cached, retrieved chunks (ID, page, score),
+                  timings_ms per stage and prompt_tokens per prompt part
+        """
+        return {
+            "session_id": self.session_id,
+            "route": "rag" if self.is_document_question else "casual",
+            "standalone_query": self.standalone_query,
+            "rewrite": self.rewrite_reason,
+            "cached": self.cached,
+            "retrieved": [
+                {
+                    "chunk_id": doc.metadata.get("chunk_id"),
+                    "source": doc.metadata.get("source"),
+                    "page": doc.metadata.get("page"),
+                    "score": score,
+                }
+                for doc, score in self.results
+            ],
+            "timings_ms": {name: round(ms, 2) for name, ms in self.timings.items()},
+            "prompt_tokens": dict(self.prompt_tokens),
+        }
@@ -0,0 +1,143 @@
+"""
+Re-ranker Module - Cross-Encoder Re-ranking of Retrieved Chunks
+
+This module handles:
+1. Scoring (query, chunk) pairs with a small local cross-encoder on CPU
+2. Keeping only the chunks whose score clears a threshold
+3. Caching scores, so repeated questions don't re-score the same chunks
+4. Staying inside a latency budget per request
+
+Why re-rank?
+- Vector search compares the query and the chunk separately (two
+  embeddings); a cross-encoder reads them together and judges relevance
+  much more accurately
+- It is too slow to run over the whole corpus, so we over-fetch a few
+  dozen candidates with vector/hybrid search and re-rank only those
+- Irrelevant chunks are dropped instead of being paid for in prompt tokens
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from .bm25_index import document_key
+
+
+class CrossEncoderReranker:
+    """
+    Re-ranks retrieved chunks with a sentence-transformers CrossEncoder.
+
+    Attributes:
+        model_name (str): HuggingFace cross-encoder model name
+        batch_size (int): (query, chunk) pairs scored per model call
+        score_threshold (float): Chunks scoring below this are dropped
+        min_keep (int): Always keep at least this many chunks (best first),
+                        even if they score below the threshold
+        max_latency_ms (float): Scoring stops starting new batches once
+                                this much time has been spent on a request
+        stats (dict): Counters - requests, candidates, pairs_scored,
+                      cache_hits, kept, budget_exceeded
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 batch_size: int = 16, score_threshold: float = 0.0, min_keep: int = 1,
+                 max_latency_ms: float = 300.0, cache_size: int = 4096):
+        """
+        Load the cross-encoder.
+
+        Args:
+            model_name (str): HuggingFace cross-encoder model name
+                Default: "ms-marco-MiniLM-L-6-v2" - small, fast on CPU.
+                Its scores are logits: > 0 means "probably relevant".
+            batch_size (int): Pairs per model call (default: 16)
+            score_threshold (float): Minimum score to keep a chunk (default: 0.0)
+            min_keep (int): Chunks kept even below the threshold (default: 1)
+            max_latency_ms (float): Scoring time budget per request (default: 300)
+            cache_size (int): Maximum cached (query, chunk) scores (default: 4096)
+        """
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.score_threshold = score_threshold
+        self.min_keep = min_keep
+        self.max_latency_ms = max_latency_ms
+        self.cache_size = cache_size
+        self.model = CrossEncoder(model_name, device="cpu")
+
+        # (query, chunk key) → score, least recently used first
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "candidates": 0, "pairs_scored": 0,
+                      "cache_hits": 0, "kept": 0, "budget_exceeded": 0}
+
+    def rerank(self, query: str, docs: List[Document], k: int = 4) -> List[Tuple[Document, Optional[float]]]:
+        """
+        Score candidate chunks against the query and keep the best.
+
+        Cached scores are used first, the rest are scored in batches. If
+        the latency budget runs out, the remaining candidates are left
+        unscored: they rank after the scored ones (in retrieval order) and
+        are only used to fill up to min_keep.
+
+        Args:
+            query (str): The (standalone) query
+            docs (List[Document]): Candidates, in retrieval order
+            k (int): Maximum number of chunks to return
+
+        Returns:
+            List[Tuple[Document, Optional[float]]]: (chunk, score) pairs, best first,
+                at most k, all above the threshold except the min_keep fallback.
+                Unscored chunks have score None.
+        """
+        start = time.perf_counter()
+        keys = [(query, str(document_key(doc))) for doc in docs]
+
+        scores: List[Optional[float]] = [None] * len(docs)
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+        cache_hits = sum(score is not None for score in scores)
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        budget_exceeded = False
+        for batch_start in range(0, len(missing), self.batch_size):
+            if (time.perf_counter() - start) * 1000 >= self.max_latency_ms:
+                budget_exceeded = True
+                break
+            batch = missing[batch_start:batch_start + self.batch_size]
+            batch_scores = self.model.predict([(query, docs[i].page_content) for i in batch],
+                                              batch_size=len(batch), show_progress_bar=False)
+            with self._lock:
+                for i, score in zip(batch, batch_scores):
+                    scores[i] = float(score)
+                    self._cache[keys[i]] = scores[i]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        scored = sorted((i for i, score in enumerate(scores) if score is not None),
+                        key=lambda i: scores[i], reverse=True)
+        unscored = [i for i, score in enumerate(scores) if score is None]
+        kept = [i for i in scored if scores[i] >= self.score_threshold][:k]
+        # Fallback: never return fewer than min_keep chunks
+        for i in scored + unscored:
+            if len(kept) >= min(self.min_keep, k):
+                break
+            if i not in kept:
+                kept.append(i)
+
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["candidates"] += len(docs)
+            self.stats["pairs_scored"] += len(scored) - cache_hits
+            self.stats["cache_hits"] += cache_hits
+            self.stats["kept"] += len(kept)
+            self.stats["budget_exceeded"] += int(budget_exceeded)
+        return [(docs[i], scores[i]) for i in kept]
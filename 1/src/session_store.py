@@ -0,0 +1,530 @@
+"""
+Session Store Module - Per-Session Conversation Memory
+
+This module handles:
+1. Keeping a separate conversation history for every client session
+2. Bounding memory: a maximum history length per session, idle-session
+   expiry (TTL) and a global memory cap across all sessions
+3. Counting active sessions and evictions
+4. Sharing sessions between worker processes (SQLite and Redis backends),
+   so any worker can serve any turn of a conversation
+
+Why?
+- One global history mixes every user's conversation into everyone's
+  prompts, grows forever, and /clear wipes it for all users
+- Each session now has its own history; old messages, idle sessions and
+  (under memory pressure) the least recently active sessions are dropped
+- A history kept in one process's memory is lost to the other workers;
+  the shared backends keep it outside the process
+
+Backends (all implement SessionStore):
+- InMemorySessionStore  Process memory - one worker only (default)
+- SQLiteSessionStore    A SQLite file - all workers on one machine
+- RedisSessionStore     A Redis server (or anything speaking its protocol)
+                        - workers on any number of machines
+
+Every request reads the history once (get_history) and writes the turn
+once (append): one round trip each to a shared store.
+
+Messages are stored compactly: one role byte + UTF-8 text, zlib-compressed
+when that makes it smaller (see pack_message).
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Role ↔ one-byte code of packed messages (uppercase = zlib-compressed text)
+_ROLE_CODES = {"user": b"u", "assistant": b"a", "system": b"s"}
+_CODE_ROLES = {code[0]: role for role, code in _ROLE_CODES.items()}
+
+# Texts shorter than this are never worth compressing
+_COMPRESS_MIN_BYTES = 200
+
+
+def pack_message(message: Dict[str, str]) -> bytes:
+    """
+    Encode a message compactly: role byte + text (compressed if smaller).
+
+    Args:
+        message (Dict[str, str]): {"role", "content"}
+
+    Returns:
+        bytes: Packed message
+    """
+    code = _ROLE_CODES[message["role"]]
+    text = message["content"].encode("utf-8")
+    if len(text) >= _COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(text)
+        if len(compressed) < len(text):
+            return code.upper() + compressed
+    return code + text
+
+
+def unpack_message(data: bytes) -> Dict[str, str]:
+    """
+    Decode a message packed with pack_message().
+
+    Args:
+        data (bytes): Packed message
+
+    Returns:
+        Dict[str, str]: {"role", "content"}
+    """
+    code, payload = data[0], data[1:]
+    if code in _CODE_ROLES:
+        return {"role": _CODE_ROLES[code], "content": payload.decode("utf-8")}
+    return {"role": _CODE_ROLES[code + 32], "content": zlib.decompress(payload).decode("utf-8")}
+
+
+def _message_size(message: Dict[str, str]) -> int:
+    """Approximate memory use of one message in bytes (text + fixed overhead)."""
+    return len(message["content"].encode("utf-8")) + len(message["role"]) + 64
+
+
+class SessionStore(ABC):
+    """
+    Interface of the conversation history stores used by ConversationBot.
+
+    Attributes:
+        max_messages (int): Messages kept per session (oldest are dropped)
+        idle_ttl_seconds (float): Sessions idle for longer are evicted
+    """
+
+    def __init__(self, max_messages: int = 20, idle_ttl_seconds: float = 1800.0):
+        """
+        Args:
+            max_messages (int): History length per session (default: 20 -
+                10 exchanges; the prompts only use the last 6 messages)
+            idle_ttl_seconds (float): Idle time before a session expires
+                (default: 30 minutes)
+        """
+        self.max_messages = max_messages
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._counters = {"expired": 0, "evicted_for_memory": 0, "trimmed_messages": 0}
+        self._counters_lock = threading.Lock()
+
+    @abstractmethod
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        """
+        Conversation history of a session (marks the session as active).
+
+        Args:
+            session_id (str): Session ID
+
+        Returns:
+            List[Dict[str, str]]: Messages ({"role", "content"}), oldest first
+                (empty for new or expired sessions)
+        """
+
+    @abstractmethod
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        """
+        Add the messages of one turn to a session's history.
+
+        Args:
+            session_id (str): Session ID (created if new)
+            messages (List[Dict[str, str]]): Messages to append, e.g. the
+                user's question and the assistant's answer
+        """
+
+    @abstractmethod
+    def clear(self, session_id: str) -> bool:
+        """
+        Delete a session's history.
+
+        Args:
+            session_id (str): Session ID
+
+        Returns:
+            bool: True if the session existed
+        """
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """
+        Session statistics.
+
+        Returns:
+            dict: backend, active_sessions, expired, evicted_for_memory and
+                  trimmed_messages (counters are per process), plus
+                  backend-specific sizes
+        """
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        """Add to one of this process's counters."""
+        if amount:
+            with self._counters_lock:
+                self._counters[name] += amount
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Conversation histories of all sessions, in process memory.
+
+    Sessions are kept in least-recently-active order, so both expiry and
+    the memory cap only look at the oldest sessions - no full scans.
+
+    Attributes:
+        max_messages (int): Messages kept per session (oldest are dropped)
+        idle_ttl_seconds (float): Sessions idle for longer are evicted
+        max_total_bytes (int): Memory cap over all histories; beyond it the
+                               least recently active sessions are evicted
+    """
+
+    def __init__(self, max_messages: int = 20, idle_ttl_seconds: float = 1800.0,
+                 max_total_bytes: int = 32 * 1024 * 1024):
+        """
+        Args:
+            max_messages (int): History length per session (default: 20)
+            idle_ttl_seconds (float): Idle time before a session expires
+                (default: 30 minutes)
+            max_total_bytes (int): Memory cap for all histories (default: 32 MB)
+        """
+        super().__init__(max_messages, idle_ttl_seconds)
+        self.max_total_bytes = max_total_bytes
+
+        # session ID → {"messages", "bytes", "last_active"}, least recently active first
+        self._sessions: "OrderedDict[str, dict]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            self._expire_idle()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            session["last_active"] = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return list(session["messages"])
+
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        with self._lock:
+            self._expire_idle()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = {"messages": [], "bytes": 0}
+            session["last_active"] = time.monotonic()
+            self._sessions.move_to_end(session_id)
+
+            for message in messages:
+                session["messages"].append(message)
+                session["bytes"] += _message_size(message)
+                self._total_bytes += _message_size(message)
+            # Per-session length limit: drop the oldest messages
+            while len(session["messages"]) > self.max_messages:
+                size = _message_size(session["messages"].pop(0))
+                session["bytes"] -= size
+                self._total_bytes -= size
+                self._count("trimmed_messages")
+
+            # Global memory cap: evict least recently active sessions
+            # (never the one just written)
+            while self._total_bytes > self.max_total_bytes and len(self._sessions) > 1:
+                self._remove(next(iter(self._sessions)))
+                self._count("evicted_for_memory")
+
+    def clear(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._remove(session_id)
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire_idle()
+            return {"backend": "memory", "active_sessions": len(self._sessions),
+                    "total_bytes": self._total_bytes, **self._counters}
+
+    def _expire_idle(self) -> None:
+        """Evict sessions idle for longer than the TTL (lock held)."""
+        deadline = time.monotonic() - self.idle_ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session["last_active"] >= deadline:
+                break
+            self._remove(session_id)
+            self._count("expired")
+
+    def _remove(self, session_id: str) -> None:
+        """Drop a session and its memory (lock held)."""
+        self._total_bytes -= self._sessions.pop(session_id)["bytes"]
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Conversation histories in a SQLite database file, shared by all worker
+    processes on the machine.
+
+    Tables:
+    - sessions(id, last_active, bytes, next_seq)   one row per session
+    - messages(session_id, seq, data)              one packed message per row
+
+    Each call is one transaction. The database runs in WAL mode, so
+    readers don't wait for writers.
+
+    Attributes:
+        path (str): Database file
+        max_messages (int): Messages kept per session
+        idle_ttl_seconds (float): Sessions idle for longer are deleted
+        max_total_bytes (int): Cap on the packed size of all histories;
+                               beyond it the least recently active sessions
+                               are deleted
+    """
+
+    def __init__(self, path: str, max_messages: int = 20, idle_ttl_seconds: float = 1800.0,
+                 max_total_bytes: int = 256 * 1024 * 1024):
+        """
+        Open (or create) the session database.
+
+        Args:
+            path (str): Database file (created if missing)
+            max_messages (int): History length per session (default: 20)
+            idle_ttl_seconds (float): Idle time before a session expires
+                (default: 30 minutes)
+            max_total_bytes (int): Size cap for all histories (default: 256 MB)
+        """
+        super().__init__(max_messages, idle_ttl_seconds)
+        self.path = path
+        self.max_total_bytes = max_total_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    last_active REAL NOT NULL,
+                    bytes INTEGER NOT NULL DEFAULT 0,
+                    next_seq INTEGER NOT NULL DEFAULT 0
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions (last_active)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                ) WITHOUT ROWID""")
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        This process's connection (lock held).
+
+        A connection must not be used across fork(): a forked worker opens
+        its own.
+        """
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None,
+                                         check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """One write transaction on this process's connection."""
+        with self._lock:
+            conn = self._connection()
+            # IMMEDIATE: take the write lock up front, so concurrent
+            # read-then-write transactions can't deadlock
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        now = time.time()
+        with self._transaction() as conn:
+            touched = conn.execute(
+                "UPDATE sessions SET last_active = ? WHERE id = ? AND last_active >= ?",
+                (now, session_id, now - self.idle_ttl_seconds)).rowcount
+            if not touched:
+                return []
+            rows = conn.execute("SELECT data FROM messages WHERE session_id = ? ORDER BY seq",
+                                (session_id,)).fetchall()
+        return [unpack_message(data) for (data,) in rows]
+
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        now = time.time()
+        packed = [pack_message(message) for message in messages]
+        with self._transaction() as conn:
+            self._expire_idle(conn, now)
+            row = conn.execute("SELECT next_seq FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            next_seq = row[0] if row else 0
+            conn.executemany("INSERT INTO messages (session_id, seq, data) VALUES (?, ?, ?)",
+                             [(session_id, next_seq + i, data) for i, data in enumerate(packed)])
+            next_seq += len(packed)
+
+            # Per-session length limit: drop the oldest messages
+            trimmed = conn.execute("DELETE FROM messages WHERE session_id = ? AND seq < ?",
+                                   (session_id, next_seq - self.max_messages)).rowcount
+            self._count("trimmed_messages", trimmed)
+            size = conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM messages WHERE session_id = ?",
+                                (session_id,)).fetchone()[0]
+            conn.execute(
+                "INSERT INTO sessions (id, last_active, bytes, next_seq) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET last_active = excluded.last_active, "
+                "bytes = excluded.bytes, next_seq = excluded.next_seq",
+                (session_id, now, size, next_seq))
+
+            # Size cap: delete least recently active sessions (never this one)
+            total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM sessions").fetchone()[0]
+            while total > self.max_total_bytes:
+                oldest = conn.execute("SELECT id, bytes FROM sessions WHERE id != ? "
+                                      "ORDER BY last_active LIMIT 1", (session_id,)).fetchone()
+                if oldest is None:
+                    break
+                self._delete(conn, oldest[0])
+                total -= oldest[1]
+                self._count("evicted_for_memory")
+
+    def clear(self, session_id: str) -> bool:
+        with self._transaction() as conn:
+            return self._delete(conn, session_id)
+
+    def stats(self) -> dict:
+        with self._transaction() as conn:
+            self._expire_idle(conn, time.time())
+            active, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM sessions").fetchone()
+        return {"backend": "sqlite", "active_sessions": active, "total_bytes": total, **self._counters}
+
+    def _expire_idle(self, conn: sqlite3.Connection, now: float) -> None:
+        """Delete sessions idle for longer than the TTL (in a transaction)."""
+        deadline = now - self.idle_ttl_seconds
+        conn.execute("DELETE FROM messages WHERE session_id IN "
+                     "(SELECT id FROM sessions WHERE last_active < ?)", (deadline,))
+        self._count("expired", conn.execute("DELETE FROM sessions WHERE last_active < ?",
+                                            (deadline,)).rowcount)
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, session_id: str) -> bool:
+        """Delete one session and its messages (in a transaction)."""
+        conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        return conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Conversation histories in Redis, shared by workers on any machine.
+
+    Keys:
+    - <prefix>session:<id>   List of packed messages, expires after the idle TTL
+    - <prefix>sessions       Sorted set: session ID → last active time
+                             (for counting active sessions)
+
+    Each call is one (pipelined) round trip. Redis expires idle sessions by
+    itself (key TTL, renewed by every append); the memory cap is Redis's
+    own `maxmemory` setting
+    (use `maxmemory-policy volatile-lru`, so the least recently used
+    sessions are evicted first).
+
+    Works with anything that speaks the Redis protocol (Redis, Valkey,
+    KeyDB, or fakeredis for local testing).
+
+    Attributes:
+        client (redis.Redis): Redis client
+        prefix (str): Key prefix (to share a Redis database with other apps)
+        max_messages (int): Messages kept per session
+        idle_ttl_seconds (float): Sessions idle for longer expire
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", max_messages: int = 20,
+                 idle_ttl_seconds: float = 1800.0, prefix: str = "rag:", client=None):
+        """
+        Connect to Redis.
+
+        Args:
+            url (str): Redis URL (default: "redis://localhost:6379/0")
+            max_messages (int): History length per session (default: 20)
+            idle_ttl_seconds (float): Idle time before a session expires
+                (default: 30 minutes)
+            prefix (str): Key prefix (default: "rag:")
+            client: Ready-made redis.Redis-compatible client (e.g.
+                fakeredis.FakeRedis() in tests); `url` is ignored if given
+
+        Raises:
+            ImportError: If no client is given and redis isn't installed
+        """
+        super().__init__(max_messages, idle_ttl_seconds)
+        if client is None:
+            # Imported here: the client is optional, and only this backend needs it
+            try:
+                import redis
+            except ImportError:  # pragma: no cover - depends on the environment
+                raise ImportError("The Redis session store needs the redis package: pip install redis")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self._index_key = f"{prefix}sessions"
+
+    def _key(self, session_id: str) -> str:
+        """Redis key of a session's message list."""
+        return f"{self.prefix}session:{session_id}"
+
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        # Read only: every turn ends with append(), which refreshes the TTL
+        return [unpack_message(data) for data in self.client.lrange(self._key(session_id), 0, -1)]
+
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        key = self._key(session_id)
+        now = time.time()
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rpush(key, *[pack_message(message) for message in messages])
+        pipe.ltrim(key, -self.max_messages, -1)
+        pipe.expire(key, int(self.idle_ttl_seconds))
+        pipe.zadd(self._index_key, {session_id: now})
+        pipe.zremrangebyscore(self._index_key, "-inf", now - self.idle_ttl_seconds)
+        length, _, _, _, expired = pipe.execute()
+        self._count("trimmed_messages", max(0, length - self.max_messages))
+        self._count("expired", expired)
+
+    def clear(self, session_id: str) -> bool:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self._key(session_id))
+        pipe.zrem(self._index_key, session_id)
+        deleted, _ = pipe.execute()
+        return deleted > 0
+
+    def stats(self) -> dict:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zremrangebyscore(self._index_key, "-inf", time.time() - self.idle_ttl_seconds)
+        pipe.zcard(self._index_key)
+        expired, active = pipe.execute()
+        self._count("expired", expired)
+        return {"backend": "redis", "active_sessions": active, **self._counters}
+
+
+def create_session_store(backend: str = "memory", **options) -> SessionStore:
+    """
+    Create a session store by backend name.
+
+    Args:
+        backend (str): "memory", "sqlite" (needs path=...) or "redis" (url=...)
+        **options: Passed to the store's constructor
+
+    Returns:
+        SessionStore: The store
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    stores = {"memory": InMemorySessionStore, "sqlite": SQLiteSessionStore, "redis": RedisSessionStore}
+    if backend not in stores:
+        raise ValueError(f"Unknown session store {backend!r}: use one of {', '.join(stores)}")
+    return stores[backend](**options)
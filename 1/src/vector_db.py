@@ -14,16 +14,68 @@ Key Concepts:
 Author: Project 1 - LLM Practice Projects
 """
 
+import hashlib
+import json
 import os
-from typing import List, Optional
+import shutil
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from sentence_transformers import SentenceTransformer
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from langchain.embeddings.base import Embeddings
 
+from .bm25_index import BM25Index, document_key, fuse_results
+from .columnar_store import VectorColumn, read_store, replace_directory, store_exists, write_store
+from .embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from .index_spec import INDEX_SPEC_FILE, IndexSpec
+from .pdf_pages import document_metadata, iter_pages, page_metadata
+
+# File (next to the FAISS index) that records content hashes per page and chunk
+MANIFEST_FILE = "manifest.json"
+
+
+def _hash_text(text: str) -> str:
+    """
+    SHA-256 hex digest of a text (used for page and chunk content hashes).
+    
+    Args:
+        text (str): Text to hash
+        
+    Returns:
+        str: 64-character hex digest
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _file_fingerprint(path: str, previous: Optional[dict] = None) -> dict:
+    """
+    Fingerprint a file by size, modification time and SHA-256.
+    
+    If `previous` has the same size and mtime, its hash is reused instead
+    of re-reading the file (the same shortcut make and rsync take).
+    
+    Args:
+        path (str): File to fingerprint
+        previous (Optional[dict]): Earlier fingerprint of the same file
+        
+    Returns:
+        dict: {"size": int, "mtime_ns": int, "sha256": str}
+    """
+    stat = os.stat(path)
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return dict(previous)
+    
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
 
 class HuggingFaceEmbeddingsWrapper(Embeddings):
     """
@@ -34,21 +86,100 @@ class HuggingFaceEmbeddingsWrapper(Embeddings):
     
     Attributes:
         model_name (str): Name of the HuggingFace model to use
-        model (SentenceTransformer): The actual embedding model
+        model (SentenceTransformer | OnnxEncoder): The actual embedding model
+        backend (str): "torch" (PyTorch) or "onnx" (int8 ONNX Runtime)
+        parity (Optional[dict]): ONNX vs PyTorch parity check results (onnx only)
+        cache (Optional[EmbeddingCache]): On-disk cache of document embeddings
+        query_cache (QueryEmbeddingCache): In-memory LRU cache of query embeddings
+        max_batch_tokens (int): Padded-token budget per encoding batch
     """
     
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 cache_dir: Optional[str] = None,
+                 max_batch_tokens: int = 16384,
+                 query_cache_size: int = 1024,
+                 query_cache_ttl: float = 3600.0,
+                 backend: str = "torch",
+                 onnx_dir: str = "onnx_models"):
         """
         Initialize the embedding model.
         
         Args:
             model_name (str): HuggingFace model name
                 Default: "all-MiniLM-L6-v2" - fast, 384-dimensional embeddings
+            cache_dir (Optional[str]): Directory for the persistent embedding cache
+                Default: None (no cache - every text is encoded by the model)
+            max_batch_tokens (int): Memory budget per encoding batch, as
+                batch size × longest sequence in the batch (default: 16384).
+                Transformer activation memory grows with exactly this number.
+            query_cache_size (int): Maximum cached query embeddings (default: 1024)
+            query_cache_ttl (float): Seconds a cached query embedding stays valid
+                (default: 3600)
+            backend (str): "torch" to run the model with PyTorch, or "onnx" to
+                run an int8 quantized ONNX export with ONNX Runtime (much
+                faster on CPU). Default: "torch".
+            onnx_dir (str): Where ONNX exports are kept (onnx backend only)
+        
+        Raises:
+            ValueError: If backend is unknown
         """
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"Unknown embedding backend '{backend}'. Choose 'torch' or 'onnx'")
         self.model_name = model_name
+        self.max_batch_tokens = max_batch_tokens
         # Load the pre-trained model from HuggingFace
         # This model converts text into 384-dimensional vectors
+        # Imported here: sentence-transformers pulls in torch, seconds of
+        # import time that only the process loading the model should pay
+        from sentence_transformers import SentenceTransformer
+        
         self.model = SentenceTransformer(model_name)
+        self.backend = "torch"
+        self.parity: Optional[dict] = None
+        if backend == "onnx":
+            self._use_onnx(onnx_dir)
+        
+        # Optional disk cache: texts embedded before (by any run or process
+        # sharing the directory) are read back instead of re-encoded.
+        # Quantized vectors differ slightly, so they get their own cache.
+        cache_model = model_name if self.backend == "torch" else f"{model_name}@onnx-int8"
+        self.cache = EmbeddingCache(cache_dir, cache_model, self.dimension) if cache_dir else None
+        
+        # Query cache: repeated questions skip the model entirely
+        self.query_cache = QueryEmbeddingCache(query_cache_size, query_cache_ttl)
+    
+    def _use_onnx(self, onnx_dir: str) -> None:
+        """
+        Switch to the int8 ONNX Runtime model if it matches PyTorch.
+        
+        The PyTorch vectors and the ONNX vectors are compared on a few
+        sample texts; if they disagree, we keep using PyTorch.
+        
+        Args:
+            onnx_dir (str): Where ONNX exports are kept
+        """
+        from .onnx_backend import OnnxEncoder, check_parity
+        
+        encoder = OnnxEncoder(self.model, self.model_name, export_dir=onnx_dir)
+        self.parity = check_parity(self.model, encoder)
+        if not self.parity["passed"]:
+            print(f"ONNX embeddings don't match PyTorch (min cosine "
+                  f"{self.parity['min_cosine']:.4f}), staying on PyTorch")
+            return
+        self.model = encoder
+        self.backend = "onnx"
+        print(f"Using int8 ONNX Runtime embeddings (min cosine vs PyTorch "
+              f"{self.parity['min_cosine']:.4f})")
+    
+    @property
+    def dimension(self) -> int:
+        """
+        Number of dimensions in each embedding vector (384 for all-MiniLM-L6-v2).
+        
+        Returns:
+            int: Embedding dimension
+        """
+        return self.model.get_sentence_embedding_dimension()
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
@@ -57,16 +188,87 @@ class HuggingFaceEmbeddingsWrapper(Embeddings):
         This is used when processing documents to store in the vector database.
         Each document becomes a vector (list of numbers).
         
+        This is the LangChain interface; our own code uses
+        embed_documents_array() to skip the conversion to Python lists.
+        
         Args:
             texts (List[str]): List of text documents to embed
             
         Returns:
             List[List[float]]: List of embedding vectors (each is a list of 384 numbers)
         """
-        # Encode all texts at once (more efficient than one-by-one)
-        embeddings = self.model.encode(texts, show_progress_bar=False)
-        # Convert numpy array to Python list
-        return embeddings.tolist()
+        return self.embed_documents_array(texts).tolist()
+    
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Convert a list of documents into a contiguous float32 array.
+        
+        Texts found in the disk cache are read back; the rest are encoded
+        by the model in length-bucketed, memory-capped batches.
+        
+        Args:
+            texts (List[str]): List of text documents to embed
+            
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension),
+                        ready to be passed to FAISS as is
+        """
+        if self.cache is None:
+            return self._encode(texts)
+        
+        # With a cache: only encode the texts we haven't seen before
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        missing = []
+        for i, vector in enumerate(self.cache.get_many(texts)):
+            if vector is None:
+                missing.append(i)
+            else:
+                vectors[i] = vector
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            new_vectors = self._encode(missing_texts)
+            self.cache.put_many(missing_texts, new_vectors)
+            vectors[missing] = new_vectors
+        return vectors
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Run the model over texts in length-sorted, memory-capped batches.
+        
+        Why sort by length? Every text in a batch is padded to the longest
+        one, so mixing short and long texts wastes compute on padding.
+        Sorted, each batch holds texts of similar length. Batches are then
+        grown until batch size × longest text would exceed max_batch_tokens,
+        so batches of short texts are large and batches of long texts small,
+        with the same peak memory.
+        
+        Args:
+            texts (List[str]): Texts to encode
+            
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension), input order
+        """
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return vectors
+        
+        # Estimate tokens from characters (~4 chars per token for English),
+        # capped at the model's maximum sequence length
+        max_seq_length = getattr(self.model, "max_seq_length", None) or 512
+        lengths = [min(len(text) // 4 + 2, max_seq_length) for text in texts]
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+        
+        batch: List[int] = []
+        for i in order + [None]:
+            # i is None after the last text: flush the final batch
+            if batch and (i is None or (len(batch) + 1) * lengths[i] > self.max_batch_tokens):
+                encoded = self.model.encode([texts[j] for j in batch], batch_size=len(batch),
+                                            convert_to_numpy=True, show_progress_bar=False)
+                vectors[batch] = encoded
+                batch = []
+            if i is not None:
+                batch.append(i)
+        return vectors
     
     def embed_query(self, text: str) -> List[float]:
         """
@@ -81,9 +283,42 @@ class HuggingFaceEmbeddingsWrapper(Embeddings):
         Returns:
             List[float]: Embedding vector (list of 384 numbers)
         """
-        # Encode the query (wrapped in a list, then take first element)
-        embedding = self.model.encode([text], show_progress_bar=False)
-        return embedding[0].tolist()
+        # Hot queries (same question, any casing/spacing) come from the cache
+        embedding = self.query_cache.get(text)
+        if embedding is None:
+            # Encode the query (wrapped in a list, then take first element)
+            embedding = self.model.encode([text], show_progress_bar=False)[0]
+            self.query_cache.put(text, embedding)
+        return embedding.tolist()
+    
+    def embed_queries_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Convert many queries into a float32 array in one batched pass.
+        
+        Cached queries are taken from the query cache; all the others are
+        encoded together (one forward pass per length bucket) instead of
+        one model call per query.
+        
+        Args:
+            texts (List[str]): Query texts
+            
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension)
+        """
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        missing = []
+        for i, text in enumerate(texts):
+            cached = self.query_cache.get(text)
+            if cached is None:
+                missing.append(i)
+            else:
+                vectors[i] = cached
+        if missing:
+            encoded = self._encode([texts[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                self.query_cache.put(texts[i], vector)
+            vectors[missing] = encoded
+        return vectors
 
 
 class VectorDB:
@@ -99,32 +334,93 @@ class VectorDB:
     Attributes:
         embeddings (HuggingFaceEmbeddingsWrapper): Embedding model
         vector_store (Optional[FAISS]): The FAISS vector database
+        index_spec (IndexSpec): Which FAISS index family is built, with its parameters
+        vector_column (Optional[VectorColumn]): Exact vectors (memory-mapped after load)
+        bm25 (Optional[BM25Index]): Keyword index over the chunks (built lazily,
+                                    saved and memory-mapped with the store)
+        version (int): Incremented whenever the set of chunks changes
+                       (lets caches tell answers from an older index apart)
+        manifest (dict): Content hashes per document, page and chunk
+                         (used by sync_pdf() for incremental re-ingestion)
         text_splitter (RecursiveCharacterTextSplitter): Splits documents into chunks
     """
     
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 embedding_cache_dir: Optional[str] = None,
+                 index_spec: Optional[IndexSpec] = None,
+                 embeddings: Optional[HuggingFaceEmbeddingsWrapper] = None,
+                 embedding_backend: str = "torch"):
         """
         Initialize the vector database manager.
         
         Args:
             model_name (str): HuggingFace embedding model name
+            embedding_cache_dir (Optional[str]): Directory for the persistent
+                embedding cache (default: None - no cache)
+            index_spec (Optional[IndexSpec]): FAISS index family and parameters
+                (default: exact flat index)
+            embeddings (Optional[HuggingFaceEmbeddingsWrapper]): Already loaded
+                embedding model to share (e.g. between corpus shards). When
+                given, model_name, embedding_cache_dir and embedding_backend
+                are ignored.
+            embedding_backend (str): "torch" or "onnx" (see HuggingFaceEmbeddingsWrapper)
         """
         # Initialize embedding model (converts text to vectors)
-        self.embeddings = HuggingFaceEmbeddingsWrapper(model_name)
+        self.embeddings = embeddings or HuggingFaceEmbeddingsWrapper(
+            model_name, cache_dir=embedding_cache_dir, backend=embedding_backend
+        )
         
         # Vector store will be created when we load/create documents
-        self.vector_store: Optional[FAISS] = None
+        self.vector_store: Optional["FAISS"] = None
+        
+        # Which FAISS index to build (flat, IVF-Flat, IVF-PQ, HNSW)
+        self.index_spec = index_spec or IndexSpec()
+        
+        # Exact vectors by chunk ID (memory-mapped after load()); None means
+        # the FAISS index itself can give them back exactly
+        self.vector_column: Optional[VectorColumn] = None
+        # True while a flat index is memory-mapped straight from disk
+        self._index_read_only = False
+        
+        self.version = 0
+        
+        # BM25 keyword index; None means "out of date, rebuild when needed"
+        self.bm25: Optional[BM25Index] = None
+        # Chunk version (self.version) the BM25 index was built for
+        self._bm25_version = -1
+        # Chunk ID → index position, built on first use (same lifetime as bm25)
+        self._positions: Optional[Dict[str, int]] = None
+        
+        # Manifest of content hashes, saved next to the index:
+        # {"documents": {source: {"file": fingerprint,
+        #                         "pages": {page: page_hash},
+        #                         "chunks": {page: [chunk_id, ...]}}}}
+        self.manifest: dict = {"documents": {}}
         
         # Text splitter configuration
         # Why split? Large documents are hard to search efficiently
         # Chunks allow finding specific relevant parts
+        # Imported here, like faiss and LangChain's FAISS wrapper below: a
+        # process that only imports this module (e.g. for its types) doesn't
+        # pay for them. langchain_core stays a module import - the retriever
+        # and embeddings classes here subclass its base classes.
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,      # Each chunk is ~1000 characters
             chunk_overlap=200,    # 200 characters overlap between chunks (for context)
             length_function=len,  # Use character count for length
+            add_start_index=True, # Offset in the page text, as metadata["start_index"]
         )
     
-    def create_from_pdf(self, pdf_path: str) -> None:
+    def create_from_pdf(
+        self,
+        pdf_path: str,
+        streaming: bool = False,
+        batch_size: int = 64,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+    ) -> None:
         """
         Create vector database from a PDF file.
         
@@ -135,10 +431,22 @@ class VectorDB:
         4. Store in FAISS vector database
         
         This is a one-time operation - the result is saved to disk
-        and loaded on subsequent runs (no re-ingestion).
+        and loaded on subsequent runs (no re-ingestion). When the PDF
+        changes later, use sync_pdf() to re-embed only what changed.
+        
+        For large PDFs use streaming=True: pages are extracted in a process
+        pool and chunks are embedded and added to the index in batches of
+        `batch_size`, so only a few pages and one batch of chunks are held
+        in memory at any time.
         
         Args:
             pdf_path (str): Path to the PDF file to process
+            streaming (bool): Use parallel, batched ingestion (default: False)
+            batch_size (int): Chunks embedded per batch when streaming (default: 64)
+            max_workers (Optional[int]): Extraction processes when streaming
+                                         (default: number of CPUs)
+            progress_callback (Optional[Callable]): Called after every batch as
+                progress_callback(pages_done, total_pages, chunks_done)
             
         Raises:
             FileNotFoundError: If PDF file doesn't exist
@@ -146,36 +454,546 @@ class VectorDB:
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
+        # A fresh store starts with a fresh manifest
+        self.manifest = {"documents": {}}
+        
+        if streaming:
+            print(f"Streaming PDF: {pdf_path}")
+            self.vector_store = self._new_vector_store()
+            stats = self._ingest_pdf(pdf_path, batch_size, max_workers, progress_callback)
+            self._finish_build()
+            print(f"Vector store created successfully! ({stats['chunks_added']} chunks)")
+            return
+        
         # Step 1: Load PDF and extract text
         # PyPDFLoader reads the PDF page by page and extracts text
         print(f"Loading PDF: {pdf_path}")
+        from langchain_community.document_loaders import PyPDFLoader
+        
         loader = PyPDFLoader(pdf_path)
         documents = loader.load()  # Returns list of Document objects (one per page)
+        # Same metadata fields as the streaming path, whatever the loader version adds
+        document, labels = document_metadata(pdf_path)
+        for page in documents:
+            page.metadata = page_metadata(document, labels, page.metadata["page"])
         
         # Step 2: Split documents into smaller chunks
         # Large pages are split into smaller pieces for better search results
+        # Each chunk gets a content-hash ID so later syncs can recognise it
         print(f"Split into chunks...")
-        chunks = self.text_splitter.split_documents(documents)
+        entry = {"file": _file_fingerprint(pdf_path), "pages": {}, "chunks": {}}
+        chunks: List[Document] = []
+        for page in documents:
+            page_chunks = self._split_page(page)
+            page_key = str(page.metadata["page"])
+            entry["pages"][page_key] = _hash_text(page.page_content)
+            entry["chunks"][page_key] = [chunk.metadata["chunk_id"] for chunk in page_chunks]
+            chunks.extend(page_chunks)
         print(f"Created {len(chunks)} chunks")
         
         # Step 3: Create vector store from chunks
         # This converts each chunk to an embedding and stores in FAISS
         # FAISS is optimized for fast similarity search
         print("Creating vector store...")
-        self.vector_store = FAISS.from_documents(chunks, self.embeddings)
+        self.vector_store = self._new_vector_store()
+        self._add_chunks(chunks)
+        self.manifest["documents"][pdf_path] = entry
+        self._finish_build()
         print("Vector store created successfully!")
     
+    def sync_pdf(
+        self,
+        pdf_path: str,
+        batch_size: int = 64,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Bring the vector store up to date with a (possibly edited) PDF.
+        
+        Uses the manifest of content hashes to do as little work as possible:
+        - File unchanged (same size/mtime or same SHA-256) → nothing to do
+        - Page text unchanged → its chunks are kept as they are
+        - Page text changed → page is re-split; only chunks whose content
+          hash is new get embedded
+        - Chunks that no longer exist are deleted from FAISS and the docstore
+        
+        If the store is empty, or was built before manifests existed, the
+        PDF is ingested from scratch (in streaming mode).
+        
+        Args:
+            pdf_path (str): Path to the PDF file to sync
+            batch_size (int): Chunks embedded per batch (default: 64)
+            max_workers (Optional[int]): Extraction processes (default: number of CPUs)
+            progress_callback (Optional[Callable]): See create_from_pdf()
+            
+        Returns:
+            Dict[str, int]: Counts of pages, pages_changed, chunks_added,
+                            chunks_kept and chunks_removed
+            
+        Raises:
+            FileNotFoundError: If PDF file doesn't exist
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        entry = self.manifest["documents"].get(pdf_path)
+        if self.vector_store is None or entry is None:
+            # Nothing we can diff against - build it from scratch
+            print(f"No manifest entry for {pdf_path}, ingesting it from scratch...")
+            self.create_from_pdf(pdf_path, streaming=True, batch_size=batch_size,
+                                 max_workers=max_workers, progress_callback=progress_callback)
+            return self.manifest_stats(pdf_path)
+        
+        # Cheap check first: same size and mtime means the file wasn't touched,
+        # otherwise the SHA-256 decides (a touched but unedited file is unchanged)
+        fingerprint = _file_fingerprint(pdf_path, entry.get("file"))
+        if fingerprint["sha256"] == entry.get("file", {}).get("sha256"):
+            entry["file"] = fingerprint
+            print(f"{pdf_path} is unchanged, nothing to re-ingest")
+            return {"pages": len(entry["pages"]), "pages_changed": 0, "chunks_added": 0,
+                    "chunks_kept": sum(len(ids) for ids in entry["chunks"].values()),
+                    "chunks_removed": 0}
+        
+        print(f"Re-ingesting changed pages of {pdf_path}...")
+        stats = self._ingest_pdf(pdf_path, batch_size, max_workers, progress_callback, fingerprint)
+        print(f"Sync done: {stats['pages_changed']}/{stats['pages']} pages changed, "
+              f"{stats['chunks_added']} chunks added, {stats['chunks_removed']} removed")
+        return stats
+    
+    def manifest_stats(self, pdf_path: str) -> Dict[str, int]:
+        """
+        Summarise the manifest entry of a document as sync_pdf()-style stats.
+        
+        Args:
+            pdf_path (str): Source path of the document
+            
+        Returns:
+            Dict[str, int]: Stats describing a full ingestion of the document
+        """
+        entry = self.manifest["documents"].get(pdf_path, {"pages": {}, "chunks": {}})
+        chunk_count = sum(len(ids) for ids in entry["chunks"].values())
+        return {"pages": len(entry["pages"]), "pages_changed": len(entry["pages"]),
+                "chunks_added": chunk_count, "chunks_kept": 0, "chunks_removed": 0}
+    
+    def _ingest_pdf(
+        self,
+        pdf_path: str,
+        batch_size: int,
+        max_workers: Optional[int],
+        progress_callback: Optional[Callable[[int, int, int], None]],
+        fingerprint: Optional[dict] = None,
+    ) -> Dict[str, int]:
+        """
+        Streaming, incremental ingestion of one PDF into self.vector_store.
+        
+        Pages arrive from the extraction pool in order. Each page is hashed
+        and compared with the manifest; changed pages are split into chunks
+        right away, and every `batch_size` new chunks are embedded and added
+        to the index. Pages and chunk text are dropped as soon as they are
+        indexed, so peak memory is the index itself plus one batch.
+        
+        With no manifest entry for the PDF every page counts as changed,
+        which makes this a full streaming build.
+        
+        Args:
+            pdf_path (str): Path to the PDF file to process
+            batch_size (int): Chunks embedded per batch
+            max_workers (Optional[int]): Extraction processes
+            progress_callback (Optional[Callable]): See create_from_pdf()
+            fingerprint (Optional[dict]): File fingerprint, if already computed
+            
+        Returns:
+            Dict[str, int]: See sync_pdf()
+        """
+        document, labels = document_metadata(pdf_path)
+        total_pages = len(labels)
+        previous = self.manifest["documents"].get(pdf_path, {"pages": {}, "chunks": {}})
+        existing_ids = set(self.vector_store.index_to_docstore_id.values())
+        entry = {"file": fingerprint or _file_fingerprint(pdf_path), "pages": {}, "chunks": {}}
+        stats = {"pages": 0, "pages_changed": 0, "chunks_added": 0, "chunks_kept": 0, "chunks_removed": 0}
+        pending_chunks: List[Document] = []
+        
+        for page_number, text in iter_pages(pdf_path, max_workers=max_workers):
+            page_key = str(page_number)
+            page_hash = _hash_text(text)
+            entry["pages"][page_key] = page_hash
+            stats["pages"] += 1
+            
+            if previous["pages"].get(page_key) == page_hash:
+                # Unchanged page - its chunks are already embedded
+                entry["chunks"][page_key] = previous["chunks"].get(page_key, [])
+                stats["chunks_kept"] += len(entry["chunks"][page_key])
+                continue
+            
+            # Changed or new page: split it and queue chunks we don't have yet
+            # Same metadata as the PyPDFLoader path, so citations look identical
+            stats["pages_changed"] += 1
+            page = Document(page_content=text, metadata=page_metadata(document, labels, page_number))
+            page_chunks = self._split_page(page)
+            entry["chunks"][page_key] = [chunk.metadata["chunk_id"] for chunk in page_chunks]
+            for chunk in page_chunks:
+                if chunk.metadata["chunk_id"] in existing_ids:
+                    stats["chunks_kept"] += 1
+                else:
+                    pending_chunks.append(chunk)
+            
+            # Embed and index whole batches as soon as they are ready
+            while len(pending_chunks) >= batch_size:
+                self._add_chunks(pending_chunks[:batch_size])
+                stats["chunks_added"] += batch_size
+                pending_chunks = pending_chunks[batch_size:]
+                self._report_progress(stats["pages"], total_pages, stats["chunks_added"], progress_callback)
+        
+        # Index whatever is left over (the last, partial batch)
+        if pending_chunks:
+            self._add_chunks(pending_chunks)
+            stats["chunks_added"] += len(pending_chunks)
+        self._report_progress(stats["pages"], total_pages, stats["chunks_added"], progress_callback)
+        
+        # Delete vectors of chunks that disappeared (edited text, removed pages)
+        new_ids = {chunk_id for ids in entry["chunks"].values() for chunk_id in ids}
+        old_ids = {chunk_id for ids in previous["chunks"].values() for chunk_id in ids}
+        stale_ids = [chunk_id for chunk_id in old_ids - new_ids if chunk_id in existing_ids]
+        if stale_ids:
+            self._delete_chunks(stale_ids)
+        stats["chunks_removed"] = len(stale_ids)
+        
+        self.manifest["documents"][pdf_path] = entry
+        return stats
+    
+    def _split_page(self, page: Document) -> List[Document]:
+        """
+        Split one page into chunks and give each chunk a content-hash ID.
+        
+        The ID is a hash of (source, page, chunk text), plus a counter for
+        the rare case of identical chunks on the same page. Unchanged
+        chunks therefore keep their ID across re-ingestion, which is what
+        lets sync_pdf() skip them. The ID is also stored in the chunk's
+        metadata as "chunk_id", next to the splitter's "start_index" (the
+        chunk's offset in the page text).
+        
+        Args:
+            page (Document): One PDF page with "source" and "page" metadata
+            
+        Returns:
+            List[Document]: Chunks of the page, each with metadata["chunk_id"]
+        """
+        chunks = self.text_splitter.split_documents([page])
+        seen: Dict[str, int] = {}
+        for chunk in chunks:
+            key = f"{page.metadata['source']}\0{page.metadata['page']}\0{chunk.page_content}"
+            occurrence = seen.get(key, 0)
+            seen[key] = occurrence + 1
+            chunk.metadata["chunk_id"] = _hash_text(f"{key}\0{occurrence}")[:32]
+        return chunks
+    
+    def _new_vector_store(self) -> "FAISS":
+        """
+        Create an empty FAISS vector store using our embedding model.
+        
+        New stores always start with a flat index: it needs no training, so
+        chunks can be added as they stream in. _finish_build() then converts
+        it to the index family in self.index_spec.
+        
+        Returns:
+            FAISS: Empty vector store (flat L2 index, in-memory docstore)
+        """
+        import faiss
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_community.vectorstores import FAISS
+        
+        self.vector_column = None
+        self._chunks_changed()
+        index = faiss.IndexFlatL2(self.embeddings.dimension)
+        return FAISS(self.embeddings, index, InMemoryDocstore(), {})
+    
+    def _finish_build(self) -> None:
+        """
+        Convert a freshly ingested flat index to the configured index family.
+        """
+        if self.index_spec.kind != "flat":
+            self.build_index()
+    
+    def build_index(self, index_spec: Optional[IndexSpec] = None) -> None:
+        """
+        (Re)build the FAISS index from the vectors already in the store.
+        
+        Steps:
+        1. Read every vector back from the current index
+        2. Build the index described by the spec (training IVF on a sample)
+        3. Add all vectors in their original order, so the docstore
+           mapping stays valid - nothing is re-embedded
+        
+        Use it to switch index families (e.g. flat → HNSW) on an existing store.
+        Note: vectors read back from an IVF-PQ index are approximations, so
+        rebuild a PQ store by re-ingesting rather than with this method.
+        
+        Args:
+            index_spec (Optional[IndexSpec]): New spec (default: keep self.index_spec)
+            
+        Raises:
+            ValueError: If vector store hasn't been initialized
+        """
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized. Load or create one first.")
+        if index_spec is not None:
+            self.index_spec = index_spec
+        
+        vectors = self._all_vectors()
+        print(f"Building {self.index_spec.factory_string(len(vectors))} index over {len(vectors)} vectors...")
+        index = self.index_spec.build(self.embeddings.dimension, vectors)
+        # Add in slices to keep the temporary copies small
+        for start in range(0, len(vectors), 65536):
+            index.add(np.ascontiguousarray(vectors[start:start + 65536]))
+        
+        # PQ only keeps compressed codes, so hold on to the exact vectors
+        # (needed by save() and by future rebuilds)
+        if self.index_spec.kind == "ivf_pq" and self.vector_column is None:
+            self.vector_column = VectorColumn(np.array(vectors), self._ids_in_index_order())
+        self.vector_store.index = index
+        self._index_read_only = False
+    
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+        """
+        Tune search-time parameters without rebuilding the index.
+        
+        Higher values → more accurate but slower queries.
+        
+        Args:
+            nprobe (Optional[int]): IVF clusters scanned per query
+            ef_search (Optional[int]): HNSW search depth per query
+        """
+        if nprobe is not None:
+            self.index_spec.nprobe = nprobe
+        if ef_search is not None:
+            self.index_spec.ef_search = ef_search
+        if self.vector_store is not None:
+            self.index_spec.apply_search_params(self.vector_store.index)
+    
+    def _ids_in_index_order(self) -> List[str]:
+        """
+        Chunk IDs ordered by their position in the FAISS index.
+        
+        Returns:
+            List[str]: One chunk ID per indexed vector
+        """
+        mapping = self.vector_store.index_to_docstore_id
+        return [mapping[i] for i in range(len(mapping))]
+    
+    def _all_vectors(self) -> np.ndarray:
+        """
+        Exact vectors of every chunk, in index order.
+        
+        Taken from the vector column when it has them (a loaded store returns
+        its memory-mapped file without copying), otherwise read back out of
+        the FAISS index.
+        
+        Returns:
+            np.ndarray: float32 array of shape (ntotal, dimension)
+        """
+        ids = self._ids_in_index_order()
+        if self.vector_column is not None and all(chunk_id in self.vector_column for chunk_id in ids):
+            return self.vector_column.get(ids)
+        
+        import faiss
+        
+        index = self.vector_store.index
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            # IVF indexes need a direct map (id → list position) to reconstruct;
+            # drop it afterwards because it blocks remove_ids()
+            ivf.make_direct_map()
+            vectors = index.reconstruct_n(0, index.ntotal)
+            ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+        else:
+            vectors = index.reconstruct_n(0, index.ntotal)
+        
+        # Prefer exact column vectors over (possibly compressed) index ones
+        if self.vector_column is not None:
+            for position, chunk_id in enumerate(ids):
+                if chunk_id in self.vector_column:
+                    vectors[position] = self.vector_column.get([chunk_id])[0]
+        return vectors
+    
+    def _chunks_changed(self) -> None:
+        """Invalidate everything derived from the set of chunks (BM25, positions)."""
+        self.bm25 = None
+        self._positions = None
+        self.version += 1
+    
+    def get_document_vectors(self, docs: List[Document]) -> np.ndarray:
+        """
+        Stored vectors of retrieved chunks (nothing is re-embedded).
+        
+        Vectors come from the exact vector column when there is one, else
+        from the FAISS index. Indexes that can't give vectors back cheaply
+        (IVF) and chunks without an ID fall back to the embedding model,
+        whose disk cache usually has them.
+        
+        Args:
+            docs (List[Document]): Chunks returned by a search of this store
+            
+        Returns:
+            np.ndarray: float32 array of shape (len(docs), dimension)
+        """
+        if self._positions is None:
+            self._positions = {chunk_id: position
+                               for position, chunk_id in self.vector_store.index_to_docstore_id.items()}
+        index = self.vector_store.index
+        can_reconstruct = self.index_spec.kind in ("flat", "hnsw")
+        
+        vectors = np.empty((len(docs), self.embeddings.dimension), dtype=np.float32)
+        missing = []
+        for i, doc in enumerate(docs):
+            chunk_id = doc.metadata.get("chunk_id") or doc.id
+            if self.vector_column is not None and chunk_id in self.vector_column:
+                vectors[i] = self.vector_column.get([chunk_id])[0]
+            elif can_reconstruct and chunk_id in self._positions:
+                vectors[i] = index.reconstruct(self._positions[chunk_id])
+            else:
+                missing.append(i)
+        if missing:
+            vectors[missing] = self.embeddings.embed_documents_array([docs[i].page_content for i in missing])
+        return vectors
+    
+    def _ensure_writable_index(self) -> None:
+        """
+        Swap a memory-mapped (read-only) flat index for an in-memory copy.
+        
+        Mapped indexes can be searched but not modified, so this runs before
+        the first add/delete after load(). Read-only services never pay for it.
+        """
+        if not self._index_read_only:
+            return
+        import faiss
+        
+        index = faiss.IndexFlatL2(self.embeddings.dimension)
+        index.add(np.ascontiguousarray(self._all_vectors()))
+        self.vector_store.index = index
+        self._index_read_only = False
+    
+    def _delete_chunks(self, chunk_ids: List[str]) -> None:
+        """
+        Delete chunks from the FAISS index and the docstore.
+        
+        Only flat indexes remove in place. For the others the remaining
+        vectors are added again, in order, so index positions keep matching
+        the docstore mapping: IVF indexes are emptied and refilled (their
+        trained centroids are kept - no re-training), HNSW indexes are
+        rebuilt.
+        
+        Args:
+            chunk_ids (List[str]): IDs of the chunks to delete
+        """
+        self._ensure_writable_index()
+        self._chunks_changed()
+        if self.vector_column is not None:
+            self.vector_column.remove(chunk_ids)
+        if self.index_spec.supports_removal:
+            self.vector_store.delete(chunk_ids)
+            return
+        
+        to_delete = set(chunk_ids)
+        keep = [(position, chunk_id)
+                for position, chunk_id in sorted(self.vector_store.index_to_docstore_id.items())
+                if chunk_id not in to_delete]
+        vectors = self._all_vectors()[[position for position, _ in keep]]
+        if self.index_spec.needs_training:
+            index = self.vector_store.index
+            index.reset()
+        else:
+            index = self.index_spec.build(self.embeddings.dimension, vectors)
+        index.add(np.ascontiguousarray(vectors))
+        self.vector_store.index = index
+        self.vector_store.docstore.delete(chunk_ids)
+        self.vector_store.index_to_docstore_id = {i: chunk_id for i, (_, chunk_id) in enumerate(keep)}
+    
+    def _add_chunks(self, chunks: List[Document]) -> None:
+        """
+        Embed a batch of chunks and add them to the vector store.
+        
+        The embeddings stay one contiguous float32 array from the model to
+        the FAISS index (LangChain's add_embeddings() would take them as
+        Python lists and convert them back).
+        
+        Args:
+            chunks (List[Document]): Chunks to embed and index
+        """
+        self._ensure_writable_index()
+        self._chunks_changed()
+        ids = [chunk.metadata["chunk_id"] for chunk in chunks]
+        vectors = self.embeddings.embed_documents_array([chunk.page_content for chunk in chunks])
+        
+        # Same bookkeeping as FAISS.add_embeddings(): index, docstore, position → ID
+        store = self.vector_store
+        start = store.index.ntotal
+        store.index.add(vectors)
+        store.docstore.add({
+            chunk_id: Document(id=chunk_id, page_content=chunk.page_content, metadata=chunk.metadata)
+            for chunk_id, chunk in zip(ids, chunks)
+        })
+        store.index_to_docstore_id.update({start + i: chunk_id for i, chunk_id in enumerate(ids)})
+        
+        if self.vector_column is not None:
+            self.vector_column.add(ids, vectors)
+    
+    @staticmethod
+    def _report_progress(
+        pages_done: int,
+        total_pages: int,
+        chunks_done: int,
+        progress_callback: Optional[Callable[[int, int, int], None]],
+    ) -> None:
+        """
+        Print ingestion progress and forward it to the optional callback.
+        
+        Args:
+            pages_done (int): Pages extracted and chunked so far
+            total_pages (int): Total pages in the PDF
+            chunks_done (int): Chunks embedded and indexed so far
+            progress_callback (Optional[Callable]): See create_from_pdf()
+        """
+        print(f"  {pages_done}/{total_pages} pages, {chunks_done} chunks indexed")
+        if progress_callback is not None:
+            progress_callback(pages_done, total_pages, chunks_done)
+    
+    @staticmethod
+    def store_exists(path: str) -> bool:
+        """
+        Check whether a vector store (new or legacy format) exists at `path`.
+        
+        Args:
+            path (str): Vector store directory
+            
+        Returns:
+            bool: True if load() can load it
+        """
+        legacy = all(os.path.exists(os.path.join(path, name)) for name in ("index.faiss", "index.pkl"))
+        return store_exists(path) or legacy
+    
     def save(self, save_path: str) -> None:
         """
         Save vector store to disk for persistence.
         
-        Saves two files:
-        - index.faiss: The vector data
-        - index.pkl: Metadata (document text, page numbers, etc.)
+        Uses a pickle-free, columnar format (see columnar_store.py):
+        - vectors.f32: Raw float32 vectors
+        - chunks.dat / chunks.idx: Chunk text + metadata, offset-indexed
+        - ids.txt, store.json: Chunk IDs and format header
+        - index.faiss: The FAISS index
+        - manifest.json: Content hashes used by sync_pdf()
+        - index_spec.json: Index family and parameters (restored by load())
+        - bm25*: BM25 keyword index (see bm25_index.py)
         
         This allows us to load the vector store on next startup
         without re-processing the PDF (much faster!).
         
+        The files are written to a sibling directory that is renamed into
+        place once complete (see replace_directory()), so a crash never
+        leaves an old index next to a new header or docstore. Anything else
+        in the directory is replaced with it - including the pickle of the
+        old format, so it can never be loaded by mistake.
+        
         Args:
             save_path (str): Directory path where to save the vector store
             
@@ -185,17 +1003,29 @@ class VectorDB:
         if self.vector_store is None:
             raise ValueError("No vector store to save. Create one first.")
         
-        # Create directory if it doesn't exist
-        os.makedirs(save_path, exist_ok=True)
-        # Save to disk
-        self.vector_store.save_local(save_path)
+        save_path = os.path.normpath(save_path)
+        os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
+        staging = f"{save_path}.tmp-{uuid.uuid4().hex[:12]}"
+        try:
+            ids = self._ids_in_index_order()
+            write_store(staging, self.vector_store.index, ids, self.vector_store.docstore, self._all_vectors())
+            with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+                json.dump(self.manifest, f)
+            self.index_spec.save(os.path.join(staging, INDEX_SPEC_FILE))
+            self._keyword_index().save(staging)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        replace_directory(staging, save_path)
         print(f"Vector store saved to {save_path}")
     
     def load(self, load_path: str) -> None:
         """
         Load vector store from disk.
         
-        This is much faster than creating from PDF (takes < 2 seconds vs minutes).
+        Stores are memory-mapped, not read: loading takes milliseconds,
+        chunk text is only decoded when retrieved, and processes loading
+        the same store share its pages. Flat indexes are mapped too.
         The vector store must have been previously saved using save().
         
         Args:
@@ -204,20 +1034,52 @@ class VectorDB:
         Raises:
             FileNotFoundError: If vector store doesn't exist at the path
         """
-        if not os.path.exists(load_path):
+        if not self.store_exists(load_path):
             raise FileNotFoundError(f"Vector store not found at {load_path}")
+        from langchain_community.vectorstores import FAISS
         
-        # Load from disk
-        # allow_dangerous_deserialization=True is needed for FAISS to load
-        # (it's safe as long as you trust the source of the files)
-        self.vector_store = FAISS.load_local(
-            load_path, 
-            self.embeddings,  # Need embeddings to decode the vectors
-            allow_dangerous_deserialization=True
-        )
+        # Restore the index spec first (stores without one are flat) -
+        # it decides whether the FAISS index can be memory-mapped
+        self.index_spec = IndexSpec.load(os.path.join(load_path, INDEX_SPEC_FILE)) or IndexSpec()
+        
+        if store_exists(load_path):
+            mmap_index = self.index_spec.kind == "flat"
+            index, docstore, index_to_docstore_id, self.vector_column = read_store(load_path, mmap_index)
+            self.vector_store = FAISS(self.embeddings, index, docstore, index_to_docstore_id)
+            self._index_read_only = mmap_index
+            self._chunks_changed()
+            self.bm25 = BM25Index.load(load_path, self._ids_in_index_order())
+            self._bm25_version = self.version
+        else:
+            # Legacy format (index.pkl) - the next save() converts it
+            # allow_dangerous_deserialization=True is needed for FAISS to load
+            # (it's safe as long as you trust the source of the files)
+            print("Loading legacy pickle vector store (will be converted on next save)...")
+            self.vector_store = FAISS.load_local(
+                load_path, 
+                self.embeddings,  # Need embeddings to decode the vectors
+                allow_dangerous_deserialization=True
+            )
+            self.vector_column = None
+            self._index_read_only = False
+            self._chunks_changed()
+        
+        # Search parameters aren't saved with the FAISS index
+        self.index_spec.apply_search_params(self.vector_store.index)
+        
+        # Stores saved before manifests existed get an empty one; sync_pdf()
+        # then rebuilds them once from scratch
+        manifest_path = os.path.join(load_path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"documents": {}}
         print(f"Vector store loaded from {load_path}")
     
-    def get_retriever(self, k: int = 4):
+    def get_retriever(self, k: int = 4, search_type: str = "similarity",
+                      reranker: Optional[Any] = None, selector: Optional[Any] = None,
+                      fetch_k: int = 20):
         """
         Get a retriever object for searching the vector database.
         
@@ -227,9 +1089,16 @@ class VectorDB:
         Args:
             k (int): Number of documents to retrieve (default: 4)
                     This is the "top k" most similar documents
+            search_type (str): "similarity" (vectors only) or "hybrid"
+                    (vectors + BM25 keywords, fused) (default: "similarity")
+            reranker (Optional[CrossEncoderReranker]): If given, fetch_k
+                    candidates are retrieved and re-ranked down to k
+            selector (Optional[ContextSelector]): If given, picks k diverse
+                    chunks (MMR) from the candidates and merges overlapping ones
+            fetch_k (int): Candidates retrieved for the re-ranker/selector (default: 20)
             
         Returns:
-            VectorStoreRetriever: Retriever object for searching
+            VectorDBRetriever: Retriever object for searching
             
         Raises:
             ValueError: If vector store hasn't been initialized
@@ -238,7 +1107,8 @@ class VectorDB:
             raise ValueError("Vector store not initialized. Load or create one first.")
         
         # Create retriever with k documents to return
-        return self.vector_store.as_retriever(search_kwargs={"k": k})
+        return VectorDBRetriever(store=self, k=k, search_type=search_type,
+                                 reranker=reranker, selector=selector, fetch_k=fetch_k)
     
     def similarity_search(self, query: str, k: int = 4):
         """
@@ -261,4 +1131,260 @@ class VectorDB:
         
         # Convert query to embedding, find k most similar document embeddings
         return self.vector_store.similarity_search(query, k=k)
+    
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """
+        Similarity search that also returns each chunk's L2 distance.
+        
+        Args:
+            query (str): Search query text
+            k (int): Number of similar documents to return
+            
+        Returns:
+            List[Tuple[Document, float]]: (chunk, distance) pairs, closest first
+                                          (lower distance = more similar)
+        """
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k)
+    
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        """
+        Similarity search for an already embedded query.
+        
+        Args:
+            embedding (List[float]): Query embedding
+            k (int): Number of similar documents to return
+            
+        Returns:
+            List[Tuple[Document, float]]: (chunk, distance) pairs, closest first
+            
+        Raises:
+            ValueError: If vector store hasn't been initialized
+        """
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized")
+        return self.vector_store.similarity_search_with_score_by_vector(embedding, k=k)
+    
+    def similarity_search_batch(self, queries: List[str], k: int = 4
+                                ) -> List[List[Tuple[Document, float]]]:
+        """
+        Similarity search for many queries at once.
+        
+        All queries are embedded in one batched pass and searched with a
+        single FAISS call on the whole query matrix, which is much faster
+        than calling similarity_search_with_score() in a loop.
+        
+        Args:
+            queries (List[str]): Search query texts
+            k (int): Number of similar documents to return per query
+            
+        Returns:
+            List[List[Tuple[Document, float]]]: For each query (same order),
+                (chunk, L2 distance) pairs, closest first
+        """
+        return self.similarity_search_batch_by_vectors(self.embeddings.embed_queries_array(queries), k)
+    
+    def similarity_search_batch_by_vectors(self, embeddings: np.ndarray, k: int = 4
+                                           ) -> List[List[Tuple[Document, float]]]:
+        """
+        Similarity search for a matrix of already embedded queries.
+        
+        Args:
+            embeddings (np.ndarray): float32 array, one query per row
+            k (int): Number of similar documents to return per query
+            
+        Returns:
+            List[List[Tuple[Document, float]]]: Per-query (chunk, distance) pairs
+            
+        Raises:
+            ValueError: If vector store hasn't been initialized
+        """
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized")
+        if len(embeddings) == 0:
+            return []
+        store = self.vector_store
+        distances, positions = store.index.search(np.ascontiguousarray(embeddings, dtype=np.float32), k)
+        
+        results = []
+        for row_distances, row_positions in zip(distances, positions):
+            # FAISS pads with -1 when the index holds fewer than k vectors
+            results.append([
+                (store.docstore.search(store.index_to_docstore_id[int(position)]), float(distance))
+                for distance, position in zip(row_distances, row_positions) if position != -1
+            ])
+        return results
+    
+    def _keyword_index(self) -> BM25Index:
+        """
+        The BM25 index, (re)built first if chunks changed since it was built.
+        
+        Validity is one integer comparison (the chunk version), so queries
+        never touch the per-chunk lists.
+        
+        Returns:
+            BM25Index: Keyword index over every chunk in the store
+        """
+        if self.bm25 is None or self._bm25_version != self.version:
+            ids = self._ids_in_index_order()
+            docstore = self.vector_store.docstore
+            self.bm25 = BM25Index.build(ids, [docstore.search(chunk_id).page_content for chunk_id in ids])
+            self._bm25_version = self.version
+        return self.bm25
+    
+    def keyword_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """
+        BM25 keyword search.
+        
+        Finds chunks containing the query's exact terms (names, acronyms,
+        numbers) that vector search can miss.
+        
+        Args:
+            query (str): Search query text
+            k (int): Number of documents to return
+            
+        Returns:
+            List[Tuple[Document, float]]: (chunk, BM25 score) pairs, best first
+                                          (higher score = better match)
+            
+        Raises:
+            ValueError: If vector store hasn't been initialized
+        """
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized")
+        docstore = self.vector_store.docstore
+        return [(docstore.search(chunk_id), score) for chunk_id, score in self._keyword_index().search(query, k)]
+    
+    def hybrid_search(self, query: str, k: int = 4, fetch_k: int = 20, rrf_k: int = 60,
+                      timings: Optional[Dict[str, float]] = None) -> List[Tuple[Document, float]]:
+        """
+        Hybrid search: vector and BM25 results fused with reciprocal rank fusion.
+        
+        Both searches return their top fetch_k chunks; a chunk ranked high
+        by either one (or fairly high by both) ends up in the top k.
+        
+        Args:
+            query (str): Search query text
+            k (int): Number of documents to return
+            fetch_k (int): Candidates taken from each search (default: 20)
+            rrf_k (int): RRF damping constant (default: 60)
+            timings (Optional[Dict[str, float]]): If given, milliseconds spent in
+                "faiss_search", "bm25_search" and "fusion" are stored in it
+            
+        Returns:
+            List[Tuple[Document, float]]: (chunk, fused score) pairs, best first
+        """
+        return run_hybrid_search(self, query, k, fetch_k, rrf_k, timings)
+
 
+def run_hybrid_search(store: Any, query: str, k: int, fetch_k: int, rrf_k: int,
+                      timings: Optional[Dict[str, float]] = None) -> List[Tuple[Document, float]]:
+    """
+    Vector and BM25 search of a VectorDB or CorpusDB, fused with RRF.
+    
+    Each part is timed on its own, so a slow BM25 index or fusion doesn't
+    show up as slow vector search.
+    
+    Args:
+        store (Any): VectorDB or CorpusDB
+        query (str): Search query text
+        k (int): Number of documents to return
+        fetch_k (int): Candidates taken from each search
+        rrf_k (int): RRF damping constant
+        timings (Optional[Dict[str, float]]): If given, milliseconds spent in
+            "faiss_search", "bm25_search" and "fusion" are stored in it
+        
+    Returns:
+        List[Tuple[Document, float]]: (chunk, fused score) pairs, best first
+    """
+    timings = timings if timings is not None else {}
+    start = time.perf_counter()
+    dense = store.similarity_search_with_score(query, fetch_k)
+    timings["faiss_search"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    sparse = store.keyword_search_with_score(query, fetch_k)
+    timings["bm25_search"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    results = fuse_results([dense, sparse], k, rrf_k)
+    timings["fusion"] = (time.perf_counter() - start) * 1000
+    return results
+
+
+class VectorDBRetriever(BaseRetriever):
+    """
+    LangChain retriever over anything with similarity_search(query, k) and
+    hybrid_search(query, k) methods - a single VectorDB or a multi-document
+    CorpusDB.
+    
+    Attributes:
+        store (Any): VectorDB or CorpusDB to search
+        k (int): Number of documents to retrieve
+        search_type (str): "similarity" or "hybrid" (vectors + BM25)
+        reranker (Any): Optional CrossEncoderReranker applied to fetch_k candidates
+        selector (Any): Optional ContextSelector (MMR + overlap merging)
+        fetch_k (int): Candidates retrieved before re-ranking / selection
+    """
+    
+    store: Any
+    k: int = 4
+    search_type: str = "similarity"
+    reranker: Any = None
+    selector: Any = None
+    fetch_k: int = 20
+    
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        """
+        Return the k chunks that best match the query.
+        
+        Args:
+            query (str): Search query text
+            run_manager (CallbackManagerForRetrieverRun): LangChain callbacks
+            
+        Returns:
+            List[Document]: Best matching chunks
+        """
+        return [doc for doc, _ in self.retrieve_with_scores(query)]
+    
+    def retrieve_with_scores(self, query: str, timings: Optional[Dict[str, float]] = None
+                             ) -> List[Tuple[Document, Optional[float]]]:
+        """
+        Return the k best chunks with the score of the last stage that ranked them.
+        
+        Scores are L2 distances (similarity search), RRF scores (hybrid) or
+        cross-encoder scores (re-ranked).
+        
+        Args:
+            query (str): Search query text
+            timings (Optional[Dict[str, float]]): If given, milliseconds spent in
+                "faiss_search" (query embedding and FAISS), "bm25_search" and
+                "fusion" (hybrid only), "rerank" and "select" are stored in it
+            
+        Returns:
+            List[Tuple[Document, Optional[float]]]: (chunk, score) pairs, best first
+        """
+        timings = timings if timings is not None else {}
+        # With a re-ranker or selector: over-fetch, then narrow down to k
+        k = self.fetch_k if self.reranker is not None or self.selector is not None else self.k
+        if self.search_type == "hybrid":
+            results = self.store.hybrid_search(query, k=k, timings=timings)
+        else:
+            start = time.perf_counter()
+            results = self.store.similarity_search_with_score(query, k=k)
+            timings["faiss_search"] = (time.perf_counter() - start) * 1000
+        if self.reranker is not None:
+            # Leave the selector a few extra candidates to diversify from
+            start = time.perf_counter()
+            keep = self.k * 2 if self.selector is not None else self.k
+            results = self.reranker.rerank(query, [doc for doc, _ in results], keep)
+            timings["rerank"] = (time.perf_counter() - start) * 1000
+        if self.selector is not None:
+            # Merged chunks keep the key (and so the score) of their best part
+            start = time.perf_counter()
+            scores = {document_key(doc): score for doc, score in results}
+            docs = self.selector.select(query, [doc for doc, _ in results], self.k, self.store)
+            results = [(doc, scores.get(document_key(doc))) for doc in docs]
+            timings["select"] = (time.perf_counter() - start) * 1000
+        return [(doc, None if score is None else float(score)) for doc, score in results]
@@ -0,0 +1,133 @@
+"""
+Shared fixtures for the tests.
+
+The tests run without network access or model downloads:
+- HashingEncoder stands in for the SentenceTransformer model (bag of
+  hashed words, so texts sharing words get similar vectors)
+- write_pdf() generates small text PDFs for the ingestion paths
+
+Author: Project 1 - LLM Practice Projects
+"""
+
+import re
+import sys
+import types
+import zlib
+from typing import List
+
+import numpy as np
+import pytest
+
+DIMENSION = 64
+
+TOPICS = [
+    "Product metrics tell a product manager whether a feature works. Activation, retention "
+    "and revenue are the metrics most interviews ask about.",
+    "Estimation questions test structured thinking. Break the market into segments, state "
+    "every assumption and sanity-check the final number.",
+    "Behavioral questions are answered with stories. Describe the situation, the task, the "
+    "actions you took and the result you achieved.",
+    "Prioritization weighs impact against effort. A roadmap orders features by the value "
+    "they bring to users and to the business.",
+    "Pricing decisions balance willingness to pay, costs and competition. Tiered plans let "
+    "different customers pay for the value they use.",
+    "Product design questions start with the user. Pick a segment, list its pain points and "
+    "propose solutions before discussing trade-offs.",
+]
+
+
+class HashingEncoder:
+    """Deterministic stand-in for a SentenceTransformer model."""
+
+    max_seq_length = 256
+
+    def __init__(self, model_name: str = "hashing", *args, **kwargs):
+        self.model_name = model_name
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIMENSION
+
+    def encode(self, texts: List[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               show_progress_bar: bool = False) -> np.ndarray:
+        vectors = np.zeros((len(texts), DIMENSION), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, zlib.crc32(word.encode("utf-8")) % DIMENSION] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+
+def write_pdf(path: str, pages: List[str]) -> str:
+    """
+    Write a PDF with one text page per string (lines wrapped at 90 characters).
+
+    Args:
+        path (str): Output file
+        pages (List[str]): Text of each page
+
+    Returns:
+        str: path
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        lines, line = [], ""
+        for word in text.split():
+            if line and len(line) + len(word) + 1 > 90:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+        escaped = [l.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for l in lines]
+        stream = ("BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({l}) Tj T*" for l in escaped) + " ET").encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content)
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(bytes(data))
+    return path
+
+
+def book_pages(count: int = 4) -> List[str]:
+    """Pages of a small sample book (several chunks per page)."""
+    return [" ".join(TOPICS[(page + i) % len(TOPICS)] for i in range(12)) for page in range(count)]
+
+
+@pytest.fixture
+def hashing_model(monkeypatch):
+    """Make HuggingFaceEmbeddingsWrapper load HashingEncoder instead of a real model."""
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = HashingEncoder
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+    return HashingEncoder
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    """A 4-page text PDF."""
+    return write_pdf(str(tmp_path / "book.pdf"), book_pages())
+
+
+@pytest.fixture
+def vector_db(hashing_model, sample_pdf):
+    """A VectorDB built from sample_pdf with the hashing model."""
+    from src.vector_db import VectorDB
+
+    db = VectorDB()
+    db.create_from_pdf(sample_pdf)
+    return db
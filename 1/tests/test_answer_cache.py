@@ -0,0 +1,97 @@
+"""
+Semantic answer cache: similarity matching, session scoping, index
+version invalidation, TTL and eviction.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from src.answer_cache import SemanticAnswerCache
+
+QUESTION = np.array([1.0, 0.0, 0.0, 0.0])
+PARAPHRASE = np.array([0.99, 0.1, 0.0, 0.0])
+OTHER_QUESTION = np.array([0.0, 1.0, 0.0, 0.0])
+
+
+@pytest.fixture
+def cache():
+    return SemanticAnswerCache(similarity_threshold=0.95)
+
+
+def test_paraphrase_hits_unrelated_question_misses(cache):
+    cache.put(QUESTION * 3, index_version=1, answer="42", source_documents=["page 1"])
+
+    hit = cache.get(PARAPHRASE, index_version=1)
+    assert hit["answer"] == "42" and hit["source_documents"] == ["page 1"]
+    assert hit["similarity"] > 0.95
+    assert cache.get(OTHER_QUESTION, index_version=1) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_shared_answers_reach_every_session(cache):
+    cache.put(QUESTION, 1, "shared", [])
+
+    assert cache.get(QUESTION, 1, session_id="alice")["answer"] == "shared"
+    assert cache.get(QUESTION, 1, session_id="bob")["answer"] == "shared"
+    assert cache.get(QUESTION, 1)["answer"] == "shared"
+
+
+def test_session_answers_stay_in_their_session(cache):
+    cache.put(QUESTION, 1, "for alice", [], session_id="alice")
+
+    assert cache.get(QUESTION, 1, session_id="alice")["answer"] == "for alice"
+    assert cache.get(QUESTION, 1, session_id="bob") is None
+    assert cache.get(QUESTION, 1) is None
+
+
+def test_session_answer_preferred_only_when_closer(cache):
+    cache.put(QUESTION, 1, "shared", [])
+    cache.put(PARAPHRASE, 1, "for alice", [], session_id="alice")
+
+    assert cache.get(PARAPHRASE, 1, session_id="alice")["answer"] == "for alice"
+    assert cache.get(PARAPHRASE, 1, session_id="bob")["answer"] == "shared"
+
+
+def test_index_change_drops_answers(cache):
+    cache.put(QUESTION, 1, "old index", [])
+
+    assert cache.get(QUESTION, index_version=2) is None
+    assert cache.stats()["stale"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_answers_are_dropped():
+    cache = SemanticAnswerCache(ttl_seconds=0.1)
+    cache.put(QUESTION, 1, "soon stale", [])
+    time.sleep(0.2)
+
+    assert cache.get(QUESTION, 1) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_full_cache_evicts_oldest():
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.put(QUESTION, 1, "first", [])
+    cache.put(OTHER_QUESTION, 1, "second", [])
+    cache.put(np.array([0.0, 0.0, 1.0, 0.0]), 1, "third", [])
+
+    assert cache.get(QUESTION, 1) is None
+    assert cache.get(OTHER_QUESTION, 1)["answer"] == "second"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_clear_frees_every_slot():
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.put(QUESTION, 1, "first", [])
+    cache.put(OTHER_QUESTION, 1, "second", [])
+    cache.clear()
+    cache.put(QUESTION, 1, "again", [])
+    cache.put(OTHER_QUESTION, 1, "again", [])
+
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 0
@@ -0,0 +1,102 @@
+"""
+BM25 keyword index (CSR postings) and reciprocal rank fusion.
+"""
+
+import math
+from collections import Counter
+
+import pytest
+from langchain_core.documents import Document
+
+from src.bm25_index import BM25Index, fuse_results, reciprocal_rank_fusion, tokenize
+
+from .conftest import TOPICS
+
+IDS = [f"chunk-{i}" for i in range(len(TOPICS))]
+
+
+def reference_scores(query, texts, k1=1.5, b=0.75):
+    """BM25 computed the textbook way, one chunk at a time."""
+    documents = [tokenize(text) for text in texts]
+    average = sum(len(tokens) for tokens in documents) / len(documents)
+    scores = []
+    for tokens in documents:
+        counts = Counter(tokens)
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in other for other in documents)
+            if not counts[term]:
+                continue
+            idf = math.log(1.0 + (len(documents) - df + 0.5) / (df + 0.5))
+            tf = counts[term]
+            score += idf * tf * (k1 + 1.0) / (tf + k1 * (1.0 - b + b * len(tokens) / average))
+        scores.append(score)
+    return scores
+
+
+@pytest.fixture
+def index():
+    return BM25Index.build(IDS, TOPICS)
+
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize("The Metrics of a Product") == ["metrics", "product"]
+
+
+def test_scores_match_textbook_bm25(index):
+    query = "product metrics retention"
+    expected = reference_scores(query, TOPICS)
+    results = index.search(query, k=len(IDS))
+
+    assert [chunk_id for chunk_id, _ in results] == \
+        [IDS[i] for i in sorted(range(len(IDS)), key=lambda i: -expected[i]) if expected[i] > 0]
+    for chunk_id, score in results:
+        assert score == pytest.approx(expected[IDS.index(chunk_id)], rel=1e-5)
+
+
+def test_search_returns_top_k_and_only_matching_chunks(index):
+    assert len(index.search("product", k=1)) == 1
+    assert index.search("zebra", k=4) == []
+    assert [chunk_id for chunk_id, _ in index.search("pricing tiered", k=4)] == ["chunk-4"]
+
+
+def test_empty_index():
+    index = BM25Index.build([], [])
+    assert len(index) == 0
+    assert index.search("product", k=4) == []
+
+
+def test_save_and_load_round_trip(index, tmp_path):
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path), IDS)
+
+    assert loaded is not None
+    assert (loaded.k1, loaded.b) == (index.k1, index.b)
+    for query in ("product metrics", "estimation market assumption", "stories result"):
+        assert loaded.search(query, k=3) == index.search(query, k=3)
+
+
+def test_load_rejects_a_store_with_other_chunks(index, tmp_path):
+    index.save(str(tmp_path))
+    assert BM25Index.load(str(tmp_path), IDS[:-1]) is None
+    assert BM25Index.load(str(tmp_path / "missing"), IDS) is None
+
+
+def test_reciprocal_rank_fusion():
+    fused = dict(reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], rrf_k=60))
+
+    assert fused["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused["a"] == pytest.approx(1 / 61)
+    assert fused["d"] == pytest.approx(1 / 62)
+    assert max(fused, key=fused.get) == "b"
+
+
+def test_fuse_results_ignores_scores_and_dedupes_by_chunk_id():
+    a, b, c = (Document(page_content=text, metadata={"chunk_id": text}) for text in "abc")
+    vector_hits = [(a, 0.1), (b, 0.2)]
+    keyword_hits = [(Document(page_content="b", metadata={"chunk_id": "b"}), 9.0), (c, 1.0)]
+
+    fused = fuse_results([vector_hits, keyword_hits], k=2)
+
+    assert [doc.metadata["chunk_id"] for doc, _ in fused] == ["b", "a"]
+    assert fused[0][0] is b  # The first list's Document is kept
@@ -0,0 +1,112 @@
+"""
+Columnar vector store: memory-mapped docstore with its in-memory overlay,
+write_store()/read_store() round trip and directory replacement.
+"""
+
+import os
+
+import faiss
+import numpy as np
+import pytest
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+from src.columnar_store import (MmapDocstore, read_store, replace_directory, store_exists,
+                                write_store)
+
+DIMENSION = 8
+
+
+def chunk(i):
+    return Document(id=f"c{i}", page_content=f"Chunk number {i} é", metadata={"page": i, "start_index": 10 * i})
+
+
+def save(path, count=3):
+    ids = [f"c{i}" for i in range(count)]
+    vectors = np.random.default_rng(0).random((count, DIMENSION), dtype=np.float32)
+    index = faiss.IndexFlatL2(DIMENSION)
+    index.add(vectors)
+    write_store(str(path), index, ids, InMemoryDocstore({f"c{i}": chunk(i) for i in range(count)}), vectors)
+    return ids, vectors
+
+
+def test_round_trip(tmp_path):
+    ids, vectors = save(tmp_path)
+    assert store_exists(str(tmp_path))
+
+    index, docstore, index_to_id, column = read_store(str(tmp_path))
+
+    assert index.ntotal == 3
+    assert index_to_id == {0: "c0", 1: "c1", 2: "c2"}
+    assert np.array_equal(column.get(ids), vectors)
+    doc = docstore.search("c1")
+    assert (doc.id, doc.page_content, doc.metadata) == ("c1", "Chunk number 1 é", {"page": 1, "start_index": 10})
+    assert docstore.search("c9") == "ID c9 not found."
+
+
+def test_empty_store(tmp_path):
+    write_store(str(tmp_path), faiss.IndexFlatL2(DIMENSION), [], InMemoryDocstore({}),
+                np.zeros((0, DIMENSION), dtype=np.float32))
+
+    index, docstore, index_to_id, column = read_store(str(tmp_path))
+
+    assert index.ntotal == 0 and index_to_id == {}
+    assert column.get([]).shape == (0, DIMENSION)
+
+
+def test_overlay_add_and_delete(tmp_path):
+    ids, _ = save(tmp_path)
+    docstore = MmapDocstore(str(tmp_path), ids)
+
+    docstore.add({"c3": chunk(3)})
+    docstore.delete(["c0", "c3"])
+
+    assert docstore.search("c0") == "ID c0 not found."
+    assert docstore.search("c3") == "ID c3 not found."
+    assert docstore.search("c1").page_content == "Chunk number 1 é"
+    assert docstore.raw_record("c0") is None
+    with pytest.raises(ValueError):
+        docstore.add({"c1": chunk(1)})
+    with pytest.raises(ValueError):
+        docstore.delete(["c0"])
+
+    # A deleted chunk can be added again (it then lives in the overlay)
+    replacement = Document(id="c0", page_content="New text", metadata={})
+    docstore.add({"c0": replacement})
+    assert docstore.search("c0") is replacement
+    assert docstore.raw_record("c0") is None
+
+
+def test_resave_reuses_records_and_applies_overlay(tmp_path):
+    ids, vectors = save(tmp_path / "a")
+    index, docstore, _, column = read_store(str(tmp_path / "a"))
+    docstore.delete(["c1"])
+    docstore.add({"c3": chunk(3)})
+    column.remove(["c1"])
+    column.add(["c3"], np.ones((1, DIMENSION), dtype=np.float32))
+
+    new_ids = ["c0", "c2", "c3"]
+    new_vectors = column.get(new_ids)
+    new_index = faiss.IndexFlatL2(DIMENSION)
+    new_index.add(new_vectors)
+    write_store(str(tmp_path / "b"), new_index, new_ids, docstore, new_vectors)
+
+    _, reloaded, _, reloaded_column = read_store(str(tmp_path / "b"))
+    assert reloaded.raw_record("c0") == docstore.raw_record("c0")
+    assert reloaded.search("c3").page_content == "Chunk number 3 é"
+    assert reloaded.search("c1") == "ID c1 not found."
+    assert np.array_equal(reloaded_column.get(["c0", "c2"]), vectors[[0, 2]])
+    assert np.array_equal(reloaded_column.get(["c3"]), np.ones((1, DIMENSION), dtype=np.float32))
+
+
+def test_replace_directory(tmp_path):
+    target, staging = tmp_path / "store", tmp_path / "store.tmp"
+    target.mkdir()
+    (target / "old.txt").write_text("old")
+    staging.mkdir()
+    (staging / "new.txt").write_text("new")
+
+    replace_directory(str(staging), str(target))
+
+    assert sorted(os.listdir(tmp_path)) == ["store"]
+    assert sorted(os.listdir(target)) == ["new.txt"]
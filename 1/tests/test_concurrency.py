@@ -0,0 +1,51 @@
+"""
+Async chat concurrency: N parallel chats finish in about the time of one.
+
+Uses the simulated LLM of benchmark_concurrency.py (answers after a fixed
+latency, awaiting like a network call). If anything on the async chat
+path blocks the event loop again - an LLM call, embedding, search or a
+session store round trip - the chats serialize and these tests fail.
+"""
+
+import asyncio
+
+import pytest
+
+from benchmark_concurrency import QUESTIONS, measure, simulated_llm
+
+LLM_LATENCY = 0.5
+CHATS = 8
+
+
+@pytest.fixture
+def bot(vector_db, monkeypatch):
+    from src.chatbot import ConversationBot
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-simulated")
+    bot = ConversationBot(vector_db)
+    bot.llm = simulated_llm(LLM_LATENCY)
+    bot._initialize_chain()
+    asyncio.run(measure(bot, QUESTIONS[:1], parallel=False))  # Warm up
+    return bot
+
+
+def test_parallel_chats_take_about_as_long_as_one(bot):
+    single = asyncio.run(measure(bot, QUESTIONS[:1], parallel=False))
+    parallel = asyncio.run(measure(bot, QUESTIONS[:CHATS], parallel=True))
+
+    assert single["total_s"] >= LLM_LATENCY
+    assert parallel["total_s"] <= 1.5 * single["total_s"]
+
+
+def test_event_loop_stays_responsive(bot):
+    parallel = asyncio.run(measure(bot, QUESTIONS[:CHATS], parallel=True))
+
+    # A blocking call would delay the heartbeat by a whole LLM round trip
+    assert parallel["max_loop_lag_ms"] < LLM_LATENCY * 1000 / 2
+
+
+def test_serial_chats_add_up(bot):
+    # Sanity check of the measurement: one after another, the LLM waits add up
+    serial = asyncio.run(measure(bot, QUESTIONS[:4], parallel=False))
+
+    assert serial["total_s"] >= 4 * LLM_LATENCY
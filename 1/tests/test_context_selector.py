@@ -0,0 +1,66 @@
+"""
+Context selector: MMR picks diverse chunks; only chunks that are adjacent
+in the page text (by splitter offsets) are merged.
+"""
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.context_selector import ContextSelector
+
+PAGE = "Alpha beta gamma. Delta epsilon zeta. Eta theta iota. Kappa lambda mu. Nu xi omicron."
+
+
+def piece(start, end, page=1, **metadata):
+    return Document(page_content=PAGE[start:end],
+                    metadata={"source": "book.pdf", "page": page, "start_index": start, **metadata})
+
+
+def test_mmr_skips_near_duplicates():
+    query = np.array([1.0, 0.0])
+    vectors = np.array([[1.0, 0.0], [0.999, 0.01], [0.7, 0.7]])
+
+    assert ContextSelector(lambda_mult=0.3).mmr(query, vectors, 2) == [0, 2]
+    assert ContextSelector(lambda_mult=1.0).mmr(query, vectors, 2) == [0, 1]
+
+
+def test_overlapping_neighbours_merge_into_the_page_text():
+    merged = ContextSelector().merge([piece(18, 55), piece(0, 37), piece(50, len(PAGE))])
+
+    assert len(merged) == 1
+    assert merged[0].page_content == PAGE
+    assert merged[0].metadata["start_index"] == 0
+    assert merged[0].metadata["merged_chunks"] == 3
+
+
+def test_touching_chunks_merge_and_keep_the_best_ranked_metadata():
+    merged = ContextSelector().merge([piece(18, 37, rank="best"), piece(0, 18, rank="second")])
+
+    assert [doc.page_content for doc in merged] == [PAGE[0:37]]
+    assert merged[0].metadata["rank"] == "best"
+
+
+def test_chunks_with_a_gap_stay_apart():
+    docs = [piece(0, 17), piece(37, 53)]
+    assert ContextSelector().merge(docs) == docs
+
+
+def test_other_pages_and_missing_offsets_never_merge():
+    other_page = piece(10, 40, page=2)
+    no_offsets = Document(page_content=PAGE[10:40], metadata={"source": "book.pdf", "page": 1})
+    docs = [piece(0, 37), other_page, no_offsets]
+
+    assert ContextSelector().merge(docs) == docs
+
+
+def test_stale_offsets_are_not_trusted():
+    moved = Document(page_content="Something else entirely here.",
+                     metadata={"source": "book.pdf", "page": 1, "start_index": 20})
+    docs = [piece(0, 37), moved]
+
+    assert ContextSelector().merge(docs) == docs
+
+
+def test_merging_can_be_turned_off():
+    docs = [piece(0, 37), piece(18, 55)]
+    assert ContextSelector(merge_overlaps=False).select("query", docs, k=4, store=None) == docs
@@ -0,0 +1,126 @@
+"""
+Multi-document corpus shared by several processes: each CorpusDB stands
+in for one worker's copy of the same vector_store/ directory.
+"""
+
+import os
+import time
+
+import pytest
+
+from .conftest import book_pages, write_pdf
+
+
+@pytest.fixture
+def documents(tmp_path):
+    directory = tmp_path / "documents"
+    directory.mkdir()
+    write_pdf(str(directory / "a.pdf"), book_pages(2))
+    return directory
+
+
+@pytest.fixture
+def make_corpus(hashing_model, tmp_path):
+    from src.corpus import CorpusDB
+
+    def make():
+        corpus = CorpusDB(str(tmp_path / "vector_store"))
+        corpus.load()
+        return corpus
+
+    return make
+
+
+def names(corpus):
+    return sorted(os.path.basename(source) for source in corpus.shards)
+
+
+def wait_for_jobs(manager, timeout=30.0):
+    """Jobs of a manager once none is queued or running."""
+    deadline = time.monotonic() + timeout
+    while any(not job.finished for job in manager.list()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return manager.list()
+
+
+def test_sync_and_reload(make_corpus, documents):
+    corpus = make_corpus()
+    stats = corpus.sync_directory(str(documents))
+
+    assert names(corpus) == ["a.pdf"]
+    assert stats[str(documents / "a.pdf")]["chunks_added"] > 0
+    assert names(make_corpus()) == ["a.pdf"]
+    assert corpus.similarity_search("roadmap prioritization", k=1)
+
+
+def test_refresh_picks_up_other_workers_changes(make_corpus, documents):
+    worker_a, worker_b = make_corpus(), make_corpus()
+    worker_a.sync_directory(str(documents))
+
+    version = worker_b.version
+    assert worker_b.refresh() is True
+    assert names(worker_b) == ["a.pdf"]
+    assert worker_b.version > version
+    assert worker_b.refresh() is False  # Nothing changed since
+
+    # A new document: the unchanged shard object is kept
+    shard_a = worker_b.shards[str(documents / "a.pdf")]
+    worker_a.sync_document(write_pdf(str(documents / "b.pdf"), book_pages(3)))
+    assert worker_b.refresh() is True
+    assert names(worker_b) == ["a.pdf", "b.pdf"]
+    assert worker_b.shards[str(documents / "a.pdf")] is shard_a
+
+    worker_a.drop_document(str(documents / "a.pdf"))
+    assert worker_b.refresh() is True
+    assert names(worker_b) == ["b.pdf"]
+
+
+def test_writer_starts_from_the_latest_shard(make_corpus, documents):
+    worker_a, worker_b = make_corpus(), make_corpus()
+    worker_a.sync_directory(str(documents))
+
+    # Worker B never refreshed, but must not re-embed the document from scratch
+    stats = worker_b.sync_document(str(documents / "a.pdf"))
+
+    assert stats["chunks_added"] == 0
+    assert names(worker_b) == ["a.pdf"]
+
+
+def test_jobs_are_shared_between_workers(make_corpus, documents, tmp_path):
+    from src.ingest_jobs import IngestionJobManager
+
+    path = str(tmp_path / "jobs.db")
+    worker_a = IngestionJobManager(make_corpus(), path)
+    worker_b = IngestionJobManager(make_corpus(), path)
+
+    job = worker_a.submit(str(documents / "a.pdf"))
+    wait_for_jobs(worker_b)
+
+    seen = worker_b.get(job.job_id)
+    assert seen.status == "succeeded"
+    assert seen.chunks_done > 0
+    assert [job.job_id for job in worker_b.list()] == [job.job_id]
+    assert worker_b.get("unknown") is None
+    assert names(worker_b.corpus) == []
+    worker_b.corpus.refresh()
+    assert names(worker_b.corpus) == ["a.pdf"]
+
+
+def test_jobs_of_exited_workers_are_resumed(make_corpus, documents, tmp_path):
+    from src.ingest_jobs import IngestionJobManager
+
+    path = str(tmp_path / "jobs.db")
+    pid = os.fork()
+    if pid == 0:
+        # A worker that accepts uploads and exits before running them
+        manager = IngestionJobManager(make_corpus(), path)
+        manager._executor.submit = lambda *args: None
+        manager.submit(str(documents / "a.pdf"))
+        manager.submit(str(documents / "a.pdf"))
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    manager = IngestionJobManager(make_corpus(), path)
+
+    assert [job.status for job in wait_for_jobs(manager)] == ["succeeded", "succeeded"]
+    assert names(manager.corpus) == ["a.pdf"]
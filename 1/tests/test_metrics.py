@@ -0,0 +1,102 @@
+"""
+Metrics: shared-memory values across forked processes, counter and
+histogram exposition, and what a chat request records.
+"""
+
+import os
+
+import pytest
+
+from src.metrics import Counter, Histogram, RAGMetrics, SharedValues, gauge
+
+
+def series(text, line_start):
+    """Value of the exposition line starting with `line_start`."""
+    for line in text.splitlines():
+        if line.startswith(line_start + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"No series {line_start}")
+
+
+def test_forked_children_update_the_parents_values():
+    values = SharedValues(capacity=4)
+    slot = values.allocate(1)
+
+    children = []
+    for _ in range(4):
+        pid = os.fork()
+        if pid == 0:
+            for _ in range(250):
+                values.add([(slot, 1.0)])
+            os._exit(0)
+        children.append(pid)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+    assert values.read(slot, 1) == [1000.0]
+
+
+def test_allocation_is_bounded():
+    values = SharedValues(capacity=4)
+    assert values.allocate(3) == 0
+    assert values.allocate(1) == 3
+    with pytest.raises(ValueError):
+        values.allocate(1)
+
+
+def test_counter_render():
+    counter = Counter(SharedValues(16), "requests_total", "Requests.", {"status": ("ok", "error")})
+    counter.inc(status="ok")
+    counter.inc(2, status="ok")
+
+    assert counter.render() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{status="ok"} 3',
+        'requests_total{status="error"} 0',
+    ]
+    with pytest.raises(ValueError):
+        counter.inc(status="teapot")
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(SharedValues(16), "latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 3.65",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_gauge():
+    assert gauge("hit_ratio", "Hits.", {("answer",): 0.5}, ["cache"])[2] == 'hit_ratio{cache="answer"} 0.5'
+    assert gauge("ready", "Ready.", {(): 1})[2] == "ready 1"
+
+
+def test_observe_chat():
+    metrics = RAGMetrics(SharedValues())
+    metrics.observe_chat("chat", {
+        "route": "rag", "rewrite": "reference", "cached": False,
+        "timings_ms": {"retrieval": 20.0, "faiss_search": 5.0, "unknown_stage": 1.0},
+        "prompt_tokens": {"context": 900, "history": 100, "total": 1100},
+    })
+    metrics.observe_chat("chat_stream", {"route": "casual"})
+    metrics.observe_error("chat")
+
+    text = metrics.render(ready=True)
+
+    assert series(text, 'rag_requests_total{endpoint="chat",status="ok"}') == 1
+    assert series(text, 'rag_requests_total{endpoint="chat",status="error"}') == 1
+    assert series(text, 'rag_route_total{route="casual"}') == 1
+    assert series(text, 'rag_rewrite_decisions_total{reason="reference"}') == 1
+    assert series(text, 'rag_answer_cache_lookups_total{result="miss"}') == 1
+    assert series(text, 'rag_stage_duration_seconds_sum{stage="retrieval"}') == pytest.approx(0.02)
+    assert series(text, 'rag_stage_duration_seconds_count{stage="faiss_search"}') == 1
+    assert series(text, 'rag_prompt_tokens_bucket{part="context",le="1024"}') == 1
+    assert series(text, "rag_ready") == 1
+    assert "unknown_stage" not in text
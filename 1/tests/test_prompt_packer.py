@@ -0,0 +1,122 @@
+"""
+Prompt packer: context first (best chunk first), then history (newest
+first), cut at sentence boundaries, within the token budget.
+
+Uses the 4-characters-per-token estimate, so counts don't depend on
+whether tiktoken's encoding files can be downloaded.
+"""
+
+import pytest
+from langchain_core.documents import Document
+
+from src.prompt_packer import NO_HISTORY, PromptPacker, TokenCounter
+
+
+class EstimatingCounter(TokenCounter):
+    """TokenCounter that always estimates (CHARS_PER_TOKEN)."""
+
+    def __init__(self):
+        self.model = "estimate"
+        self._encoding = None
+        self.exact = False
+
+
+def make_packer(max_prompt_tokens, min_piece_tokens=4):
+    return PromptPacker(max_prompt_tokens=max_prompt_tokens, min_piece_tokens=min_piece_tokens,
+                        counter=EstimatingCounter())
+
+
+def chunk(text, page):
+    return Document(page_content=text, metadata={"page": page})
+
+
+SENTENCES = "First sentence here. Second sentence here. Third sentence here."  # 63 chars, 16 tokens
+
+
+def test_estimate():
+    counter = EstimatingCounter()
+    assert counter.count("") == 0
+    assert counter.count("abcd") == 1
+    assert counter.count("abcde") == 2
+
+
+def test_truncate_cuts_at_sentence_then_word_boundary():
+    packer = make_packer(1000)
+
+    assert packer.truncate(SENTENCES, 100) == SENTENCES
+    assert packer.truncate(SENTENCES, 11) == "First sentence here. Second sentence here."
+    assert packer.truncate(SENTENCES, 5) == "First sentence here."
+    assert packer.truncate(SENTENCES, 4) == "First sentence"
+    assert packer.truncate(SENTENCES, 0) == ""
+
+
+def test_everything_fits():
+    packer = make_packer(1000)
+    results = [(chunk("Alpha text.", 1), 0.1), (chunk("Beta text.", 2), 0.2)]
+    history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello"}]
+
+    packed = packer.pack(results, history, reserved_tokens=10)
+
+    assert packed.context == "Alpha text.\n\nBeta text."
+    assert packed.results == results
+    assert packed.chat_history == "User: Hi\nAssistant: Hello\n"
+    assert packed.tokens["total"] == 10 + packed.tokens["context"] + packed.tokens["history"]
+
+
+def test_context_stops_at_the_first_chunk_that_does_not_fit():
+    # 10 reserved + 7 for NO_HISTORY leave 28 tokens: chunk 1 (16) fits, chunk 2
+    # gets 11 after the separator
+    packer = make_packer(45)
+    results = [(chunk(SENTENCES, 1), 0.1), (chunk(SENTENCES, 2), 0.2), (chunk("Short.", 3), 0.3)]
+
+    packed = packer.pack(results, None, reserved_tokens=10)
+
+    assert [doc.metadata["page"] for doc, _ in packed.results] == [1, 2]
+    cut = packed.results[1][0]
+    assert cut.page_content == "First sentence here. Second sentence here."
+    assert results[1][0].page_content == SENTENCES  # The store's Document is untouched
+    assert packed.chat_history == NO_HISTORY
+    assert packed.tokens["total"] <= 45
+
+
+def test_pieces_below_the_minimum_are_left_out():
+    packer = make_packer(30, min_piece_tokens=8)
+    results = [(chunk(SENTENCES, 1), 0.1), (chunk(SENTENCES, 2), 0.2)]
+
+    packed = packer.pack(results, None)
+
+    # 23 tokens left for context: chunk 2 could only keep "First sentence here." (5 tokens)
+    assert [doc.metadata["page"] for doc, _ in packed.results] == [1]
+
+
+def test_history_keeps_the_newest_messages():
+    packer = make_packer(15)
+    history = [{"role": "user", "content": "An old question that is long."},
+               {"role": "assistant", "content": "Old answer."},
+               {"role": "user", "content": "New question?"}]
+
+    text, tokens = packer.pack_history(history)
+
+    assert text == "Assistant: Old answer.\nUser: New question?\n"
+    assert tokens <= 15
+
+
+def test_history_reserve_is_kept_for_the_no_history_line():
+    packer = make_packer(20)
+
+    packed = packer.pack([(chunk("x" * 200, 1), None)], [], reserved_tokens=0)
+
+    assert packed.chat_history == NO_HISTORY
+    assert packed.tokens["total"] <= 20
+
+
+@pytest.mark.parametrize("budget", [0, 5, 50, 500])
+def test_total_never_exceeds_the_budget(budget):
+    packer = make_packer(budget)
+    results = [(chunk(SENTENCES * 3, page), None) for page in range(4)]
+    history = [{"role": "user", "content": SENTENCES}] * 6
+
+    packed = packer.pack(results, history, reserved_tokens=0)
+
+    if budget >= packer.count(NO_HISTORY):
+        assert packed.tokens["total"] <= budget
@@ -0,0 +1,129 @@
+"""
+Session stores: message packing, and the same behaviour from every
+backend (memory, SQLite, Redis via fakeredis) - per-session history,
+length limit, idle expiry and clear.
+"""
+
+import time
+
+import pytest
+
+from src.session_store import _message_size, create_session_store, pack_message, unpack_message
+
+BACKENDS = ["memory", "sqlite", "redis"]
+
+
+@pytest.fixture
+def make_store(request, tmp_path):
+    backend = request.param
+
+    def make(**options):
+        if backend == "sqlite":
+            options["path"] = str(tmp_path / "sessions.db")
+        elif backend == "redis":
+            fakeredis = pytest.importorskip("fakeredis")
+            options["client"] = fakeredis.FakeRedis()
+        return create_session_store(backend, **options)
+
+    return make
+
+
+def turn(i):
+    return [{"role": "user", "content": f"question {i}"}, {"role": "assistant", "content": f"answer {i}"}]
+
+
+@pytest.mark.parametrize("message", [
+    {"role": "user", "content": "hi"},
+    {"role": "assistant", "content": ""},
+    {"role": "system", "content": "Unicode: é ✓ 日本"},
+    {"role": "assistant", "content": "A long, repetitive answer. " * 40},
+])
+def test_pack_round_trip(message):
+    assert unpack_message(pack_message(message)) == message
+
+
+def test_pack_compresses_long_texts_only():
+    short = {"role": "user", "content": "short question"}
+    long = {"role": "assistant", "content": "A long, repetitive answer. " * 40}
+
+    assert pack_message(short) == b"ushort question"
+    assert pack_message(long)[:1] == b"A"
+    assert len(pack_message(long)) < len(long["content"]) // 4
+
+
+@pytest.mark.parametrize("make_store", BACKENDS, indirect=True)
+def test_sessions_are_separate(make_store):
+    store = make_store()
+    store.append("alice", turn(1))
+    store.append("bob", turn(2))
+
+    assert store.get_history("alice") == turn(1)
+    assert store.get_history("bob") == turn(2)
+    assert store.get_history("carol") == []
+    assert store.stats()["active_sessions"] == 2
+
+
+@pytest.mark.parametrize("make_store", BACKENDS, indirect=True)
+def test_history_keeps_the_newest_messages(make_store):
+    store = make_store(max_messages=4)
+    for i in range(3):
+        store.append("alice", turn(i))
+
+    assert store.get_history("alice") == turn(1) + turn(2)
+    assert store.stats()["trimmed_messages"] == 2
+
+
+@pytest.mark.parametrize("make_store", BACKENDS, indirect=True)
+def test_clear(make_store):
+    store = make_store()
+    store.append("alice", turn(1))
+
+    assert store.clear("alice") is True
+    assert store.clear("alice") is False
+    assert store.get_history("alice") == []
+
+
+@pytest.mark.parametrize("make_store", ["memory", "sqlite"], indirect=True)
+def test_idle_sessions_expire(make_store):
+    store = make_store(idle_ttl_seconds=0.2)
+    store.append("alice", turn(1))
+    time.sleep(0.3)
+    store.append("bob", turn(2))
+
+    assert store.get_history("alice") == []
+    assert store.get_history("bob") == turn(2)
+    assert store.stats()["expired"] == 1
+
+
+@pytest.mark.parametrize("make_store", ["memory", "sqlite"], indirect=True)
+def test_size_cap_evicts_least_recently_active(make_store):
+    long = [{"role": "assistant", "content": "x" * 1000}]
+    # Room for two sessions but not three (SQLite counts packed bytes)
+    store = make_store()
+    size = len(pack_message(long[0])) if store.stats()["backend"] == "sqlite" else _message_size(long[0])
+    store = make_store(max_total_bytes=int(2.5 * size))
+    store.append("alice", long)
+    store.append("bob", long)
+    store.get_history("alice")  # Alice is now more recent than Bob
+    store.append("carol", long)
+
+    assert store.get_history("bob") == []
+    assert store.get_history("alice") == long
+    assert store.get_history("carol") == long
+    assert store.stats()["evicted_for_memory"] == 1
+
+
+def test_sqlite_sessions_are_shared_between_stores(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a = create_session_store("sqlite", path=path)
+    worker_b = create_session_store("sqlite", path=path)
+
+    worker_a.append("alice", turn(1))
+    worker_b.append("alice", turn(2))
+
+    assert worker_a.get_history("alice") == turn(1) + turn(2)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_session_store("memcached")